@@ -0,0 +1,31 @@
+import importlib
+
+import numpy as np
+
+# Helpers shared by the queue, the sweep, the cascade and the multi-config pass, kept free of their
+# heavier dependencies (pandas, SQLite, the encoders)
+CONFIG_CHUNK = 256  # Configurations evaluated per broadcast step, bounding memory at CONFIG_CHUNK x profiles
+
+def load_analyzer(name):
+    return importlib.import_module(name)
+
+def weighted_mean(blend, mask):
+    # np.average(x, weights=|x|) over the masked categories, for every profile at once. Scaling all
+    # x by s gives s * sum(b|b|) / sum(|b|), so the group score factors out of the blend
+    b = blend[..., mask]
+    denominator = np.abs(b).sum(axis=-1)
+    return np.divide((b * np.abs(b)).sum(axis=-1), denominator, out=np.zeros_like(denominator), where=denominator != 0)
+
+def total_scores(cosine, ngram, is_target, configs):
+    # configs is (C, 4): target_score, avoid_score, cosine_weight, ngram_weight. Returns (C, profiles).
+    # The blends only depend on the two weights, so each distinct weight pair is reduced once
+    pairs, pair_index = np.unique(configs[:, 2:], axis=0, return_inverse=True)
+    pair_index = pair_index.reshape(-1)
+    target_means = np.empty((len(pairs), cosine.shape[0]))
+    avoid_means = np.empty((len(pairs), cosine.shape[0]))
+    for start in range(0, len(pairs), CONFIG_CHUNK):
+        weights = pairs[start:start + CONFIG_CHUNK]
+        blend = weights[:, 0, None, None] * cosine[None] + weights[:, 1, None, None] * ngram[None]
+        target_means[start:start + CONFIG_CHUNK] = weighted_mean(blend, is_target)
+        avoid_means[start:start + CONFIG_CHUNK] = weighted_mean(blend, ~is_target)
+    return configs[:, 0, None] * target_means[pair_index] + configs[:, 1, None] * avoid_means[pair_index]
@@ -1,92 +1,289 @@
 import pandas as pd
 import numpy as np
-import re
 import json
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
 from tqdm import tqdm
-from rapidfuzz import fuzz
-from sentence_transformers import SentenceTransformer
+from plot_render import PlotRenderer
+from profile_doc import ProfileDoc
+from fuzzy_match import score_phrase_pruned, ComparisonBudget
+from phrase_matcher import exact_phrase_hits
+from category_library import load_category_library
+from checkpoint import SchoolCheckpoint, CHECKPOINT_DIR, run_key
+from results_store import write_run, RESULTS_DB
+from cascade import run_cascade, read_reference, rank_agreement, CASCADE_TOP_N
+from embedding_cache import EmbeddingCache, EMBEDDING_CACHE
+from near_duplicates import DuplicateScoreCache
+from encode_pool import EncodingPool
+from score_pool import ScoringPool
+from embedding_reduction import load_or_fit, REDUCTION_DIMS
+from canonical_text import canonicalize_record, split_empty_profiles
 import os
 
-# Load BERT model
-model = SentenceTransformer('all-MiniLM-L6-v2')
+# BERT model; FACULTY_ENCODER=onnx swaps in the int8 ONNX Runtime encoder for CPU-only machines and
+# FACULTY_ENCODER=lexical skips embeddings altogether (every _cosine column is 0)
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+EMBEDDING_ENGINE = os.getenv('FACULTY_ENCODER', 'torch')
+if EMBEDDING_ENGINE == 'onnx':
+    EMBEDDING_BACKEND = f'{EMBEDDING_MODEL}:onnx-int8'
+elif EMBEDDING_ENGINE == 'lexical':
+    EMBEDDING_BACKEND = 'lexical'
+else:
+    EMBEDDING_BACKEND = EMBEDDING_MODEL
+_model = None
 
-def normalize_text(text):
-    if pd.isna(text):
-        return ""
-    return re.sub(r'[^\w\s]', '', str(text).lower())
-
-def get_ngrams(text, n):
-    words = text.split()
-    return [' '.join(words[i:i+n]) for i in range(len(words)-n+1)]
-
-def multi_ngram_search(query, text, max_n=3):
-    query = normalize_text(query)
-    text = normalize_text(text)
-    
-    query_ngrams = [get_ngrams(query, i) for i in range(1, max_n+1)]
-    text_ngrams = [get_ngrams(text, i) for i in range(1, max_n+1)]
-    
-    score = 0
-    max_score = 0
-    
-    for n in range(1, max_n+1):
-        for q_gram in query_ngrams[n-1]:
-            best_match = max((fuzz.ratio(q_gram, t_gram) for t_gram in text_ngrams[n-1]), default=0)
-            score += best_match * n * n  # Weight longer n-grams more
-        max_score += 100 * len(query_ngrams[n-1]) * n * n
-    
-    return score / max_score if max_score > 0 else 0.0
+def get_model():
+    # Loaded on first use, so importing this module stays cheap and lexical runs never load torch
+    global _model
+    if _model is None:
+        if EMBEDDING_ENGINE == 'onnx':
+            from onnx_encoder import OnnxSentenceEncoder
+            _model = OnnxSentenceEncoder(EMBEDDING_MODEL)
+        else:
+            from sentence_transformers import SentenceTransformer
+            _model = SentenceTransformer(EMBEDDING_MODEL)
+    return _model
 
 def get_embedding(text):
+    if EMBEDDING_ENGINE == 'lexical':
+        return None
     if pd.isna(text):
         return np.zeros(384)  # Return zero vector for NaN values (384 is the dimension of 'all-MiniLM-L6-v2' embeddings)
     text = str(text).replace("\n", " ")
-    return model.encode(text)
+    return get_model().encode(text)
+
+def get_embeddings(texts, encoder_pool=None):
+    # Batch form of get_embedding; the pool spreads batches over worker processes on every core
+    if EMBEDDING_ENGINE == 'lexical':
+        return [None] * len(texts)
+    texts = [str(text).replace("\n", " ") for text in texts]
+    if encoder_pool is not None:
+        return encoder_pool.encode(texts)
+    return get_model().encode(texts, batch_size=64)
+
+def embed_texts(texts, encoder_pool=None, embedding_cache=None):
+    if embedding_cache is not None:
+        return embedding_cache.embed(texts, lambda missing: get_embeddings(missing, encoder_pool))
+    return get_embeddings(texts, encoder_pool)
+
+def embedding_key(field_weights=None):
+    # Names how profile vectors are built, so checkpoints from different field mixes never mix
+    if not field_weights:
+        return EMBEDDING_BACKEND
+    return EMBEDDING_BACKEND + '-fields-' + '-'.join(f'{field}{weight:g}' for field, weight in sorted(field_weights.items()))
+
+def parse_field_weights(spec):
+    # "specialties=1,intro=1,publications=0.5" -> {'specialties': 1.0, 'intro': 1.0, 'publications': 0.5}
+    field_weights = {}
+    for item in spec.split(','):
+        field, _, weight = item.partition('=')
+        if field.strip() not in PROFILE_FIELDS:
+            raise ValueError(f"Unknown profile field {field.strip()!r}; expected one of {PROFILE_FIELDS}")
+        field_weights[field.strip()] = float(weight) if weight else 1.0
+    return field_weights
+
+def profile_embeddings(df, rows, encoder_pool=None, embedding_cache=None, field_weights=None):
+    # One vector per positional row. With field_weights each field is embedded (and cached) on its own
+    # and the profile vector is the weighted sum of the unit field vectors, so trying another field mix
+    # costs only vector arithmetic once the fields are cached
+    if EMBEDDING_ENGINE == 'lexical' or not rows:
+        return [None] * len(rows)
+    if not field_weights:
+        return list(embed_texts([df['combined_text'].iloc[i] for i in rows], encoder_pool, embedding_cache))
+    composed = None
+    weight_totals = np.zeros(len(rows))
+    for field, weight in field_weights.items():
+        if field not in df.columns or not weight:
+            continue
+        texts = list(df[field].iloc[rows])
+        present = [j for j, text in enumerate(texts) if str(text).strip()]
+        if not present:
+            continue
+        vectors = np.asarray(embed_texts([texts[j] for j in present], encoder_pool, embedding_cache), dtype=np.float64)
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        if composed is None:
+            composed = np.zeros((len(rows), vectors.shape[1]))
+        composed[present] += weight * vectors
+        weight_totals[present] += abs(weight)
+    # Profiles with none of the weighted fields fall back to their combined text
+    empty = [j for j in range(len(rows)) if weight_totals[j] == 0]
+    if empty:
+        fallback = np.asarray(embed_texts([df['combined_text'].iloc[rows[j]] for j in empty], encoder_pool, embedding_cache), dtype=np.float64)
+        if composed is None:
+            composed = np.zeros((len(rows), fallback.shape[1]))
+        composed[empty] = fallback
+    return list(composed)
+
+def embed_rows(df, rows, encoder_pool=None, embedding_cache=None, field_weights=None, reduction=None):
+    # profile_embeddings for the whole batch, falling back to one row at a time when the batch fails so
+    # a bad profile only loses its own vector. Returns ({row: vector}, {row: error})
+    try:
+        embeddings = profile_embeddings(df, rows, encoder_pool, embedding_cache, field_weights)
+        if reduction is not None and rows:
+            embeddings = list(reduction.transform(embeddings))
+        return dict(zip(rows, embeddings)), {}
+    except Exception as e:
+        if len(rows) == 1:
+            return {}, {rows[0]: e}
+    vectors, errors = {}, {}
+    for i in rows:
+        try:
+            vector = profile_embeddings(df, [i], encoder_pool, embedding_cache, field_weights)[0]
+            vectors[i] = reduction.transform(vector) if reduction is not None else vector
+        except Exception as e:
+            errors[i] = e
+    return vectors, errors
+
+def corpus_embeddings(schools, encoder_pool=None, embedding_cache=None, field_weights=None):
+    # Every profile vector of these schools, stacked; what a dimensionality reduction is fitted on
+    vectors = []
+    for school in schools:
+        df, _ = load_faculty_data(f'faculty_data_{school}.json')
+        vectors += profile_embeddings(df, list(range(len(df))), encoder_pool, embedding_cache, field_weights)
+    return np.asarray(vectors)
+
+def embedding_inputs(df, rows, field_weights=None):
+    # The texts profile_embeddings would hand to the encoder (or the embedding cache) for these rows
+    if EMBEDDING_ENGINE == 'lexical':
+        return []
+    if not field_weights:
+        return [df['combined_text'].iloc[i] for i in rows]
+    texts = []
+    for i in rows:
+        fields = [df[field].iloc[i] for field, weight in field_weights.items() if weight and field in df.columns and str(df[field].iloc[i]).strip()]
+        texts += fields or [df['combined_text'].iloc[i]]
+    return texts
 
 def cosine_similarity(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    if a is None or b is None:
+        return 0.0
+    norms = np.linalg.norm(a) * np.linalg.norm(b)
+    return np.dot(a, b) / norms if norms else 0.0
 
-def calculate_category_scores(text, categories, embeddings):
-    text_embedding = get_embedding(text)
+def calculate_category_scores(text, compiled_phrases, embeddings, doc=None, budget=None, text_embedding=None, exact_hits=(), ngram_scores=None):
+    if text_embedding is None:
+        text_embedding = get_embedding(text)
+    if doc is None and ngram_scores is None:
+        doc = ProfileDoc(text)
     scores = {}
-    for category, phrases in categories.items():
+    for category, phrases in compiled_phrases.items():
         category_embedding = embeddings[category]
         cosine_score = cosine_similarity(text_embedding, category_embedding)
-        ngram_score = max(multi_ngram_search(phrase, text) for phrase in phrases)
+        # A phrase found verbatim already has the maximum score, so fuzzy matching is only for the rest
+        if ngram_scores is not None:
+            ngram_score = ngram_scores[f'{category}_ngram']
+        elif category in exact_hits:
+            ngram_score = 1.0
+        else:
+            ngram_score = max(score_phrase_pruned(phrase, doc, budget) for phrase in phrases)
         scores[f'{category}_cosine'] = cosine_score
         scores[f'{category}_ngram'] = ngram_score
     return scores
 
-def analyze_faculty(input_file, target_categories, avoid_categories, target_score, avoid_score, cosine_weight, ngram_weight):
+PROFILE_FIELDS = ['specialties', 'publications', 'intro', 'courses']
+
+def load_faculty_data(input_file, keep_empty=False):
+    # Profiles with no text are left out unless keep_empty; see split_empty_profiles
     with open(input_file, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
-    df = pd.DataFrame(data)
+    # Canonical form at load as well, so files scraped before canonical_text score the same as fresh ones
+    df = pd.DataFrame([canonicalize_record(record) for record in data])
     school = input_file.split('_')[-1].split('.')[0]
 
     # find which keys are in the df that are from this list: specilities, publications, intro, courses and create a new column called combined_text with content from whichever keys are present
     df['combined_text'] = ""
-    keys_present = ['specialties', 'publications', 'intro', 'courses']
-    for key in keys_present:
+    for key in PROFILE_FIELDS:
         if key in df.columns:    
             df[key] = df[key].apply(lambda x: ' '.join(x) if isinstance(x, list) else (x if isinstance(x, str) else ''))
             df['combined_text'] += df[key].fillna('') + ' '
-    
-    # Get embeddings for each category
-    target_embeddings = {category: get_embedding(' '.join(phrases)) for category, phrases in target_categories.items()}
-    avoid_embeddings = {category: get_embedding(' '.join(phrases)) for category, phrases in avoid_categories.items()}
-    
-    tqdm.pandas(desc=f"Processing {school} faculty data")
-    target_scores = df['combined_text'].progress_apply(lambda x: calculate_category_scores(x, target_categories, target_embeddings))
-    avoid_scores = df['combined_text'].progress_apply(lambda x: calculate_category_scores(x, avoid_categories, avoid_embeddings))
-    
-    target_df = pd.DataFrame(target_scores.tolist(), index=df.index)
-    avoid_df = pd.DataFrame(avoid_scores.tolist(), index=df.index)
-    
-    df = pd.concat([df, target_df, avoid_df], axis=1)
-    
+    df['school'] = school
+    if keep_empty:
+        return df, school
+    return split_empty_profiles(df, school)[0], school
+
+def score_profile(text, library, centroids, doc=None, budget=None, text_embedding=None, ngram_scores=None):
+    # Raw <category>_cosine / <category>_ngram columns for one profile, target categories first.
+    # ngram_scores, when a lexical engine already scored the profile, replaces fuzzy matching
+    if text_embedding is None:
+        text_embedding = get_embedding(text)
+    if ngram_scores is not None:
+        scores = calculate_category_scores(text, library['phrases']['target'], centroids['target'], text_embedding=text_embedding, ngram_scores=ngram_scores)
+        scores.update(calculate_category_scores(text, library['phrases']['avoid'], centroids['avoid'], text_embedding=text_embedding, ngram_scores=ngram_scores))
+        return scores
+    if doc is None:
+        doc = ProfileDoc(text)
+    hits = exact_phrase_hits(library, doc)
+    scores = calculate_category_scores(text, library['phrases']['target'], centroids['target'], doc, budget, text_embedding, hits['target'])
+    scores.update(calculate_category_scores(text, library['phrases']['avoid'], centroids['avoid'], doc, budget, text_embedding, hits['avoid']))
+    return scores
+
+def score_profiles(df, library, centroids, school, comparison_budget=None, checkpoint=None, duplicates=None, encoder_pool=None, embedding_cache=None, field_weights=None, lexical_engine=None, score_pool=None, reduction=None):
+    # Returns raw score rows and the df index they belong to; with a checkpoint, finished rows are
+    # reused and failing rows go to its retry list instead of aborting the school. With a
+    # DuplicateScoreCache, each near-duplicate cluster (across schools too) is scored only once
+    raw_scores = []
+    index = []
+    # Profiles still to score are embedded up front in batches rather than one encode call each (and
+    # projected once here; centroids were projected by the caller). A profile that fails to embed
+    # fails on its own below, like any other scoring error
+    texts = list(df['combined_text'])
+    todo = [i for i, text in enumerate(texts) if checkpoint is None or checkpoint.scores_for(checkpoint.row_key(i, text)) is None]
+    text_embeddings, embedding_errors = embed_rows(df, todo, encoder_pool, embedding_cache, field_weights, reduction)
+    # A batch lexical engine scores the same profiles in one pass instead of per-profile fuzzy matching
+    ngram_rows = dict(zip(todo, lexical_engine.score([texts[i] for i in todo]))) if lexical_engine is not None and todo else {}
+    # A ScoringPool scores them in worker processes that read the embeddings from shared memory
+    pooled_rows = {}
+    pooled = [i for i in todo if i in text_embeddings]
+    if score_pool is not None and lexical_engine is None and pooled:
+        embeddings = np.asarray([text_embeddings[i] for i in pooled]) if EMBEDDING_ENGINE != 'lexical' else None
+        pooled_rows = dict(zip(pooled, score_pool.score([texts[i] for i in pooled], embeddings)))
+    for i, text in enumerate(tqdm(df['combined_text'], desc=f"Processing {school} faculty data")):
+        key = checkpoint.row_key(i, text) if checkpoint is not None else None
+        scores = checkpoint.scores_for(key) if checkpoint is not None else None
+        rep = None
+        if scores is None and duplicates is not None:
+            rep, scores = duplicates.lookup(f"{school}:{i}", text)
+            if scores is not None and checkpoint is not None:
+                checkpoint.record(key, scores)
+        if scores is None:
+            # Each profile is normalized and tokenized once; all lexical scoring runs off the same document
+            # comparison_budget optionally caps fuzzy comparisons per profile, shared by target and avoid
+            try:
+                if i in embedding_errors:
+                    raise embedding_errors[i]
+                if i in pooled_rows:
+                    scores, error = pooled_rows[i]
+                    if error is not None:
+                        raise RuntimeError(error)
+                elif i in ngram_rows:
+                    scores = score_profile(text, library, centroids, text_embedding=text_embeddings.get(i), ngram_scores=ngram_rows[i])
+                else:
+                    scores = score_profile(text, library, centroids, ProfileDoc(text), ComparisonBudget(comparison_budget), text_embeddings.get(i))
+            except Exception as e:
+                if checkpoint is None:
+                    raise
+                checkpoint.record_failure(key, df['name'].iloc[i], e)
+                continue
+            if checkpoint is not None:
+                checkpoint.record(key, scores)
+            if rep is not None:
+                duplicates.store(rep, scores)
+        raw_scores.append(scores)
+        index.append(df.index[i])
+    return raw_scores, index
+
+def cascade_cosines(df, positions, centroids, encoder_pool=None, embedding_cache=None, field_weights=None, reduction=None):
+    # Cosine columns only, for the profiles the cascade decides to embed
+    embeddings = profile_embeddings(df, positions, encoder_pool, embedding_cache, field_weights)
+    if reduction is not None and positions:
+        embeddings = list(reduction.transform(embeddings))
+    return [
+        {f'{category}_cosine': cosine_similarity(embedding, vector) for group in ('target', 'avoid') for category, vector in centroids[group].items()}
+        for embedding in embeddings
+    ]
+
+def finalize_scores(df, target_categories, avoid_categories, target_score, avoid_score, cosine_weight, ngram_weight):
+    # df holds name, school and the raw <category>_cosine / <category>_ngram columns
     for category in target_categories.keys():
         df[f'{category}_score'] = (df[f'{category}_cosine'] * cosine_weight + df[f'{category}_ngram'] * ngram_weight) * target_score
     for category in avoid_categories.keys():
@@ -95,31 +292,98 @@ def analyze_faculty(input_file, target_categories, avoid_categories, target_scor
     target_columns = [f'{category}_score' for category in target_categories.keys()]
     avoid_columns = [f'{category}_score' for category in avoid_categories.keys()]
 
-    df['target_score'] = df[target_columns].apply(lambda x: np.average(x, weights=np.abs(x)), axis=1)
-    df['avoid_score'] = df[avoid_columns].apply(lambda x: np.average(x, weights=np.abs(x)), axis=1)
+    # Empty profiles never get here (see split_empty_profiles); a row of exact zeros averages to 0 as in weight_sweep
+    df['target_score'] = df[target_columns].apply(lambda x: np.average(x, weights=np.abs(x)) if np.abs(x).sum() else 0.0, axis=1)
+    df['avoid_score'] = df[avoid_columns].apply(lambda x: np.average(x, weights=np.abs(x)) if np.abs(x).sum() else 0.0, axis=1)
     df['total_score'] = df['target_score'] + df['avoid_score']
     
     output_columns = ['name', 'target_score', 'avoid_score', 'total_score'] + \
                      [f'{category}_score' for category in target_categories.keys()] + \
                      [f'{category}_score' for category in avoid_categories.keys()]
-    df['school'] = school
-    output_df = df[output_columns + ['school']]
+    return df[output_columns + ['school']]
+
+def analyze_faculty(input_file, target_categories, avoid_categories, target_score, avoid_score, cosine_weight, ngram_weight, plot_renderer=None, library=None, comparison_budget=None, checkpoint=None, duplicates=None, encoder_pool=None, embedding_cache=None, field_weights=None, cascade=None, lexical_engine=None, score_pool=None, reduction=None):
+    df, school = load_faculty_data(input_file, keep_empty=True)
+    df, empty = split_empty_profiles(df, school)
+    
+    # Category centroids and phrase n-grams come precompiled, shared by every school and run
+    if library is None:
+        library = load_category_library(target_categories, avoid_categories, EMBEDDING_BACKEND, get_embedding)
+    centroids = library['centroids'][EMBEDDING_BACKEND]
+    if reduction is not None:
+        centroids = reduction.reduce_centroids(centroids)
+    
+    if cascade is not None:
+        # Lexical scores for everyone, embeddings only where they can still change the top of the ranking
+        weights = (target_score, avoid_score, cosine_weight, ngram_weight)
+        raw_scores, embedded, stats = run_cascade(list(df['combined_text']), library, lambda positions: cascade_cosines(df, positions, centroids, encoder_pool, embedding_cache, field_weights, reduction), weights, comparison_budget, lexical_engine=lexical_engine, **cascade)
+        index = list(df.index)
+        print(f"Cascade: embedded {stats['embedded']} of {stats['profiles']} {school} profiles")
+    else:
+        raw_scores, index = score_profiles(df, library, centroids, school, comparison_budget, checkpoint, duplicates, encoder_pool, embedding_cache, field_weights, lexical_engine, score_pool, reduction)
+    df = pd.concat([df.loc[index], pd.DataFrame(raw_scores, index=index)], axis=1)
+    if checkpoint is not None:
+        checkpoint.close(len(df) + len(checkpoint.failed))
+    output_df = finalize_scores(df, target_categories, avoid_categories, target_score, avoid_score, cosine_weight, ngram_weight)
+    if cascade is not None:
+        output_df = output_df.assign(embedded=embedded)
+    if len(empty):
+        # Profiles without text are still listed, after the scored ones and with no scores
+        output_df = pd.concat([output_df, empty[['name', 'school']]], ignore_index=True)
     
     output_df.to_csv(f'faculty_analysis_{school}.csv', index=False)
     
-    plt.figure(figsize=(10, 6))
-    sns.boxplot(x=output_df['total_score'])
-    plt.title(f'Distribution of Total Scores - {school.capitalize()}')
-    plt.savefig(f'score_distribution_{school}.png')
-    plt.close()
+    # Plots are only rendered when asked for, off the scoring path
+    if plot_renderer is not None:
+        plot_renderer.school_distribution(school, output_df['total_score'])
     
     return output_df
 
-def analyze_all_schools(schools, target_categories, avoid_categories, target_score, avoid_score, cosine_weight, ngram_weight):
+def analyze_all_schools(schools, target_categories, avoid_categories, target_score, avoid_score, cosine_weight, ngram_weight, render_plots=False, comparison_budget=None, checkpoint_dir=None, resume=False, dedupe=False, encoder_workers=None, results_db=None, field_weights=None, embedding_cache_file=None, cascade=None, cascade_reference=None, lexical_engine='fuzzy', score_workers=None, reduction=None, reduction_dims=REDUCTION_DIMS):
     all_results = []
+    reference = read_reference(cascade_reference) if cascade is not None and cascade_reference and os.path.exists(cascade_reference) else None
+    if cascade is not None and (checkpoint_dir is not None or dedupe):
+        # Cascade rows mix full and estimated scores, so they are neither checkpointed nor shared
+        print("Cascade mode runs without checkpoints and near-duplicate reuse")
+        checkpoint_dir, resume, dedupe = None, False, False
+    if reduction is not None and EMBEDDING_ENGINE == 'lexical':
+        print("The lexical backend has no embeddings to reduce; ignoring the reduction")
+        reduction = None
+    if reduction is not None and not embedding_cache_file:
+        # The fit embeds the whole corpus first; the cache lets scoring reuse those vectors
+        embedding_cache_file = EMBEDDING_CACHE
+    encoder_pool = EncodingPool(EMBEDDING_MODEL, encoder_workers, engine=EMBEDDING_ENGINE) if encoder_workers and EMBEDDING_ENGINE != 'lexical' else None
+    embedding_cache = EmbeddingCache(EMBEDDING_BACKEND, embedding_cache_file) if embedding_cache_file and EMBEDDING_ENGINE != 'lexical' else None
+    duplicates = DuplicateScoreCache() if dedupe else None
+    plot_renderer = PlotRenderer() if render_plots else None
+    library = load_category_library(target_categories, avoid_categories, EMBEDDING_BACKEND, get_embedding)
+    if resume and checkpoint_dir is None:
+        checkpoint_dir = CHECKPOINT_DIR
+    centroids = library['centroids'][EMBEDDING_BACKEND]
+    reducer = None
+    if reduction is not None:
+        reducer = load_or_fit(embedding_key(field_weights), reduction, reduction_dims,
+                              lambda: corpus_embeddings(schools, encoder_pool, embedding_cache, field_weights), centroids)
+        centroids = reducer.reduce_centroids(centroids)
+    engine = None
+    if lexical_engine == 'sparse':
+        # scikit-learn is only loaded when the sparse engine is asked for; its calibration is fitted
+        # once on the whole corpus, saved, and part of the run key
+        from sparse_lexical import calibrated_engine
+        engine = calibrated_engine(library, load_faculty_data)
+    key = run_key(library['hash'], embedding_key(field_weights) + (f'-{reducer.key}' if reducer is not None else ''), comparison_budget, engine.key if engine is not None else lexical_engine)
+    score_pool = None
+    if score_workers and cascade is None and engine is None:
+        # Fuzzy scoring spread over processes; embeddings and centroids are shared, never copied per worker
+        score_pool = ScoringPool(library, centroids if EMBEDDING_ENGINE != 'lexical' else None, score_workers, comparison_budget)
     
     for school in schools:
         print(f"\nAnalyzing {school}...")
+        checkpoint = None
+        if checkpoint_dir is not None:
+            checkpoint = SchoolCheckpoint(checkpoint_dir, key, school, resume)
+            if checkpoint.is_done():
+                print(f"{school} already completed in a previous run; reusing its checkpointed scores")
         result = analyze_faculty(
             f'faculty_data_{school}.json',
             target_categories,
@@ -127,27 +391,70 @@ def analyze_all_schools(schools, target_categories, avoid_categories, target_sco
             target_score,
             avoid_score,
             cosine_weight,
-            ngram_weight
+            ngram_weight,
+            plot_renderer=plot_renderer,
+            library=library,
+            comparison_budget=comparison_budget,
+            checkpoint=checkpoint,
+            duplicates=duplicates,
+            cascade=cascade,
+            lexical_engine=engine,
+            score_pool=score_pool,
+            reduction=reducer,
+            encoder_pool=encoder_pool,
+            embedding_cache=embedding_cache,
+            field_weights=field_weights
         )
         all_results.append(result)
     
+    if encoder_pool is not None:
+        encoder_pool.close()
+    if score_pool is not None:
+        score_pool.close()
+    if embedding_cache is not None:
+        print(f"\nEmbedding cache: {embedding_cache.hits} hits, {embedding_cache.misses} texts encoded")
+        embedding_cache.close()
+    if duplicates is not None:
+        print(f"\nNear-duplicate profiles that reused another profile's scores: {duplicates.reused}")
+    
     combined_df = pd.concat(all_results, ignore_index=True)
     combined_df.to_csv('faculty_analysis_all_schools.csv', index=False)
+    if results_db is not None:
+        write_run(combined_df, {
+            'backend': EMBEDDING_BACKEND,
+            'field_weights': field_weights,
+            'library_hash': library['hash'],
+            'schools': schools,
+            'target_score': target_score,
+            'avoid_score': avoid_score,
+            'cosine_weight': cosine_weight,
+            'ngram_weight': ngram_weight,
+            'comparison_budget': comparison_budget,
+            'lexical_engine': lexical_engine,
+            'reduction': reducer.key if reducer is not None else None,
+            'cascade': cascade
+        }, results_db)
     
-    plt.figure(figsize=(12, 6))
-    sns.boxplot(x='school', y='total_score', data=combined_df)
-    plt.title('Distribution of Total Scores by School')
-    plt.savefig('score_distribution_all_schools.png')
-    plt.close()
+    if plot_renderer is not None:
+        plot_renderer.schools_distribution(combined_df)
+        plot_renderer.close()
+    
+    if cascade is not None:
+        embedded = int(combined_df['embedded'].sum())
+        print(f"\nCascade: embedded {embedded} of {len(combined_df)} profiles, saving {len(combined_df) - embedded} embeddings")
+        agreement = rank_agreement(combined_df, reference, cascade.get('top_n', CASCADE_TOP_N)) if reference is not None else None
+        if agreement is not None:
+            print(f"Agreement with {cascade_reference} over {agreement['profiles']} profiles: "
+                  f"Spearman {agreement['spearman']:.4f}, top-{cascade.get('top_n', CASCADE_TOP_N)} overlap {agreement['top_overlap']:.0%}")
     
     print("\nOverall Statistics:")
     print(combined_df['total_score'].describe())
     
     print("\nTop scorers across all schools:")
-    print(combined_df.sort_values('total_score', ascending=False).head())
+    print(combined_df.nlargest(5, 'total_score'))
     
     print("\nBottom scorers across all schools:")
-    print(combined_df.sort_values('total_score', ascending=True).head())
+    print(combined_df.nsmallest(5, 'total_score'))
     
     return combined_df
 
@@ -186,17 +493,53 @@ target_score = 1
 avoid_score = -1.25
 cosine_weight = 0.35
 ngram_weight = 0.65
+# None embeds combined_text; a dict such as {'specialties': 1, 'intro': 1, 'publications': 0.5}
+# embeds and caches each field separately and combines the vectors with these weights
+field_weights = None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score faculty profiles against the target and avoid categories")
+    parser.add_argument('--resume', action='store_true', help="Reuse checkpointed scores and retry failed profiles from an interrupted run")
+    parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR, help="Where completed profile scores are checkpointed")
+    parser.add_argument('--dedupe', action='store_true', help="Score each cluster of near-duplicate profiles only once")
+    parser.add_argument('--results-db', default=RESULTS_DB, help="SQLite results store the run is added to")
+    parser.add_argument('--cascade', action='store_true', help="Score lexically first and embed only profiles that can reach each school's top N")
+    parser.add_argument('--cascade-top-n', type=int, default=CASCADE_TOP_N)
+    parser.add_argument('--cascade-reference', default=None, help="CSV from an earlier full run to report rank agreement against")
+    parser.add_argument('--encoder-workers', type=int, default=None, help="Encode profiles in this many worker processes")
+    parser.add_argument('--field-weights', default=None, help="Compose profile vectors from per-field embeddings, e.g. specialties=1,intro=1,publications=0.5")
+    parser.add_argument('--embedding-cache', default=EMBEDDING_CACHE, help="SQLite cache of text embeddings ('' to disable)")
+    parser.add_argument('--lexical-engine', choices=['fuzzy', 'sparse'], default='fuzzy',
+                        help="sparse approximates fuzzy n-gram scores with character-trigram vectors, much faster")
+    parser.add_argument('--score-workers', type=int, default=None, help="Score profiles in this many processes sharing one embedding matrix")
+    parser.add_argument('--reduce', choices=['pca', 'random'], default=None, help="Project embeddings to fewer dimensions (fitted once on the corpus and saved)")
+    parser.add_argument('--reduce-dims', type=int, default=REDUCTION_DIMS)
+    args = parser.parse_args()
 
-# list of schools are all the stripped school names from the faculty_data files in the current directory
-schools = [f.split('_')[-1].split('.')[0] for f in os.listdir() if f.startswith('faculty_data_') and f.endswith('.json')]
+    # list of schools are all the stripped school names from the faculty_data files in the current directory
+    schools = [f.split('_')[-1].split('.')[0] for f in os.listdir() if f.startswith('faculty_data_') and f.endswith('.json')]
 
 
-combined_result = analyze_all_schools(
-    schools,
-    target_categories,
-    avoid_categories,
-    target_score,
-    avoid_score,
-    cosine_weight,
-    ngram_weight
-)
\ No newline at end of file
+    combined_result = analyze_all_schools(
+        schools,
+        target_categories,
+        avoid_categories,
+        target_score,
+        avoid_score,
+        cosine_weight,
+        ngram_weight,
+        render_plots=True,
+        checkpoint_dir=args.checkpoint_dir,
+        resume=args.resume,
+        dedupe=args.dedupe,
+        encoder_workers=args.encoder_workers,
+        results_db=args.results_db,
+        cascade={'top_n': args.cascade_top_n} if args.cascade else None,
+        cascade_reference=args.cascade_reference,
+        field_weights=parse_field_weights(args.field_weights) if args.field_weights else field_weights,
+        embedding_cache_file=args.embedding_cache,
+        lexical_engine=args.lexical_engine,
+        score_workers=args.score_workers,
+        reduction=args.reduce,
+        reduction_dims=args.reduce_dims
+    )
\ No newline at end of file
@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import re
+
+from combine_jsons import combine_school_data
+
+TEXT_FIELDS = ('specialties', 'publications', 'intro', 'courses')  # The fields the analyzers embed and match
+FIELD_CAPS = {'specialties': 2000, 'publications': 6000, 'intro': 6000, 'courses': 2000}  # Characters kept per field
+KEEP_FIELDS = ('name', 'url', 'school')  # Identifiers; never blanked even when a scraper wrote a placeholder
+MIN_DEDUPE_WORDS = 4  # Shorter segments ("U.S.", "Chair.") repeat legitimately and are always kept
+
+# What the scrapers write for a missing field: "No intro found", "No publications information found",
+# "No fields found; No subfields found" and the like, matched against a whole segment only
+PLACEHOLDER = re.compile(r'^\s*(?:no(?:\s+[\w/-]+){1,3}\s+found|n/?a|none|null|not available|tba)\s*[.;:]?\s*$', re.IGNORECASE)
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+(?=[A-Z"“(])')
+
+def segment_key(segment):
+    return ' '.join(re.sub(r'[^\w\s]', '', segment.lower()).split())
+
+def is_placeholder(text):
+    return all(PLACEHOLDER.match(piece) for piece in text.split(';'))
+
+def cap_text(text, cap):
+    # Cut back to the last line break or space before the cap so no word is split; text without
+    # either is cut at the cap itself
+    if cap is None or len(text) <= cap:
+        return text
+    cut = text[:cap]
+    boundary = max(cut.rfind('\n'), cut.rfind(' '))
+    return cut[:boundary].rstrip() if boundary > 0 else cut
+
+def canonical_field(value, seen, cap=None):
+    # One text field as clean lines: placeholders dropped, whitespace collapsed, and every sentence
+    # already seen earlier in the profile (this field or an earlier one) removed. None when nothing is left
+    if isinstance(value, list):
+        lines = [str(item) for item in value if item is not None]
+    elif isinstance(value, str):
+        lines = value.splitlines()
+    else:
+        return None
+    kept = []
+    for line in lines:
+        line = ' '.join(line.split())
+        if ';' in line and any(PLACEHOLDER.match(piece) for piece in line.split(';')):
+            line = '; '.join(piece.strip() for piece in line.split(';') if not PLACEHOLDER.match(piece))
+        if not line or PLACEHOLDER.match(line):
+            continue
+        sentences = []
+        for sentence in SENTENCE_BREAK.split(line):
+            key = segment_key(sentence)
+            if len(key.split()) >= MIN_DEDUPE_WORDS:
+                if key in seen:
+                    continue
+                seen.add(key)
+            sentences.append(sentence)
+        if sentences:
+            kept.append(' '.join(sentences))
+    text = cap_text('\n'.join(kept), cap)
+    return text or None
+
+def canonicalize_record(record, field_caps=FIELD_CAPS):
+    # The canonical form of one scraped profile. Text fields go through canonical_field (deduplicated
+    # across fields in TEXT_FIELDS order), other string fields lose placeholders and extra whitespace.
+    # Every text field is present (None when the scraper had nothing), so each school has the same
+    # columns. Idempotent, so already canonical data passes through unchanged
+    seen = set()
+    texts = {field: canonical_field(record.get(field), seen, field_caps.get(field)) for field in TEXT_FIELDS}
+    canonical = {}
+    for key, value in record.items():
+        if key in texts:
+            canonical[key] = texts[key]
+        elif isinstance(value, str) and key not in KEEP_FIELDS:
+            value = ' '.join(value.split())
+            canonical[key] = None if not value or is_placeholder(value) else value
+        else:
+            canonical[key] = value
+    for field in TEXT_FIELDS:
+        canonical.setdefault(field, texts[field])
+    return canonical
+
+def split_empty_profiles(df, school):
+    # Profiles left without any text (only placeholders before canonicalization) carry nothing to score.
+    # Returns (profiles with text, empty profiles); the analyzers list the empty ones without scores
+    empty = df['combined_text'].str.strip() == ''
+    if empty.any():
+        print(f"{int(empty.sum())} {school} profiles have no text and are not scored")
+    return df[~empty].reset_index(drop=True), df[empty].reset_index(drop=True)
+
+def text_size(records):
+    # Characters of text the analyzers would see, lists counted as joined lines
+    size = 0
+    for record in records:
+        for field in TEXT_FIELDS:
+            value = record.get(field)
+            if isinstance(value, list):
+                value = '\n'.join(str(item) for item in value if item is not None)
+            size += len(value) if isinstance(value, str) else 0
+    return size
+
+def canonicalize_school(school, field_caps=FIELD_CAPS):
+    # Rewrites faculty_data_<school>.json in canonical form; returns (text characters before, after)
+    path = f'faculty_data_{school}.json'
+    with open(path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    canonical = [canonicalize_record(record, field_caps) for record in records]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(canonical, f, ensure_ascii=False, indent=4)
+    return text_size(records), text_size(canonical)
+
+def parse_caps(items):
+    # ["intro=4000", "publications=0"] -> FIELD_CAPS with those overrides; 0 means no cap
+    caps = dict(FIELD_CAPS)
+    for item in items or []:
+        field, _, chars = item.partition('=')
+        if field not in TEXT_FIELDS:
+            raise ValueError(f"Unknown text field {field!r}; expected one of {TEXT_FIELDS}")
+        caps[field] = int(chars) or None
+    return caps
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite scraped faculty data in canonical form (scrapers already write it on finalize)")
+    parser.add_argument('schools', nargs='*', help="Defaults to every faculty_data_<school>.json here")
+    parser.add_argument('--cap', action='append', default=[], metavar='FIELD=CHARS',
+                        help=f"Per-field length cap, repeatable (defaults: {', '.join(f'{k}={v}' for k, v in FIELD_CAPS.items())}; 0 for none)")
+    parser.add_argument('--output', default='faculty_data.json', help="Combined output rebuilt from every school ('' to skip)")
+    args = parser.parse_args()
+    try:
+        field_caps = parse_caps(args.cap)
+    except ValueError as e:
+        parser.error(str(e))
+
+    available = [f.split('_')[-1].split('.')[0] for f in os.listdir() if f.startswith('faculty_data_') and f.endswith('.json')]
+    total_before = total_after = 0
+    for school in args.schools or available:
+        before, after = canonicalize_school(school, field_caps)
+        total_before += before
+        total_after += after
+        print(f"[{school}] {before} -> {after} text characters")
+    print(f"Canonical text is {total_after} of {total_before} characters ({1 - total_after / max(total_before, 1):.0%} less to embed and match)")
+    if args.output:
+        school_data = {}
+        for school in available:
+            with open(f'faculty_data_{school}.json', 'r', encoding='utf-8') as f:
+                school_data[school] = json.load(f)
+        combine_school_data(school_data, args.output)
+
+if __name__ == "__main__":
+    main()
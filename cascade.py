@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+from analysis_common import total_scores
+from fuzzy_match import score_phrase_pruned, ComparisonBudget
+from phrase_matcher import exact_phrase_hits
+from profile_doc import ProfileDoc
+
+CASCADE_TOP_N = 20  # Profiles per school whose ranking must come from full scores
+CALIBRATION_SIZE = 16  # Profiles per school embedded up front to size the uncertainty band
+BAND_SIGMAS = 2.0  # Band half-width in standard deviations of (full total - lexical estimate)
+CALIBRATION_SEED = 0
+
+def ngram_scores(library, doc, budget=None):
+    # The lexical half of score_profile: <category>_ngram for every category, no embeddings
+    hits = exact_phrase_hits(library, doc)
+    scores = {}
+    for group, categories in library['phrases'].items():
+        for category, phrases in categories.items():
+            if category in hits[group]:
+                scores[f'{category}_ngram'] = 1.0
+            else:
+                scores[f'{category}_ngram'] = max(score_phrase_pruned(phrase, doc, budget) for phrase in phrases)
+    return scores
+
+def estimate_totals(raw_rows, library, weights):
+    # total_score for raw score rows, computed the way finalize_scores does
+    categories = list(library['groups']['target']) + list(library['groups']['avoid'])
+    cosine = np.array([[row[f'{category}_cosine'] for category in categories] for row in raw_rows], dtype=np.float64)
+    ngram = np.array([[row[f'{category}_ngram'] for category in categories] for row in raw_rows], dtype=np.float64)
+    is_target = np.array([category in library['groups']['target'] for category in categories])
+    return total_scores(cosine, ngram, is_target, np.asarray([weights], dtype=np.float64))[0]
+
+def run_cascade(texts, library, cosine_rows, weights, comparison_budget=None, top_n=CASCADE_TOP_N,
+                calibration_size=CALIBRATION_SIZE, band_sigmas=BAND_SIGMAS, lexical_engine=None):
+    # Stage 1 scores every profile lexically; a small calibration sample is embedded to estimate each
+    # category's typical cosine and how far the lexical estimate strays from the full total. Stage 2
+    # embeds only profiles that could still reach the school's top_n: those whose estimate is at least
+    # the top_n-th estimate minus band_sigmas standard deviations.
+    # cosine_rows(positions) returns {<category>_cosine: value} per position and is the only place
+    # embeddings are computed. weights is (target_score, avoid_score, cosine_weight, ngram_weight).
+    # lexical_engine optionally replaces fuzzy matching in stage 1 (a SparseNgramEngine).
+    # Returns raw score rows, a per-row embedded flag and stats
+    n = len(texts)
+    if lexical_engine is not None:
+        lexical = lexical_engine.score(texts)
+    else:
+        lexical = [ngram_scores(library, ProfileDoc(text), ComparisonBudget(comparison_budget)) for text in texts]
+    cosines = {}
+
+    def embed(positions):
+        positions = [p for p in positions if p not in cosines]
+        if positions:
+            cosines.update(zip(positions, cosine_rows(positions)))
+
+    if n <= top_n + calibration_size:
+        embed(range(n))
+    else:
+        rng = np.random.default_rng(CALIBRATION_SEED)
+        embed(sorted(rng.choice(n, size=calibration_size, replace=False).tolist()))
+        cosine_columns = list(next(iter(cosines.values())))
+        prior = {column: float(np.nanmean([cosines[p][column] for p in cosines])) for column in cosine_columns}
+
+        estimates = estimate_totals([dict(lexical[p], **prior) for p in range(n)], library, weights)
+        calibrated = sorted(cosines)
+        residuals = estimate_totals([dict(lexical[p], **cosines[p]) for p in calibrated], library, weights) - estimates[calibrated]
+        sigma = float(np.nanstd(residuals, ddof=1))
+        cutoff = np.sort(estimates)[::-1][top_n - 1]
+        embed(np.flatnonzero(estimates >= cutoff - band_sigmas * sigma).tolist())
+
+    raw_rows = []
+    embedded = []
+    for p in range(n):
+        if p in cosines:
+            raw_rows.append(dict(lexical[p], **cosines[p]))
+            embedded.append(True)
+        else:
+            raw_rows.append(dict(lexical[p], **prior))
+            embedded.append(False)
+    stats = {'profiles': n, 'embedded': len(cosines), 'saved': n - len(cosines)}
+    return raw_rows, embedded, stats
+
+def read_reference(reference_file):
+    # Read before the run starts, since the run may overwrite the same CSV
+    return pd.read_csv(reference_file)[['name', 'school', 'total_score']]
+
+def rank_agreement(result_df, reference, top_n=CASCADE_TOP_N):
+    # Spearman correlation of total_score and top_n overlap against an earlier full (non-cascade) run
+    result_df = result_df[['name', 'school', 'total_score']].drop_duplicates(['name', 'school'])
+    merged = result_df.merge(reference.drop_duplicates(['name', 'school']), on=['name', 'school'], suffixes=('', '_full'))
+    if merged.empty:
+        return None
+    top = min(top_n, len(merged))
+    cascade_top = set(merged.nlargest(top, 'total_score').index)
+    full_top = set(merged.nlargest(top, 'total_score_full').index)
+    return {
+        'profiles': len(merged),
+        'spearman': merged['total_score'].corr(merged['total_score_full'], method='spearman'),
+        'top_overlap': len(cascade_top & full_top) / top
+    }
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+
+from lexical import compile_phrase, MAX_N
+
+LIBRARY_FILE = 'compiled_categories.pkl'
+LIBRARY_VERSION = 1
+
+def categories_hash(target_categories, avoid_categories, max_n=MAX_N):
+    # Category order is part of the hash since it fixes the output column order
+    payload = json.dumps({
+        'version': LIBRARY_VERSION,
+        'max_n': max_n,
+        'target': target_categories,
+        'avoid': avoid_categories
+    })
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def compile_categories(target_categories, avoid_categories, max_n=MAX_N):
+    groups = {'target': target_categories, 'avoid': avoid_categories}
+    return {
+        'hash': categories_hash(target_categories, avoid_categories, max_n),
+        'groups': groups,
+        'phrases': {
+            group: {category: [compile_phrase(phrase, max_n) for phrase in phrases] for category, phrases in categories.items()}
+            for group, categories in groups.items()
+        },
+        'centroids': {}
+    }
+
+def add_centroids(library, backend, embed_fn):
+    # Centroids are embedded once per backend and then reused by every school and run
+    if backend not in library['centroids']:
+        library['centroids'][backend] = {
+            group: {category: embed_fn(' '.join(phrases)) for category, phrases in categories.items()}
+            for group, categories in library['groups'].items()
+        }
+        return True
+    return False
+
+def read_library_file(library_file=LIBRARY_FILE):
+    if not os.path.exists(library_file):
+        return {}
+    with open(library_file, 'rb') as f:
+        return pickle.load(f)
+
+def write_library_file(libraries, library_file=LIBRARY_FILE):
+    # A temp file per writer: several queue workers may compile the library at once, and each must
+    # replace the file with its own complete copy
+    tmp_file = f'{library_file}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(libraries, f)
+    os.replace(tmp_file, library_file)
+
+def load_category_library(target_categories, avoid_categories, backend=None, embed_fn=None, library_file=LIBRARY_FILE):
+    digest = categories_hash(target_categories, avoid_categories)
+    libraries = read_library_file(library_file)
+    library = libraries.get(digest)
+    changed = False
+    if library is None:
+        library = compile_categories(target_categories, avoid_categories)
+        libraries[digest] = library
+        changed = True
+    if backend is not None and embed_fn is not None:
+        changed = add_centroids(library, backend, embed_fn) or changed
+    if changed:
+        write_library_file(libraries, library_file)
+    return library
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+
+CHECKPOINT_DIR = 'checkpoints'
+
+def run_key(library_hash, backend, comparison_budget=None, lexical_engine='fuzzy'):
+    # Raw scores only depend on the categories, the embedding backend, the lexical engine and the
+    # comparison budget, so a resumed run may change the weights freely
+    key = f"{library_hash[:16]}-{backend.replace('/', '_')}"
+    if comparison_budget is not None:
+        key += f"-budget{comparison_budget}"
+    if lexical_engine != 'fuzzy':
+        key += f"-{lexical_engine}"
+    return key
+
+class SchoolCheckpoint:
+    def __init__(self, checkpoint_dir, key, school, resume=False):
+        self.directory = os.path.join(checkpoint_dir, key)
+        self.school = school
+        self.rows_file = os.path.join(self.directory, f'{school}.rows.jsonl')
+        self.retry_file = os.path.join(self.directory, f'{school}.retry.jsonl')
+        self.done_file = os.path.join(self.directory, f'{school}.done.json')
+        os.makedirs(self.directory, exist_ok=True)
+        if not resume:
+            for path in (self.rows_file, self.retry_file, self.done_file):
+                if os.path.exists(path):
+                    os.remove(path)
+        self.completed = self._read_jsonl(self.rows_file)
+        # Rows that failed last time are not in completed, so they are simply scored again;
+        # the retry list is rewritten as this run goes
+        retry = self._read_jsonl(self.retry_file)
+        if retry:
+            print(f"Retrying {len(retry)} {school} profiles that failed last time")
+            os.remove(self.retry_file)
+        self.failed = {}
+        self._rows = open(self.rows_file, 'a', encoding='utf-8')
+
+    @staticmethod
+    def _read_jsonl(path):
+        entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A run killed mid-write leaves at most one truncated line at the end
+                        continue
+                    entries[entry['key']] = entry
+        return entries
+
+    @staticmethod
+    def row_key(index, text):
+        return f"{index}:{hashlib.sha1(str(text).encode('utf-8')).hexdigest()[:16]}"
+
+    def scores_for(self, key):
+        entry = self.completed.get(key)
+        return entry['scores'] if entry else None
+
+    def record(self, key, scores):
+        scores = {k: float(v) for k, v in scores.items()}
+        self.completed[key] = {'key': key, 'scores': scores}
+        self._rows.write(json.dumps(self.completed[key]) + '\n')
+        self._rows.flush()
+
+    def record_failure(self, key, name, error):
+        entry = {'key': key, 'name': name, 'error': f"{type(error).__name__}: {error}"}
+        self.failed[key] = entry
+        with open(self.retry_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    def is_done(self):
+        return os.path.exists(self.done_file)
+
+    def close(self, total_rows):
+        self._rows.close()
+        if self.failed:
+            print(f"{len(self.failed)} of {total_rows} {self.school} profiles failed; see {self.retry_file} and rerun with --resume")
+            return False
+        with open(self.done_file, 'w', encoding='utf-8') as f:
+            json.dump({'school': self.school, 'rows': total_rows}, f)
+        return True
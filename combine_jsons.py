@@ -1,24 +1,28 @@
 import json
 import os
 
-def combine_json_files(input_files, output_file):
+def combine_school_data(school_data, output_file):
+    # school_data maps the school key (as in faculty_data_<school>.json) to its list of profiles
     combined_data = []
 
-    for input_file in input_files:
-        school_name = input_file.split('_')[-1].split('.')[0].capitalize()
-        
-        with open(input_file, 'r', encoding='utf-8') as file:
-            school_data = json.load(file)
-            
-            for person in school_data:
-                person['school'] = school_name
-                combined_data.append(person)
+    for school, people in school_data.items():
+        school_name = school.capitalize()
+        for person in people:
+            person['school'] = school_name
+            combined_data.append(person)
 
     with open(output_file, 'w', encoding='utf-8') as outfile:
         json.dump(combined_data, outfile, ensure_ascii=False, indent=4)
 
     print(f"Combined data saved to {output_file}")
 
+def combine_json_files(input_files, output_file):
+    school_data = {}
+    for input_file in input_files:
+        with open(input_file, 'r', encoding='utf-8') as file:
+            school_data[input_file.split('_')[-1].split('.')[0]] = json.load(file)
+    combine_school_data(school_data, output_file)
+
 def main():
     # input files are all the faculty data files .json that are in the current directory
     input_files = [f for f in os.listdir() if f.startswith('faculty_data_') and f.endswith('.json')]
@@ -0,0 +1,214 @@
+import os
+import time
+
+import numpy as np
+
+from cascade import ngram_scores
+from category_library import load_category_library
+from checkpoint import SchoolCheckpoint, run_key
+from embedding_cache import EmbeddingCache, EMBEDDING_CACHE, text_hash
+from embedding_reduction import EmbeddingReduction, reduction_path, REDUCTION_DIMS
+from fuzzy_match import ComparisonBudget
+from near_duplicates import NearDuplicateIndex
+from profile_doc import ProfileDoc
+
+PRICE_PER_1K_TOKENS = {'text-embedding-ada-002': 0.0001}  # USD; local encoders only cost time
+REQUEST_SECONDS = 0.25  # One embeddings.create round trip
+ENCODE_SECONDS = {'torch': 0.012, 'onnx': 0.005}  # Per text for all-MiniLM-L6-v2 on one process
+LEXICAL_SAMPLE = 20  # Profiles timed through the lexical scorer to estimate its share of the runtime
+
+def token_counter(model):
+    # tiktoken when it is installed and knows the model, else the usual ~4 characters per token
+    try:
+        import tiktoken
+        encoding = tiktoken.encoding_for_model(model)
+        return lambda text: len(encoding.encode(text))
+    except Exception:
+        return lambda text: max(1, len(text) // 4)
+
+def embedding_rates(analyzer, encode_seconds=None, request_seconds=REQUEST_SECONDS):
+    # (kind, seconds per embedded text, USD per 1k tokens) for the analyzer's backend
+    engine = getattr(analyzer, 'EMBEDDING_ENGINE', None)
+    if engine is None:
+        return 'api', request_seconds, PRICE_PER_1K_TOKENS.get(analyzer.EMBEDDING_MODEL, 0.0)
+    if engine == 'lexical':
+        return 'none', 0.0, 0.0
+    return 'local', encode_seconds if encode_seconds is not None else ENCODE_SECONDS[engine], 0.0
+
+def lexical_seconds(library, texts, lexical_engine='fuzzy', comparison_budget=None, sample_size=LEXICAL_SAMPLE):
+    # Seconds per profile for the n-gram half of the scoring, timed on an evenly spaced sample
+    if not texts:
+        return 0.0
+    sample = [texts[i] for i in np.linspace(0, len(texts) - 1, min(sample_size, len(texts))).astype(int)]
+    if lexical_engine == 'sparse':
+        from sparse_lexical import SparseNgramEngine
+        engine = SparseNgramEngine(library)
+        engine.calibrate([ProfileDoc(text) for text in sample])
+        start = time.perf_counter()
+        engine.score(sample)
+    else:
+        start = time.perf_counter()
+        for text in sample:
+            ngram_scores(library, ProfileDoc(text), ComparisonBudget(comparison_budget))
+    return (time.perf_counter() - start) / len(sample)
+
+def completed_rows(checkpoint_dir, key, school):
+    # Read-only view of a school's checkpoint; opening a SchoolCheckpoint would start a new run
+    return SchoolCheckpoint._read_jsonl(os.path.join(checkpoint_dir, key, f'{school}.rows.jsonl'))
+
+def plan_run(analyzer, schools, checkpoint_dir=None, resume=False, dedupe=False, comparison_budget=None,
+             lexical_engine='fuzzy', embedding_cache_file=None, field_weights=None, encoder_workers=None,
+             embedding_threads=None, reduction=None, reduction_dims=REDUCTION_DIMS, encode_seconds=None,
+             request_seconds=REQUEST_SECONDS, lexical_sample=LEXICAL_SAMPLE):
+    # Walks the corpus the way analyze_all_schools would (checkpoints, near-duplicate reuse, chunking,
+    # the embedding cache and a dimensionality reduction) without calling any backend. Returns one
+    # estimate per school plus the one-off cost of embedding the category centroids
+    library = load_category_library(analyzer.target_categories, analyzer.avoid_categories)
+    backend = analyzer.embedding_key(field_weights) if field_weights else analyzer.EMBEDDING_BACKEND
+    kind, seconds_per_text, price = embedding_rates(analyzer, encode_seconds, request_seconds)
+    fit_reduction = False
+    if reduction is not None and kind != 'none':
+        # Same key suffix as the analyzers. A projection not saved yet is fitted on every profile
+        # embedding first, so the whole corpus is embedded (and cached) before any checkpoint counts
+        path = reduction_path(backend, reduction, reduction_dims)
+        fit_reduction = not os.path.exists(path)
+        backend += '-' + (EmbeddingReduction.load(path).key if not fit_reduction else f'{reduction}{reduction_dims}')
+        embedding_cache_file = embedding_cache_file or EMBEDDING_CACHE
+    if lexical_engine == 'sparse':
+        # Checkpoints of sparse runs are keyed by the saved calibration
+        from sparse_lexical import saved_key
+        key = run_key(library['hash'], backend, comparison_budget, saved_key(library))
+    else:
+        key = run_key(library['hash'], backend, comparison_budget, lexical_engine)
+    count_tokens = token_counter(analyzer.EMBEDDING_MODEL)
+    parallel = {'local': encoder_workers or 1, 'api': embedding_threads or 1}.get(kind, 1)
+    cache = None
+    if kind != 'none' and embedding_cache_file and os.path.exists(embedding_cache_file):
+        cache = EmbeddingCache(analyzer.EMBEDDING_BACKEND, embedding_cache_file)
+    duplicates = NearDuplicateIndex() if dedupe else None
+
+    frames = {}
+    for school in schools:
+        df, _ = analyzer.load_faculty_data(f'faculty_data_{school}.json')
+        frames[school] = df
+    per_profile = lexical_seconds(library, [text for df in frames.values() for text in df['combined_text']],
+                                  lexical_engine, comparison_budget, lexical_sample)
+
+    plans = []
+    for school, df in frames.items():
+        texts = list(df['combined_text'])
+        completed = completed_rows(checkpoint_dir, key, school) if resume and checkpoint_dir else {}
+        todo = [i for i, text in enumerate(texts) if SchoolCheckpoint.row_key(i, text) not in completed]
+        reused = 0
+        if duplicates is not None:
+            # Same rule as DuplicateScoreCache: a profile joining an earlier cluster reuses its scores
+            unique = []
+            for i in todo:
+                if duplicates.add(f"{school}:{i}", texts[i]) == f"{school}:{i}":
+                    unique.append(i)
+            reused = len(todo) - len(unique)
+            todo = unique
+        rows = list(range(len(texts))) if fit_reduction else todo
+        cache_hits = 0
+        if kind == 'api':
+            # The OpenAI analyzer caches whole-profile vectors: a cached profile sends none of its chunks,
+            # and with the cache or prefetch threads identical profiles are requested once
+            if cache is not None or embedding_threads:
+                first = {}
+                for i in rows:
+                    first.setdefault(text_hash(texts[i]), i)
+                cached = cache.get_many(list(first)) if cache is not None else {}
+                cache_hits = len(cached)
+                rows = [i for digest, i in first.items() if digest not in cached]
+            inputs = analyzer.embedding_inputs(df, rows)
+            requests = len(inputs)
+        else:
+            inputs = analyzer.embedding_inputs(df, rows, field_weights) if field_weights else analyzer.embedding_inputs(df, rows)
+            # embed_texts sends each distinct text once and skips anything already cached
+            hashes = list(dict.fromkeys(text_hash(text) for text in inputs))
+            if cache is not None:
+                cache_hits = len(cache.get_many(hashes))
+            requests = len(hashes) - cache_hits
+        tokens = sum(count_tokens(text) for text in inputs) if kind == 'api' else 0
+        embed_seconds = requests * seconds_per_text / parallel
+        lexical = len(todo) * per_profile
+        # A pipelined API run overlaps the requests with the lexical scoring
+        seconds = max(embed_seconds, lexical) if kind == 'api' and embedding_threads else embed_seconds + lexical
+        plans.append({
+            'school': school,
+            'profiles': len(texts),
+            'checkpointed': len(texts) - len(todo) - reused,
+            'duplicates': reused,
+            'to_score': len(todo),
+            'requests': requests,
+            'cache_hits': cache_hits,
+            'tokens': tokens,
+            'dollars': tokens / 1000 * price,
+            'minutes': seconds / 60
+        })
+    if cache is not None:
+        cache.close()
+
+    overhead = {'requests': 0, 'tokens': 0, 'dollars': 0.0, 'minutes': 0.0}
+    if kind != 'none' and analyzer.EMBEDDING_BACKEND not in library['centroids']:
+        # One embedding per category, done once and then kept in the category library file
+        centroid_texts = [' '.join(phrases) for categories in library['groups'].values() for phrases in categories.values()]
+        if kind == 'api':
+            centroid_texts = [chunk for text in centroid_texts for chunk in analyzer.chunk_text(text)]
+        tokens = sum(count_tokens(text) for text in centroid_texts) if kind == 'api' else 0
+        overhead = {
+            'requests': len(centroid_texts),
+            'tokens': tokens,
+            'dollars': tokens / 1000 * price,
+            'minutes': len(centroid_texts) * seconds_per_text / 60
+        }
+    return plans, overhead
+
+def select_within_budget(plans, overhead, max_dollars=None, max_minutes=None, priority='order'):
+    # Schools that fit the budget, in the order they should run. 'order' keeps the given order and
+    # 'cheapest' runs the schools with the lowest cost per profile still to score first, so the
+    # budget finishes as many schools as it can. A school that does not fit is skipped and later,
+    # cheaper ones are still considered. Returns (selected schools, per-school status)
+    if priority == 'cheapest':
+        cost = lambda plan: (plan['dollars'] if max_dollars is not None else plan['minutes']) / max(plan['to_score'], 1)
+        ordered = sorted(plans, key=cost)
+    else:
+        ordered = list(plans)
+    spent = {'dollars': overhead['dollars'], 'minutes': overhead['minutes']}
+    selected = []
+    status = {}
+    for plan in ordered:
+        fits = (max_dollars is None or spent['dollars'] + plan['dollars'] <= max_dollars) and \
+               (max_minutes is None or spent['minutes'] + plan['minutes'] <= max_minutes)
+        if fits:
+            spent['dollars'] += plan['dollars']
+            spent['minutes'] += plan['minutes']
+            selected.append(plan['school'])
+            status[plan['school']] = f"run #{len(selected)}"
+        else:
+            # How far the remaining budget would get into this school, profile by profile
+            shares = []
+            if max_dollars is not None and plan['dollars'] > 0:
+                shares.append(max(max_dollars - spent['dollars'], 0) / plan['dollars'])
+            if max_minutes is not None and plan['minutes'] > 0:
+                shares.append(max(max_minutes - spent['minutes'], 0) / plan['minutes'])
+            status[plan['school']] = f"over budget ({int(min(shares + [1.0]) * plan['to_score'])} of {plan['to_score']} profiles fit)"
+    return selected, status
+
+def print_plan(plans, overhead, status=None):
+    columns = ['school', 'profiles', 'checkpointed', 'duplicates', 'to_score', 'requests', 'cache_hits', 'tokens', 'dollars', 'minutes']
+    rows = [[str(plan[c]) if not isinstance(plan[c], float) else (f'{plan[c]:.4f}' if c == 'dollars' else f'{plan[c]:.2f}') for c in columns] for plan in plans]
+    totals = {c: sum(plan[c] for plan in plans) + overhead.get(c, 0) for c in columns[1:]}
+    rows.append(['total'] + [str(totals[c]) if not isinstance(totals[c], float) else (f'{totals[c]:.4f}' if c == 'dollars' else f'{totals[c]:.2f}') for c in columns[1:]])
+    if status is not None:
+        columns = columns + ['plan']
+        rows = [row + [status.get(row[0], '')] for row in rows]
+    cells = [columns] + rows
+    widths = [max(len(row[i]) for row in cells) for i in range(len(columns))]
+    for row in cells:
+        print('  '.join(value.ljust(width) for value, width in zip(row, widths)))
+    if overhead['requests']:
+        print(f"Totals include {overhead['requests']} category centroid embeddings (${overhead['dollars']:.4f}, {overhead['minutes']:.2f} min), needed once")
+    absorbed = totals['checkpointed'] + totals['duplicates']
+    print(f"Caches absorb {absorbed} of {totals['profiles']} profiles "
+          f"({totals['checkpointed']} checkpointed, {totals['duplicates']} near-duplicates) and {totals['cache_hits']} embedding cache hits")
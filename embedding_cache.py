@@ -0,0 +1,67 @@
+import hashlib
+import sqlite3
+
+import numpy as np
+
+EMBEDDING_CACHE = 'embedding_cache.sqlite'
+LOOKUP_CHUNK = 500  # Keeps each IN (...) under SQLite's bound-parameter limit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    backend TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (backend, text_hash)
+);
+"""
+
+def text_hash(text):
+    return hashlib.sha1(str(text).encode('utf-8')).hexdigest()
+
+class EmbeddingCache:
+    # Float32 vectors keyed by backend and text hash, so any text (a whole profile or a single field)
+    # is only ever sent through a given encoder once
+    def __init__(self, backend, db_path=EMBEDDING_CACHE):
+        self.backend = backend
+        self.conn = sqlite3.connect(db_path, timeout=60)
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, hashes):
+        found = {}
+        hashes = list(dict.fromkeys(hashes))
+        for start in range(0, len(hashes), LOOKUP_CHUNK):
+            chunk = hashes[start:start + LOOKUP_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE backend = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                [self.backend] + chunk
+            )
+            for digest, vector in rows:
+                found[digest] = np.frombuffer(vector, dtype=np.float32)
+        return found
+
+    def put_many(self, items):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (backend, text_hash, vector) VALUES (?, ?, ?)",
+            [(self.backend, digest, np.asarray(vector, dtype=np.float32).tobytes()) for digest, vector in items]
+        )
+        self.conn.commit()
+
+    def embed(self, texts, embed_fn):
+        # embed_fn takes a list of texts and returns one vector per text; it only sees cache misses,
+        # each distinct text once. Every text it does not see counts as a hit, repeats in the batch included
+        hashes = [text_hash(text) for text in texts]
+        cached = self.get_many(hashes)
+        missing = {digest: text for digest, text in zip(hashes, texts) if digest not in cached}
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            vectors = embed_fn(list(missing.values()))
+            fresh = list(zip(missing, (np.asarray(vector, dtype=np.float32) for vector in vectors)))
+            self.put_many(fresh)
+            cached.update(fresh)
+        return np.stack([cached[digest] for digest in hashes]) if hashes else np.zeros((0, 0), dtype=np.float32)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,62 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from embedding_cache import text_hash
+
+EMBEDDING_THREADS = 8  # Embedding requests in flight at once; each thread mostly waits on the network
+
+class EmbeddingPrefetcher:
+    # Producer side of the per-school pipeline: every text is submitted up front and embedded on I/O
+    # threads, while the caller runs the CPU-bound lexical scoring and collects each vector when it
+    # reaches that profile. Wall time approaches the larger of the two halves instead of their sum
+    def __init__(self, embed_fn, threads=EMBEDDING_THREADS, embedding_cache=None):
+        self.embed_fn = embed_fn
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix='embed')
+        self.embedding_cache = embedding_cache
+        self.futures = {}
+        self.requested = {}
+
+    def submit(self, items):
+        # items are (key, text) pairs. Cached texts resolve at once and identical texts share a request
+        items = list(items)
+        cached = self.embedding_cache.get_many([text_hash(text) for _, text in items]) if self.embedding_cache is not None else {}
+        for key, text in items:
+            digest = text_hash(text)
+            if digest in cached:
+                future = Future()
+                future.set_result(cached[digest])
+                if self.embedding_cache is not None:
+                    self.embedding_cache.hits += 1
+            elif digest in self.requested:
+                future = self.requested[digest]
+                if self.embedding_cache is not None:
+                    self.embedding_cache.hits += 1
+            else:
+                future = self.requested[digest] = self.executor.submit(self.embed_fn, text)
+            self.futures[key] = future
+
+    def result(self, key, text):
+        # Blocks until this key's vector is in; re-raises the request's error. A key that was never
+        # submitted (say a near-duplicate whose cluster could not be reused) is embedded right here
+        future = self.futures.pop(key, None)
+        if future is None:
+            return self.embed_fn(text)
+        return future.result()
+
+    def close(self):
+        # Drops requests nobody collected and caches every vector that did arrive. The SQLite cache is
+        # only ever touched from the calling thread
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.embedding_cache is not None:
+            fresh = [(digest, future.result()) for digest, future in self.requested.items()
+                     if future.done() and not future.cancelled() and future.exception() is None]
+            self.embedding_cache.misses += len(fresh)
+            if fresh:
+                self.embedding_cache.put_many(fresh)
+        self.futures = {}
+        self.requested = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
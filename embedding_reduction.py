@@ -0,0 +1,118 @@
+import json
+import os
+
+import numpy as np
+
+REDUCTION_DIR = 'embedding_reductions'
+REDUCTION_DIMS = 192
+REDUCTION_METHODS = ('pca', 'random')
+
+class EmbeddingReduction:
+    # A linear map from the encoder's dimensions down to `dims`, fitted once on the corpus of profile
+    # embeddings. Profiles and category centroids go through the same map, so every cosine (and the
+    # embedding matrices the scoring pool shares) is computed on the short vectors
+    def __init__(self, method, components, retained=None, agreement=None):
+        self.method = method
+        self.components = np.asarray(components, dtype=np.float32)
+        self.retained = retained
+        self.agreement = agreement or {}
+
+    @property
+    def dims(self):
+        return self.components.shape[0]
+
+    @property
+    def key(self):
+        # Appended to the backend in checkpoint keys and results, e.g. 'pca192'
+        return f'{self.method}{self.dims}'
+
+    @classmethod
+    def fit(cls, vectors, method='pca', dims=REDUCTION_DIMS, seed=0):
+        vectors = np.asarray(vectors, dtype=np.float64)
+        if method == 'pca':
+            # Uncentered PCA (truncated SVD): the corpus mean stays in the projected vectors, so reduced
+            # cosines keep the scale of the full-dimension ones the weights were tuned on
+            from sklearn.decomposition import TruncatedSVD
+            dims = min(dims, vectors.shape[1] - 1, len(vectors))
+            components = TruncatedSVD(dims, random_state=seed).fit(vectors).components_
+        elif method == 'random':
+            # Sparse random projection: no fitting beyond the input dimension, and distances are
+            # preserved in expectation whatever the corpus looks like
+            from sklearn.random_projection import SparseRandomProjection
+            components = SparseRandomProjection(min(dims, vectors.shape[1]), random_state=seed).fit(vectors).components_.toarray()
+        else:
+            raise ValueError(f"Unknown reduction method {method!r}; expected one of {REDUCTION_METHODS}")
+        reduction = cls(method, components)
+        reduction.retained = retained_variance(vectors, reduction.transform(vectors))
+        return reduction
+
+    def transform(self, vectors):
+        return np.asarray(vectors, dtype=np.float32) @ self.components.T
+
+    def reduce_centroids(self, centroids):
+        # Same {'target': {category: vector}, 'avoid': {...}} layout as the category library
+        return {group: {category: self.transform(vector) for category, vector in vectors.items()} for group, vectors in centroids.items()}
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(path, method=self.method, components=self.components, retained=self.retained,
+                 agreement=json.dumps(self.agreement))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(str(data['method']), data['components'], float(data['retained']), json.loads(str(data['agreement'])))
+
+def retained_variance(full, reduced):
+    # Share of the corpus's total variance still present after projection (exactly PCA's summed
+    # explained variance ratio; close to 1 on average for a random projection)
+    total = np.var(full, axis=0).sum()
+    return float(np.var(reduced, axis=0).sum() / total) if total else 1.0
+
+def centroid_matrix(centroids):
+    return np.asarray([vector for group in ('target', 'avoid') for vector in centroids[group].values()], dtype=np.float64)
+
+def cosines(vectors, centers):
+    vectors = np.asarray(vectors, dtype=np.float64)
+    norms = np.outer(np.linalg.norm(vectors, axis=1), np.linalg.norm(centers, axis=1))
+    return vectors @ centers.T / np.clip(norms, 1e-12, None)
+
+def score_agreement(reduction, vectors, centroids):
+    # How closely the reduced profile-to-category cosines track the full-dimension ones: Pearson over
+    # all of them, the weakest single category, and the mean absolute change of a cosine
+    full = cosines(vectors, centroid_matrix(centroids))
+    reduced = cosines(reduction.transform(vectors), centroid_matrix(reduction.reduce_centroids(centroids)))
+    per_category = [np.corrcoef(full[:, j], reduced[:, j])[0, 1] for j in range(full.shape[1]) if full[:, j].std() > 0]
+    return {
+        'profiles': len(full),
+        'pearson': float(np.corrcoef(full.ravel(), reduced.ravel())[0, 1]),
+        'min_category_pearson': float(min(per_category)) if per_category else 1.0,
+        'mean_abs_diff': float(np.abs(full - reduced).mean())
+    }
+
+def reduction_path(backend, method, dims, directory=REDUCTION_DIR):
+    return os.path.join(directory, f"{backend.replace('/', '_').replace(':', '_')}-{method}{dims}.npz")
+
+def load_or_fit(backend, method, dims, corpus_vectors, centroids, directory=REDUCTION_DIR):
+    # The projection is persisted per backend, method and size so resumed runs and later runs score in
+    # the same space; corpus_vectors() (every profile embedding) is only called when fitting. Delete
+    # the file to refit on a changed corpus
+    path = reduction_path(backend, method, dims, directory)
+    if os.path.exists(path):
+        reduction = EmbeddingReduction.load(path)
+        print(f"Using the {reduction.key} projection saved in {path}")
+    else:
+        vectors = np.asarray(corpus_vectors(), dtype=np.float64)
+        reduction = EmbeddingReduction.fit(vectors, method, dims)
+        reduction.agreement = score_agreement(reduction, vectors, centroids)
+        reduction.save(path)
+        print(f"Fitted a {reduction.key} projection on {len(vectors)} profile embeddings; saved to {path}")
+    print_report(reduction)
+    return reduction
+
+def print_report(reduction):
+    agreement = reduction.agreement
+    print(f"{reduction.method} {reduction.components.shape[1]} -> {reduction.dims} dims keeps {reduction.retained:.1%} of the corpus variance")
+    if agreement:
+        print(f"Category cosines vs full dimensions over {agreement['profiles']} profiles: Pearson {agreement['pearson']:.4f} "
+              f"(weakest category {agreement['min_category_pearson']:.4f}), mean |change| {agreement['mean_abs_diff']:.4f}")
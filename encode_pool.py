@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import queue
+from contextlib import contextmanager
+
+import numpy as np
+
+THREAD_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+@contextmanager
+def thread_env(threads):
+    # BLAS and OpenMP read these once, when numpy/torch load, and a spawned worker imports them before
+    # any of its own code runs; so they are set in the parent while the workers start (a spawned
+    # process copies the parent's environment) and restored afterwards
+    saved = {var: os.environ.get(var) for var in THREAD_VARS}
+    os.environ.update({var: str(threads) for var in THREAD_VARS})
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+def load_encoder(model_name, engine, threads):
+    if engine == 'onnx':
+        from onnx_encoder import OnnxSentenceEncoder
+        return OnnxSentenceEncoder(model_name, intra_op_threads=threads)
+    import torch
+    from sentence_transformers import SentenceTransformer
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    return SentenceTransformer(model_name, device='cpu')
+
+def encode_worker(model_name, engine, threads, tasks, results):
+    # Thread counts were pinned in the environment before this process imported numpy (see thread_env),
+    # so workers never oversubscribe cores
+    encoder = load_encoder(model_name, engine, threads)
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        call, idx, texts = task
+        try:
+            results.put((call, idx, np.asarray(encoder.encode(texts, batch_size=len(texts)), dtype=np.float32), None))
+        except Exception as e:
+            results.put((call, idx, None, f"{type(e).__name__}: {e}"))
+
+class EncodingPool:
+    # N processes each holding their own copy of the model and pulling length-bucketed batches from one
+    # shared queue; encode() returns embeddings in input order
+    def __init__(self, model_name, workers=None, threads_per_worker=None, engine='torch', batch_size=32):
+        workers = workers or os.cpu_count()
+        threads_per_worker = threads_per_worker or max(1, os.cpu_count() // workers)
+        self.batch_size = batch_size
+        self.calls = 0
+        context = multiprocessing.get_context('spawn')
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.processes = [
+            context.Process(target=encode_worker, args=(model_name, engine, threads_per_worker, self.tasks, self.results), daemon=True)
+            for _ in range(workers)
+        ]
+        with thread_env(threads_per_worker):
+            for process in self.processes:
+                process.start()
+
+    def encode(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Sorting by length puts similar lengths in the same batch, so padding stays small; the
+        # longest batches go out first so the tail of the run is made of cheap ones
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        batches = [order[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        # Every batch carries this call's number; results still arriving from an earlier call that
+        # failed part way are discarded rather than read as this call's embeddings
+        self.calls += 1
+        call = self.calls
+        for idx in batches:
+            self.tasks.put((call, idx, [texts[i] for i in idx]))
+        embeddings = None
+        received = 0
+        while received < len(batches):
+            result_call, idx, batch, error = self._next_result()
+            if result_call != call:
+                continue
+            received += 1
+            if error is not None:
+                self._drop_pending()
+                raise RuntimeError(f"Encoding worker failed: {error}")
+            if embeddings is None:
+                embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            embeddings[idx] = batch
+        return embeddings
+
+    def _next_result(self):
+        while True:
+            try:
+                return self.results.get(timeout=5)
+            except queue.Empty:
+                if not all(process.is_alive() for process in self.processes):
+                    raise RuntimeError("An encoding worker exited unexpectedly")
+
+    def _drop_pending(self):
+        # Batches of a failed call that no worker has picked up yet are not worth encoding
+        try:
+            while True:
+                self.tasks.get_nowait()
+        except queue.Empty:
+            pass
+
+    def close(self):
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
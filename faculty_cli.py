@@ -0,0 +1,270 @@
+import argparse
+import importlib
+import os
+
+from checkpoint import CHECKPOINT_DIR
+import results_store
+from results_store import RESULTS_DB
+
+# Only argparse and the standard library load up front; pandas, the encoders and matplotlib are
+# imported by the subcommand that needs them
+BACKENDS = {
+    'bert': ('analyze_faculty_bert', 'torch'),
+    'onnx': ('analyze_faculty_bert', 'onnx'),
+    'lexical': ('analyze_faculty_bert', 'lexical'),
+    'openai': ('analyze_faculty', None)
+}
+
+def discover_schools():
+    # Every faculty_data_<school>.json in the current directory
+    return [f.split('_')[-1].split('.')[0] for f in os.listdir() if f.startswith('faculty_data_') and f.endswith('.json')]
+
+def select_analyzer(backend):
+    # The BERT analyzer reads FACULTY_ENCODER when it is imported, so it is set first
+    module_name, engine = BACKENDS[backend]
+    if engine is not None:
+        os.environ['FACULTY_ENCODER'] = engine
+    return module_name
+
+def plan_options(args, analyzer):
+    # What the planner needs to mirror an analyze run with these arguments
+    from embedding_pipeline import EMBEDDING_THREADS
+
+    options = {
+        'checkpoint_dir': args.checkpoint_dir,
+        'resume': args.resume,
+        'dedupe': args.dedupe,
+        'comparison_budget': args.comparison_budget,
+        'lexical_engine': args.lexical_engine,
+        'embedding_cache_file': (analyzer.EMBEDDING_CACHE if args.embedding_cache is None else args.embedding_cache) if args.backend != 'openai' else args.embedding_cache or None,
+        'field_weights': analyzer.parse_field_weights(args.field_weights) if args.field_weights else None,
+        'encoder_workers': args.encoder_workers,
+        'embedding_threads': (EMBEDDING_THREADS if args.embedding_threads is None else args.embedding_threads) if args.backend == 'openai' else None,
+        'reduction': args.reduce
+    }
+    if args.reduce_dims is not None:
+        options['reduction_dims'] = args.reduce_dims
+    return options
+
+def budgeted_schools(args, analyzer, schools):
+    # Runs the dry-run planner and keeps the schools that fit --max-dollars / --max-minutes
+    import cost_planner
+
+    plans, overhead = cost_planner.plan_run(analyzer, schools, **plan_options(args, analyzer))
+    selected, status = cost_planner.select_within_budget(plans, overhead, args.max_dollars, args.max_minutes, args.priority)
+    cost_planner.print_plan(plans, overhead, status)
+    return selected
+
+def run_plan(args):
+    analyzer = importlib.import_module(select_analyzer(args.backend))
+    schools = args.schools or discover_schools()
+    if args.max_dollars is not None or args.max_minutes is not None:
+        budgeted_schools(args, analyzer, schools)
+        return
+    import cost_planner
+
+    plans, overhead = cost_planner.plan_run(analyzer, schools, **plan_options(args, analyzer))
+    cost_planner.print_plan(plans, overhead)
+
+def run_analyze(args):
+    analyzer = importlib.import_module(select_analyzer(args.backend))
+    schools = args.schools or discover_schools()
+    if args.max_dollars is not None or args.max_minutes is not None:
+        schools = budgeted_schools(args, analyzer, schools)
+        if not schools:
+            print("No school fits the budget; nothing to analyze")
+            return
+    options = {
+        'render_plots': not args.no_plots,
+        'comparison_budget': args.comparison_budget,
+        'checkpoint_dir': args.checkpoint_dir,
+        'resume': args.resume,
+        'dedupe': args.dedupe,
+        'results_db': args.results_db,
+        'lexical_engine': args.lexical_engine
+    }
+    if args.encoder_workers:
+        options['encoder_workers'] = args.encoder_workers
+    if args.score_workers and args.backend != 'openai':
+        options['score_workers'] = args.score_workers
+    if args.backend == 'openai' and args.embedding_threads is not None:
+        options['embedding_threads'] = args.embedding_threads
+    if args.field_weights:
+        options['field_weights'] = analyzer.parse_field_weights(args.field_weights)
+    if args.cascade:
+        options['cascade'] = {'top_n': args.cascade_top_n} if args.cascade_top_n is not None else {}
+        options['cascade_reference'] = args.cascade_reference
+    if args.backend != 'openai':
+        options['embedding_cache_file'] = analyzer.EMBEDDING_CACHE if args.embedding_cache is None else args.embedding_cache
+    elif args.embedding_cache:
+        options['embedding_cache_file'] = args.embedding_cache
+    if args.reduce:
+        options['reduction'] = args.reduce
+        if args.reduce_dims is not None:
+            options['reduction_dims'] = args.reduce_dims
+    analyzer.analyze_all_schools(
+        schools,
+        analyzer.target_categories,
+        analyzer.avoid_categories,
+        analyzer.target_score,
+        analyzer.avoid_score,
+        analyzer.cosine_weight,
+        analyzer.ngram_weight,
+        **options
+    )
+
+def run_query(args):
+    if args.runs:
+        for run in results_store.list_runs(args.results_db):
+            config = run['config']
+            print(f"run {run['run_id']}: {run['profiles']} profiles, backend {config.get('backend')}, "
+                  f"weights {config.get('target_score')}/{config.get('avoid_score')}/{config.get('cosine_weight')}/{config.get('ngram_weight')}")
+        return
+    columns, rows = results_store.top_scores(
+        args.results_db, args.run, args.school, args.category, args.limit, args.ascending, args.name
+    )
+    cells = [columns] + [[f'{v:.4f}' if isinstance(v, float) else str(v) for v in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(columns))]
+    for row in cells:
+        print('  '.join(value.ljust(width) for value, width in zip(row, widths)))
+
+def run_sweep(args):
+    import weight_sweep
+
+    configs = weight_sweep.build_grid(
+        weight_sweep.parse_values(args.target_score),
+        weight_sweep.parse_values(args.avoid_score),
+        weight_sweep.parse_values(args.cosine_weight),
+        weight_sweep.parse_values(args.ngram_weight) if args.ngram_weight else None
+    )
+    module_name = select_analyzer(args.backend)
+    field_weights = importlib.import_module(module_name).parse_field_weights(args.field_weights) if args.field_weights else None
+    options = {'top_k': args.top_k} if args.top_k is not None else {}
+    if args.reduce_dims is not None:
+        options['reduction_dims'] = args.reduce_dims
+    weight_sweep.run_sweep(
+        module_name, args.schools or discover_schools(), configs, args.checkpoint_dir, args.comparison_budget,
+        output_prefix=args.output_prefix, lexical_engine=args.lexical_engine, field_weights=field_weights,
+        reduction=args.reduce, embedding_cache_file=args.embedding_cache, **options
+    )
+
+def run_multi(args):
+    import multi_config
+
+    module_name = select_analyzer(args.backend)
+    multi_config.run_multi_config(
+        module_name, args.schools or discover_schools(), multi_config.read_configs(args.config_file), args.output_dir,
+        args.comparison_budget, args.lexical_engine, args.embedding_cache, args.results_db
+    )
+
+def add_budget_arguments(parser):
+    parser.add_argument('--max-dollars', type=float, default=None, help="Only run the schools whose estimated API spend fits")
+    parser.add_argument('--max-minutes', type=float, default=None, help="Only run the schools whose estimated runtime fits")
+    parser.add_argument('--priority', choices=['order', 'cheapest'], default='order',
+                        help="Fill the budget in the order given, or cheapest per profile first")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Score, query and tune faculty profile rankings")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    analyze = subparsers.add_parser('analyze', help="Score every school and write the analysis CSVs")
+    analyze.add_argument('schools', nargs='*', help="Defaults to every faculty_data_<school>.json here")
+    analyze.add_argument('--backend', choices=sorted(BACKENDS), default='bert',
+                         help="Embedding backend; lexical skips embeddings and scores n-grams only")
+    analyze.add_argument('--resume', action='store_true', help="Reuse checkpointed scores and retry failed profiles from an interrupted run")
+    analyze.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR, help="Where completed profile scores are checkpointed")
+    analyze.add_argument('--dedupe', action='store_true', help="Score each cluster of near-duplicate profiles only once")
+    analyze.add_argument('--comparison-budget', type=int, default=None, help="Cap fuzzy comparisons per profile")
+    analyze.add_argument('--encoder-workers', type=int, default=None, help="Encode profiles in this many worker processes (bert/onnx)")
+    analyze.add_argument('--score-workers', type=int, default=None,
+                         help="Score profiles in this many processes sharing one embedding matrix (bert/onnx/lexical)")
+    analyze.add_argument('--embedding-threads', type=int, default=None,
+                         help="Embedding requests kept in flight while profiles are scored lexically (default EMBEDDING_THREADS); 0 sends them one at a time (openai)")
+    analyze.add_argument('--field-weights', default=None,
+                         help="Compose profile vectors from per-field embeddings, e.g. specialties=1,intro=1,publications=0.5 (bert/onnx)")
+    analyze.add_argument('--embedding-cache', default=None, help="SQLite cache of text embeddings (on by default for bert/onnx; '' to disable)")
+    analyze.add_argument('--reduce', choices=['pca', 'random'], default=None,
+                         help="Project embeddings to fewer dimensions with PCA or a sparse random projection, fitted once on the corpus and saved")
+    analyze.add_argument('--reduce-dims', type=int, default=None, help="Defaults to REDUCTION_DIMS")
+    analyze.add_argument('--cascade', action='store_true', help="Score lexically first and embed only profiles that can reach each school's top N")
+    analyze.add_argument('--cascade-top-n', type=int, default=None, help="Defaults to CASCADE_TOP_N")
+    analyze.add_argument('--cascade-reference', default=None, help="CSV from an earlier full run to report rank agreement against")
+    analyze.add_argument('--lexical-engine', choices=['fuzzy', 'sparse'], default='fuzzy',
+                         help="sparse approximates fuzzy n-gram scores with character-trigram vectors, much faster")
+    analyze.add_argument('--no-plots', action='store_true')
+    analyze.add_argument('--results-db', default=RESULTS_DB, help="SQLite results store the run is added to")
+    add_budget_arguments(analyze)
+    analyze.set_defaults(handler=run_analyze)
+
+    plan = subparsers.add_parser('plan', help="Dry run: estimate requests, tokens, dollars and minutes per school without calling any backend")
+    plan.add_argument('schools', nargs='*', help="Defaults to every faculty_data_<school>.json here")
+    plan.add_argument('--backend', choices=sorted(BACKENDS), default='bert')
+    plan.add_argument('--resume', action='store_true', help="Count profiles already in the checkpoints as done")
+    plan.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR)
+    plan.add_argument('--dedupe', action='store_true')
+    plan.add_argument('--comparison-budget', type=int, default=None)
+    plan.add_argument('--encoder-workers', type=int, default=None)
+    plan.add_argument('--embedding-threads', type=int, default=None)
+    plan.add_argument('--field-weights', default=None)
+    plan.add_argument('--embedding-cache', default=None)
+    plan.add_argument('--reduce', choices=['pca', 'random'], default=None)
+    plan.add_argument('--reduce-dims', type=int, default=None)
+    plan.add_argument('--lexical-engine', choices=['fuzzy', 'sparse'], default='fuzzy')
+    add_budget_arguments(plan)
+    plan.set_defaults(handler=run_plan)
+
+    query = subparsers.add_parser('query', help="Top or bottom faculty from the results store")
+    query.add_argument('--results-db', default=RESULTS_DB)
+    query.add_argument('--run', type=int, default=None, help="Run id; defaults to the latest run")
+    query.add_argument('--runs', action='store_true', help="List the stored runs instead")
+    query.add_argument('--school', default=None)
+    query.add_argument('--category', default=None, help="Rank by this category's score instead of total_score, e.g. cold war")
+    query.add_argument('--name', default=None, help="Case-insensitive substring of the faculty name")
+    query.add_argument('--ascending', action='store_true', help="Lowest scores first")
+    query.add_argument('--limit', type=int, default=10)
+    query.set_defaults(handler=run_query)
+
+    sweep = subparsers.add_parser('sweep', help="Evaluate a grid of score weights without re-scoring")
+    sweep.add_argument('schools', nargs='*', help="Defaults to every faculty_data_<school>.json here")
+    sweep.add_argument('--backend', choices=sorted(BACKENDS), default='bert')
+    sweep.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR)
+    sweep.add_argument('--comparison-budget', type=int, default=None)
+    sweep.add_argument('--lexical-engine', choices=['fuzzy', 'sparse'], default='fuzzy', help="Same settings as the analyze run whose checkpoints to reuse")
+    sweep.add_argument('--field-weights', default=None)
+    sweep.add_argument('--embedding-cache', default=None)
+    sweep.add_argument('--reduce', choices=['pca', 'random'], default=None)
+    sweep.add_argument('--reduce-dims', type=int, default=None)
+    sweep.add_argument('--target-score', default='1', help="Value, comma list or start:stop:count")
+    sweep.add_argument('--avoid-score', default='-2:-0.5:7',
+                       help="Values starting with '-' need the = form, e.g. --avoid-score=-3:-1:9")
+    sweep.add_argument('--cosine-weight', default='0:1:21')
+    sweep.add_argument('--ngram-weight', default=None, help="Defaults to 1 - cosine weight")
+    sweep.add_argument('--top-k', type=int, default=None, help="Defaults to TOP_K")
+    sweep.add_argument('--output-prefix', default='weight_sweep')
+    sweep.set_defaults(handler=run_sweep)
+
+    multi = subparsers.add_parser('multi', help="Score every profile once against many category configurations")
+    multi.add_argument('config_file', help="JSON object mapping a configuration name to its target_categories, avoid_categories and optional weights")
+    multi.add_argument('schools', nargs='*', help="Defaults to every faculty_data_<school>.json here")
+    multi.add_argument('--backend', choices=sorted(BACKENDS), default='bert')
+    multi.add_argument('--output-dir', default='multi_config', help="One faculty_analysis_<config>.csv per configuration")
+    multi.add_argument('--comparison-budget', type=int, default=None)
+    multi.add_argument('--lexical-engine', choices=['fuzzy', 'sparse'], default='fuzzy')
+    multi.add_argument('--embedding-cache', default=None, help="SQLite embedding cache (bert/onnx)")
+    multi.add_argument('--results-db', default=None, help="Also store each configuration as a run in this results store")
+    multi.set_defaults(handler=run_multi)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'backend', None) == 'openai':
+        # The OpenAI analyzer embeds whole profiles over the API: no local encoder processes, no field mix
+        unsupported = [flag for flag, value in (('--encoder-workers', getattr(args, 'encoder_workers', None)),
+                                                ('--field-weights', getattr(args, 'field_weights', None))) if value]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)}: not supported by the openai backend (bert/onnx only)")
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
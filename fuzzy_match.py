@@ -0,0 +1,55 @@
+from rapidfuzz import fuzz
+
+# Slack so float rounding in the length bound can never prune a comparison that would tie
+BOUND_EPSILON = 1e-9
+
+class ComparisonBudget:
+    __slots__ = ('limit', 'used')
+
+    def __init__(self, limit=None):
+        self.limit = limit  # None means unlimited
+        self.used = 0
+
+    def spend(self):
+        if self.limit is not None and self.used >= self.limit:
+            return False
+        self.used += 1
+        return True
+
+    @property
+    def exhausted(self):
+        return self.limit is not None and self.used >= self.limit
+
+def length_bound(a, b):
+    # fuzz.ratio is 100 * (1 - indel / (a + b)) and the indel distance is at least |a - b|
+    return 200.0 * min(a, b) / (a + b) if a + b else 100.0
+
+def best_ratio(q_gram, buckets, budget=None):
+    exact, by_length = buckets
+    if q_gram in exact:
+        return 100.0
+    q_length = len(q_gram)
+    ordered = sorted(((length_bound(q_length, length), length) for length in by_length), reverse=True)
+    best = 0
+    for bound, length in ordered:
+        if bound < best - BOUND_EPSILON:
+            break
+        for t_gram in by_length[length]:
+            if budget is not None and not budget.spend():
+                return best
+            ratio = fuzz.ratio(q_gram, t_gram, score_cutoff=best)
+            if ratio > best:
+                best = ratio
+    return best
+
+def score_phrase_pruned(compiled, doc, budget=None):
+    # Same result as lexical.score_compiled_phrase when the budget is unlimited
+    score = 0
+    for n, q_grams in enumerate(compiled['ngrams'], start=1):
+        if not q_grams:
+            continue
+        buckets = doc.length_buckets(n)
+        for q_gram in q_grams:
+            best_match = best_ratio(q_gram, buckets, budget)
+            score += best_match * n * n  # Weight longer n-grams more
+    return score / compiled['max_score'] if compiled['max_score'] > 0 else 0.0
@@ -0,0 +1,106 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+ARCHIVE_DIR = 'html_archive'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    status_code INTEGER,
+    content_type TEXT,
+    encoding TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+class ArchiveMiss(KeyError):
+    pass
+
+class HtmlArchive:
+    # Every fetched page as a gzip blob named by the SHA-256 of its bytes (identical pages are stored
+    # once), plus a SQLite index from URL to the blob of its latest fetch. Safe to share between threads
+    def __init__(self, directory=ARCHIVE_DIR):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.sqlite'), timeout=60, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def blob_path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], f'{digest}.gz')
+
+    def store(self, url, content, status_code=200, content_type=None, encoding=None):
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+            encoding = encoding or 'utf-8'
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written under a temporary name so a crash never leaves a truncated blob behind
+            temp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temp, 'wb') as f:
+                f.write(gzip.compress(content))
+            os.replace(temp, path)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (url, sha256, status_code, content_type, encoding, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, digest, status_code, content_type, encoding, time.time())
+            )
+            self.conn.commit()
+        return digest
+
+    def store_response(self, response, url=None):
+        # Archived under the URL that was asked for, which is what the journals record
+        return self.store(url or response.url, response.content, response.status_code,
+                          response.headers.get('Content-Type'), response.encoding)
+
+    def lookup(self, url):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT sha256, status_code, content_type, encoding FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+    def has(self, url):
+        return self.lookup(url) is not None
+
+    def content(self, url):
+        row = self.lookup(url)
+        if row is None:
+            raise ArchiveMiss(url)
+        with open(self.blob_path(row[0]), 'rb') as f:
+            return gzip.decompress(f.read())
+
+    def response(self, url):
+        # A requests.Response rebuilt from the archive, so .text decodes exactly as it did when fetched
+        row = self.lookup(url)
+        if row is None:
+            raise ArchiveMiss(url)
+        digest, status_code, content_type, encoding = row
+        response = requests.Response()
+        with open(self.blob_path(digest), 'rb') as f:
+            response._content = gzip.decompress(f.read())
+        response.status_code = status_code
+        response.url = url
+        response.encoding = encoding
+        response.headers = CaseInsensitiveDict({'Content-Type': content_type} if content_type else {})
+        return response
+
+    def html(self, url):
+        return self.response(url).text
+
+    def stats(self):
+        with self.lock:
+            pages, blobs = self.conn.execute("SELECT COUNT(*), COUNT(DISTINCT sha256) FROM pages").fetchone()
+        return {'pages': pages, 'blobs': blobs}
+
+    def close(self):
+        self.conn.close()
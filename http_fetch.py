@@ -0,0 +1,119 @@
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+
+from html_archive import HtmlArchive, ARCHIVE_DIR
+
+MAX_CONNECTIONS = 16  # Requests in flight across every scraper
+MAX_BROWSERS = 2  # Selenium browsers open at once; each one is a full Chrome process
+HOST_DELAY = 1.0  # Seconds between the start of two requests to the same host
+HOST_CONNECTIONS = 1  # Requests in flight per host
+REQUEST_TIMEOUT = 30
+
+class HostBudget:
+    # Politeness for one host: at most HOST_CONNECTIONS requests in flight and HOST_DELAY seconds
+    # between request starts, however many threads are scraping it
+    def __init__(self, delay=HOST_DELAY, connections=HOST_CONNECTIONS):
+        self.delay = delay
+        self.slots = threading.BoundedSemaphore(connections)
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+
+    def wait_turn(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+_connections = threading.BoundedSemaphore(MAX_CONNECTIONS)
+_browsers = threading.BoundedSemaphore(MAX_BROWSERS)
+_hosts = {}
+_hosts_lock = threading.Lock()
+_host_settings = {'delay': HOST_DELAY, 'connections': HOST_CONNECTIONS}
+_local = threading.local()
+_archive_settings = {'directory': ARCHIVE_DIR, 'offline': False}
+_archive = None
+_archive_lock = threading.Lock()
+
+def configure(max_connections=MAX_CONNECTIONS, max_browsers=MAX_BROWSERS, host_delay=HOST_DELAY, host_connections=HOST_CONNECTIONS,
+              archive_dir=ARCHIVE_DIR, offline=False):
+    # Call before any scraping starts; budgets already handed out keep their old limits.
+    # archive_dir=None stops archiving; offline=True serves every page from the archive instead of the network
+    global _connections, _browsers, _archive
+    _connections = threading.BoundedSemaphore(max_connections)
+    _browsers = threading.BoundedSemaphore(max_browsers)
+    with _hosts_lock:
+        _hosts.clear()
+        _host_settings.update(delay=host_delay, connections=host_connections)
+    with _archive_lock:
+        _archive = None
+        _archive_settings.update(directory=archive_dir, offline=offline)
+
+def archive():
+    # The shared HtmlArchive, opened on first use; None when archiving is off
+    global _archive
+    with _archive_lock:
+        if _archive is None and _archive_settings['directory']:
+            _archive = HtmlArchive(_archive_settings['directory'])
+        return _archive
+
+def is_offline():
+    return _archive_settings['offline']
+
+def host_budget(url):
+    host = urlsplit(url).netloc.lower()
+    with _hosts_lock:
+        budget = _hosts.get(host)
+        if budget is None:
+            budget = _hosts[host] = HostBudget(**_host_settings)
+        return budget
+
+def _session():
+    # requests.Session is not safe to share between threads, so each thread keeps its own pool
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+def fetch(url, session=None, **kwargs):
+    # Drop-in for requests.get that waits for the host's turn and a global connection slot, and keeps
+    # a copy of every response in the archive. Offline, the archived response is returned instead
+    if is_offline():
+        return archive().response(url)
+    kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+    budget = host_budget(url)
+    with budget.slots:
+        budget.wait_turn()
+        with _connections:
+            response = (session or _session()).get(url, **kwargs)
+    if archive() is not None:
+        archive().store_response(response, url)
+    return response
+
+def browser_get(driver, url):
+    # driver.get under the same per-host budget as fetch: the host's slot is held for the page load,
+    # which starts no sooner than HOST_DELAY after the previous request to that host
+    budget = host_budget(url)
+    with budget.slots:
+        budget.wait_turn()
+        driver.get(url)
+
+def archive_page(url, html):
+    # For pages rendered by Selenium, which never pass through fetch
+    if archive() is not None and not is_offline():
+        archive().store(url, html)
+
+def archived_page(url):
+    # The archived HTML when running offline, else None and the caller renders the page itself
+    return archive().html(url) if is_offline() else None
+
+@contextmanager
+def browser_slot():
+    # Held for as long as a Selenium driver is open
+    with _browsers:
+        yield
@@ -0,0 +1,41 @@
+import re
+import pandas as pd
+from rapidfuzz import fuzz
+
+MAX_N = 3
+
+def normalize_text(text):
+    if pd.isna(text):
+        return ""
+    return re.sub(r'[^\w\s]', '', str(text).lower())
+
+def get_ngrams(text, n):
+    words = text.split()
+    return [' '.join(words[i:i+n]) for i in range(len(words)-n+1)]
+
+def compile_phrase(phrase, max_n=MAX_N):
+    # Everything about a query phrase that does not depend on the profile text
+    normalized = normalize_text(phrase)
+    ngrams = [get_ngrams(normalized, n) for n in range(1, max_n+1)]
+    max_score = sum(100 * len(ngrams[n-1]) * n * n for n in range(1, max_n+1))
+    return {
+        'phrase': phrase,
+        'text': normalized,
+        'ngrams': ngrams,
+        'weights': [n * n for n in range(1, max_n+1)],
+        'max_score': max_score
+    }
+
+def score_compiled_phrase(compiled, text_ngrams):
+    score = 0
+    for n, q_grams in enumerate(compiled['ngrams'], start=1):
+        for q_gram in q_grams:
+            best_match = max((fuzz.ratio(q_gram, t_gram) for t_gram in text_ngrams[n-1]), default=0)
+            score += best_match * n * n  # Weight longer n-grams more
+    return score / compiled['max_score'] if compiled['max_score'] > 0 else 0.0
+
+def multi_ngram_search(query, text, max_n=MAX_N):
+    compiled = compile_phrase(query, max_n)
+    text = normalize_text(text)
+    text_ngrams = [get_ngrams(text, i) for i in range(1, max_n+1)]
+    return score_compiled_phrase(compiled, text_ngrams)
@@ -0,0 +1,161 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from analysis_common import load_analyzer, weighted_mean
+from cascade import ngram_scores
+from category_library import load_category_library
+from embedding_cache import EmbeddingCache
+from fuzzy_match import ComparisonBudget
+from profile_doc import ProfileDoc
+from results_store import write_run
+
+WEIGHTS = ('target_score', 'avoid_score', 'cosine_weight', 'ngram_weight')
+
+def read_configs(config_file):
+    # {"<name>": {"target_categories": {...}, "avoid_categories": {...}, optional weights}, ...};
+    # missing weights default to the analyzer's
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def stable_name(prefix, value):
+    # Union entries are named by content, so the union libraries stay cached across config sets
+    return f"{prefix}{hashlib.sha1(json.dumps(value).encode('utf-8')).hexdigest()[:16]}"
+
+def build_union(configs):
+    # Every distinct phrase and every distinct category definition (its phrase list) across all
+    # configurations. A category's _ngram only depends on its phrases and its _cosine on their
+    # centroid, so each is scored once however many configurations or names share it
+    phrases = {}
+    definitions = {}
+    for config in configs.values():
+        for group in ('target_categories', 'avoid_categories'):
+            for category_phrases in config[group].values():
+                definitions.setdefault(tuple(category_phrases), stable_name('c', category_phrases))
+                for phrase in category_phrases:
+                    phrases.setdefault(phrase, stable_name('p', phrase))
+    return phrases, definitions
+
+def profile_vectors(analyzer, df, embedding_cache=None):
+    if hasattr(analyzer, 'profile_embeddings'):
+        return analyzer.profile_embeddings(df, list(range(len(df))), embedding_cache=embedding_cache)
+    return [analyzer.get_embedding(text) for text in df['combined_text']]
+
+def cosine_matrix(vectors, centroids):
+    # (profiles x definitions); a missing vector (lexical backend) scores 0 like cosine_similarity
+    cosine = np.zeros((len(vectors), len(centroids)))
+    present = [i for i, vector in enumerate(vectors) if vector is not None]
+    if present and all(centroid is not None for centroid in centroids):
+        profiles = np.asarray([vectors[i] for i in present], dtype=np.float64)
+        centers = np.asarray(centroids, dtype=np.float64)
+        norms = np.outer(np.linalg.norm(profiles, axis=1), np.linalg.norm(centers, axis=1))
+        # Zero-safe like cosine_similarity: a zero vector scores 0 rather than NaN in every config
+        cosine[present] = np.divide(profiles @ centers.T, norms, out=np.zeros_like(norms), where=norms != 0)
+    return cosine
+
+def score_union(analyzer, schools, phrases, definitions, comparison_budget=None, lexical_engine='fuzzy', embedding_cache_file=None):
+    # One embedding per profile and one lexical pass over the union phrases per profile. Returns the
+    # profiles (name, school) and the union cosine / ngram matrices (profiles x definitions)
+    backend = analyzer.EMBEDDING_BACKEND
+    phrase_library = load_category_library({name: [phrase] for phrase, name in phrases.items()}, {})
+    centroid_library = load_category_library(
+        {name: list(definition) for definition, name in definitions.items()}, {}, backend, analyzer.get_embedding
+    )
+    centroids = [centroid_library['centroids'][backend]['target'][name] for name in definitions.values()]
+    # Column j of the phrase matrix feeds every definition that lists phrase j
+    phrase_columns = {name: j for j, name in enumerate(phrases.values())}
+    members = [[phrase_columns[phrases[phrase]] for phrase in definition] for definition in definitions]
+    engine = None
+    if lexical_engine == 'sparse':
+        from sparse_lexical import calibrated_engine
+        engine = calibrated_engine(phrase_library, analyzer.load_faculty_data)
+    embedding_cache = EmbeddingCache(backend, embedding_cache_file) if embedding_cache_file and hasattr(analyzer, 'profile_embeddings') else None
+
+    profiles, cosines, ngrams = [], [], []
+    for school in schools:
+        df, school = analyzer.load_faculty_data(f'faculty_data_{school}.json')
+        texts = list(df['combined_text'])
+        if engine is not None:
+            rows = engine.score(texts)
+        else:
+            rows = [ngram_scores(phrase_library, ProfileDoc(text), ComparisonBudget(comparison_budget)) for text in texts]
+        phrase_scores = np.array([[row[f'{name}_ngram'] for name in phrases.values()] for row in rows], dtype=np.float64).reshape(len(texts), len(phrases))
+        ngrams.append(np.column_stack([phrase_scores[:, columns].max(axis=1) for columns in members]) if len(texts) else np.zeros((0, len(members))))
+        cosines.append(cosine_matrix(profile_vectors(analyzer, df, embedding_cache), centroids))
+        profiles.append(df[['name', 'school']])
+        print(f"Scored {len(texts)} {school} profiles against the union")
+    if embedding_cache is not None:
+        embedding_cache.close()
+    return pd.concat(profiles, ignore_index=True), np.vstack(cosines), np.vstack(ngrams)
+
+def config_frame(analyzer, config, profiles, cosine, ngram, definitions):
+    # finalize_scores for one configuration, vectorized over profiles (its row-wise np.average would
+    # dominate once the union is scored), reading the union columns under the config's category names
+    column = {definition: j for j, definition in enumerate(definitions)}
+    target_categories, avoid_categories = config['target_categories'], config['avoid_categories']
+    categories = list(target_categories) + list(avoid_categories)
+    columns = [column[tuple(target_categories[c])] for c in target_categories] + [column[tuple(avoid_categories[c])] for c in avoid_categories]
+    is_target = np.arange(len(categories)) < len(target_categories)
+    weights = [config.get(weight, getattr(analyzer, weight)) for weight in WEIGHTS]
+    target_score, avoid_score, cosine_weight, ngram_weight = weights
+    scores = (cosine[:, columns] * cosine_weight + ngram[:, columns] * ngram_weight) * np.where(is_target, target_score, avoid_score)
+    result = pd.DataFrame({'name': profiles['name']})
+    result['target_score'] = weighted_mean(scores, is_target)
+    result['avoid_score'] = weighted_mean(scores, ~is_target)
+    result['total_score'] = result['target_score'] + result['avoid_score']
+    result = pd.concat([result, pd.DataFrame(scores, columns=[f'{category}_score' for category in categories], index=result.index)], axis=1)
+    result['school'] = profiles['school']
+    return result, weights
+
+def run_multi_config(analyzer_name, schools, configs, output_dir='multi_config', comparison_budget=None,
+                     lexical_engine='fuzzy', embedding_cache_file=None, results_db=None):
+    analyzer = load_analyzer(analyzer_name)
+    phrases, definitions = build_union(configs)
+    slots = sum(len(config[group]) for config in configs.values() for group in ('target_categories', 'avoid_categories'))
+    print(f"{len(configs)} configurations: {slots} categories -> {len(definitions)} distinct definitions, {len(phrases)} distinct phrases")
+    start = time.perf_counter()
+    profiles, cosine, ngram = score_union(analyzer, schools, phrases, definitions, comparison_budget, lexical_engine, embedding_cache_file)
+    scored = time.perf_counter() - start
+
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = {}
+    for name, config in configs.items():
+        result, weights = config_frame(analyzer, config, profiles, cosine, ngram, definitions)
+        result.to_csv(os.path.join(output_dir, f'faculty_analysis_{name}.csv'), index=False)
+        if results_db is not None:
+            write_run(result, dict(zip(WEIGHTS, weights), **{
+                'backend': analyzer.EMBEDDING_BACKEND,
+                'config_name': name,
+                'schools': schools,
+                'comparison_budget': comparison_budget,
+                'lexical_engine': lexical_engine
+            }), results_db)
+        results[name] = result
+    print(f"Scored {len(profiles)} profiles once in {scored:.1f}s; finalized {len(configs)} configurations in {time.perf_counter() - start:.1f}s")
+    print(f"Results in {output_dir}/faculty_analysis_<config>.csv")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every profile once against the union of many category configurations")
+    parser.add_argument('config_file', help="JSON object mapping a configuration name to its target_categories, avoid_categories and optional weights")
+    parser.add_argument('--analyzer', default='analyze_faculty_bert')
+    parser.add_argument('--schools', nargs='*', default=None, help="Defaults to every faculty_data_<school>.json here")
+    parser.add_argument('--output-dir', default='multi_config')
+    parser.add_argument('--comparison-budget', type=int, default=None)
+    parser.add_argument('--lexical-engine', choices=['fuzzy', 'sparse'], default='fuzzy')
+    parser.add_argument('--embedding-cache', default=None, help="SQLite embedding cache")
+    parser.add_argument('--results-db', default=None, help="Also store each configuration as a run in this results store")
+    args = parser.parse_args()
+
+    schools = args.schools or [f.split('_')[-1].split('.')[0] for f in os.listdir() if f.startswith('faculty_data_') and f.endswith('.json')]
+    run_multi_config(args.analyzer, schools, read_configs(args.config_file), args.output_dir, args.comparison_budget,
+                     args.lexical_engine, args.embedding_cache, args.results_db)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import hashlib
+import zlib
+
+import numpy as np
+
+from lexical import normalize_text
+
+PRIME = 4294967291  # Largest prime below 2**32, so (a * x) fits in uint64
+NUM_PERM = 128
+BANDS = 16
+SHINGLE_SIZE = 3
+THRESHOLD = 0.8
+
+class MinHasher:
+    def __init__(self, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = rng.integers(1, PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text):
+        words = normalize_text(text).split()
+        n = min(self.shingle_size, len(words))
+        grams = {' '.join(words[i:i+n]) for i in range(len(words)-n+1)} if n else set()
+        return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text):
+        x = self.shingles(text)
+        if len(x) == 0:
+            return None
+        hashes = ((self.a[:, None] * (x[None, :] % np.uint64(PRIME))) % np.uint64(PRIME) + self.b[:, None]) % np.uint64(PRIME)
+        return hashes.min(axis=1)
+
+class NearDuplicateIndex:
+    # Banded LSH over MinHash signatures. Only cluster representatives go into the buckets, so every
+    # profile costs one signature plus a handful of bucket lookups and clusters never chain
+    def __init__(self, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+        self.exact = {}
+        self.representative = {}
+
+    def add(self, key, text):
+        # Returns the key of the cluster representative this profile belongs to (itself if new)
+        digest = hashlib.sha1(normalize_text(text).encode('utf-8')).digest()
+        rep = self.exact.get(digest)
+        if rep is None:
+            signature = self.hasher.signature(text)
+            rep = self._match(signature) if signature is not None else None
+            if rep is None:
+                rep = key
+                if signature is not None:
+                    self._insert(key, signature)
+            self.exact.setdefault(digest, rep)
+        self.representative[key] = rep
+        return rep
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _match(self, signature):
+        best, best_similarity = None, self.threshold
+        seen = set()
+        for band, band_key in self._band_keys(signature):
+            for candidate in self.buckets[band].get(band_key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                similarity = float(np.mean(self.signatures[candidate] == signature))
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+        return best
+
+    def _insert(self, key, signature):
+        self.signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self.buckets[band].setdefault(band_key, []).append(key)
+
+    def clusters(self):
+        clusters = {}
+        for key, rep in self.representative.items():
+            clusters.setdefault(rep, []).append(key)
+        return clusters
+
+class DuplicateScoreCache:
+    # Scores each near-duplicate cluster once and hands the same raw scores to every member
+    def __init__(self, index=None):
+        self.index = index or NearDuplicateIndex()
+        self.scores = {}
+        self.reused = 0
+
+    def lookup(self, key, text):
+        rep = self.index.add(key, text)
+        scores = self.scores.get(rep)
+        if scores is not None:
+            self.reused += 1
+        return rep, scores
+
+    def store(self, rep, scores):
+        self.scores.setdefault(rep, scores)
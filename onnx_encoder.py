@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+ONNX_DIR = 'onnx_models'
+AGREEMENT_THRESHOLD = 0.99  # Minimum per-text cosine between int8 ONNX and torch embeddings
+
+def model_dir(model_name, output_dir=ONNX_DIR):
+    return os.path.join(output_dir, model_name.replace('/', '_'))
+
+def export_onnx(model_name, output_dir=ONNX_DIR):
+    # Exports the locally cached SentenceTransformer's transformer to ONNX and quantizes its weights
+    # to int8; pooling and normalization are done in numpy at encode time
+    directory = model_dir(model_name, output_dir)
+    quantized_path = os.path.join(directory, 'model.int8.onnx')
+    if os.path.exists(quantized_path):
+        return directory
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    st_model = SentenceTransformer(model_name, device='cpu')
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids)[0]
+
+    os.makedirs(directory, exist_ok=True)
+    float_path = os.path.join(directory, 'model.onnx')
+    dummy = tokenizer(['faculty profile'], return_tensors='pt')
+    dynamic = {0: 'batch', 1: 'sequence'}
+    with torch.no_grad():
+        torch.onnx.export(
+            LastHiddenState(transformer),
+            (dummy['input_ids'], dummy['attention_mask'], dummy['token_type_ids']),
+            float_path,
+            input_names=['input_ids', 'attention_mask', 'token_type_ids'],
+            output_names=['last_hidden_state'],
+            dynamic_axes={'input_ids': dynamic, 'attention_mask': dynamic, 'token_type_ids': dynamic, 'last_hidden_state': dynamic},
+            opset_version=14,
+            dynamo=False
+        )
+    quantize_dynamic(float_path, quantized_path, weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(directory)
+    with open(os.path.join(directory, 'encoder.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'model_name': model_name,
+            'max_seq_length': st_model.max_seq_length,
+            'normalize': any(type(module).__name__ == 'Normalize' for module in st_model)
+        }, f, indent=4)
+    return directory
+
+class OnnxSentenceEncoder:
+    # Drop-in for SentenceTransformer.encode on CPU, running the int8 model under ONNX Runtime
+    def __init__(self, model_name, intra_op_threads=None, output_dir=ONNX_DIR):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        directory = export_onnx(model_name, output_dir)
+        with open(os.path.join(directory, 'encoder.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.max_seq_length = meta['max_seq_length']
+        self.normalize = meta['normalize']
+        self.tokenizer = AutoTokenizer.from_pretrained(directory)
+
+        # One large intra-op pool and no inter-op parallelism suits a single stream of big batches
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads or os.cpu_count()
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(os.path.join(directory, 'model.int8.onnx'), options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, batch):
+        tokens = self.tokenizer(batch, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors='np')
+        feed = {name: tokens[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(None, feed)[0]
+        mask = tokens['attention_mask'][..., None].astype(np.float32)
+        embeddings = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        if len(sentences) == 0:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Length-sorted batches keep padding small; results go back in input order
+        order = np.argsort([-len(s) for s in sentences], kind='stable')
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            idx = order[start:start + batch_size]
+            batches.append((idx, self._encode_batch([sentences[i] for i in idx])))
+        embeddings = np.empty((len(sentences), batches[0][1].shape[1]), dtype=np.float32)
+        for idx, batch in batches:
+            embeddings[idx] = batch
+        return embeddings[0] if single else embeddings
+
+def benchmark(model_name, texts, batch_size=32, intra_op_threads=None):
+    from sentence_transformers import SentenceTransformer
+
+    torch_model = SentenceTransformer(model_name, device='cpu')
+    onnx_model = OnnxSentenceEncoder(model_name, intra_op_threads)
+    # Warm both up so one-off initialization is not timed
+    torch_model.encode(texts[:batch_size], batch_size=batch_size)
+    onnx_model.encode(texts[:batch_size], batch_size=batch_size)
+
+    start = time.perf_counter()
+    torch_embeddings = torch_model.encode(texts, batch_size=batch_size)
+    torch_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    onnx_embeddings = onnx_model.encode(texts, batch_size=batch_size)
+    onnx_seconds = time.perf_counter() - start
+
+    a = torch_embeddings / np.linalg.norm(torch_embeddings, axis=1, keepdims=True)
+    b = onnx_embeddings / np.linalg.norm(onnx_embeddings, axis=1, keepdims=True)
+    agreement = (a * b).sum(axis=1)
+    result = {
+        'texts': len(texts),
+        'torch_seconds': torch_seconds,
+        'onnx_seconds': onnx_seconds,
+        'speedup': torch_seconds / onnx_seconds,
+        'min_cosine': float(agreement.min()),
+        'mean_cosine': float(agreement.mean()),
+        'passes': bool(agreement.min() >= AGREEMENT_THRESHOLD)
+    }
+    print(f"torch: {torch_seconds:.2f}s, onnx int8: {onnx_seconds:.2f}s, speedup {result['speedup']:.2f}x over {len(texts)} texts")
+    print(f"cosine agreement: min {result['min_cosine']:.4f}, mean {result['mean_cosine']:.4f} (threshold {AGREEMENT_THRESHOLD})")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and benchmark the int8 ONNX sentence encoder")
+    parser.add_argument('command', choices=['export', 'benchmark'])
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--input', default='faculty_data.json', help="Faculty JSON whose profiles are used as benchmark texts")
+    parser.add_argument('--limit', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        print(f"Exported to {export_onnx(args.model)}")
+        return
+    with open(args.input, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    texts = []
+    for person in data[:args.limit]:
+        fields = [person.get(key) for key in ('specialties', 'publications', 'intro', 'courses')]
+        texts.append(' '.join(' '.join(v) if isinstance(v, list) else v for v in fields if isinstance(v, (str, list))))
+    result = benchmark(args.model, texts, args.batch_size, args.threads)
+    if not result['passes']:
+        raise SystemExit(f"ONNX embeddings fall below the {AGREEMENT_THRESHOLD} cosine agreement threshold")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from collections import deque
+
+class PhraseAutomaton:
+    # Aho-Corasick over vocabulary token ids: one left-to-right pass over a profile finds every
+    # pattern that occurs in it as a contiguous run of words
+    __slots__ = ('goto', 'fail', 'outputs')
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [set()]
+
+    def add(self, token_ids, label):
+        state = 0
+        for token_id in token_ids:
+            next_state = self.goto[state].get(token_id)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][token_id] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append(set())
+            state = next_state
+        self.outputs[state].add(label)
+
+    def build(self):
+        # Breadth-first fail links; each state also reports the patterns that end at its suffixes
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token_id, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and token_id not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(token_id, 0)
+                self.fail[child] = target if target != child else 0
+                self.outputs[child] |= self.outputs[self.fail[child]]
+        self.outputs = [frozenset(labels) for labels in self.outputs]
+        return self
+
+    def scan(self, token_ids):
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        hits = set()
+        state = 0
+        for token_id in token_ids:
+            while state and token_id not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token_id, 0)
+            if outputs[state]:
+                hits |= outputs[state]
+        return hits
+
+def library_automaton(library, vocab):
+    # One automaton per category library, kept on the vocabulary whose token ids it uses and labelled
+    # (group, category). Phrases that normalize to nothing can never score, so they are left out
+    automaton = vocab.automata.get(library['hash'])
+    if automaton is None:
+        automaton = PhraseAutomaton()
+        for group, categories in library['phrases'].items():
+            for category, phrases in categories.items():
+                for compiled in phrases:
+                    words = compiled['text'].split()
+                    if words:
+                        automaton.add(vocab.encode(words), (group, category))
+        automaton = vocab.automata[library['hash']] = automaton.build()
+    return automaton
+
+def exact_phrase_hits(library, doc):
+    # {group: set of categories with at least one phrase appearing verbatim in the profile}. Every
+    # n-gram of such a phrase is then an exact match, so its lexical score is exactly 1.0
+    hits = {group: set() for group in library['phrases']}
+    for group, category in library_automaton(library, doc.vocab).scan(doc.token_ids):
+        hits[group].add(category)
+    return hits
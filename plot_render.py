@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+MANIFEST_FILE = 'plot_manifest.json'
+
+def summarize_scores(values, whis=1.5):
+    # Same statistics seaborn/matplotlib draw for a boxplot, so the renderer never needs the full frame
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)]
+    whislo = inside.min() if len(inside) else q1
+    whishi = inside.max() if len(inside) else q3
+    fliers = np.sort(values[(values < whislo) | (values > whishi)])
+    return {
+        'count': int(len(values)),
+        'q1': float(q1),
+        'med': float(med),
+        'q3': float(q3),
+        'whislo': float(whislo),
+        'whishi': float(whishi),
+        'fliers': [float(v) for v in fliers]
+    }
+
+def summary_hash(summaries, title):
+    payload = json.dumps({'title': title, 'summaries': summaries}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def render_boxplot(summaries, output_file, title, figsize, orientation='vertical', xlabel=None, ylabel=None):
+    # Object-oriented API on the Agg canvas: headless and safe to call off the main thread
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    stats = [dict(summary, label=label) for label, summary in summaries.items() if summary is not None]
+    if stats:
+        ax.bxp(stats, orientation=orientation, showfliers=True, patch_artist=True,
+               boxprops={'facecolor': '#4c72b0'}, medianprops={'color': 'black'})
+    ax.set_title(title)
+    if xlabel:
+        ax.set_xlabel(xlabel)
+    if ylabel:
+        ax.set_ylabel(ylabel)
+    fig.savefig(output_file)
+
+class PlotRenderer:
+    def __init__(self, manifest_file=MANIFEST_FILE, background=True):
+        self.manifest_file = manifest_file
+        self.manifest = {}
+        if os.path.exists(manifest_file):
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1) if background else None
+        self.futures = []
+        self.skipped = 0
+        self.rendered = 0
+
+    def submit(self, output_file, summaries, title, figsize, **kwargs):
+        digest = summary_hash(summaries, title)
+        if self.manifest.get(output_file) == digest and os.path.exists(output_file):
+            self.skipped += 1
+            return False
+        if self.executor is None:
+            self._render(output_file, digest, summaries, title, figsize, kwargs)
+        else:
+            self.futures.append(self.executor.submit(self._render, output_file, digest, summaries, title, figsize, kwargs))
+        return True
+
+    def _render(self, output_file, digest, summaries, title, figsize, kwargs):
+        render_boxplot(summaries, output_file, title, figsize, **kwargs)
+        with self.lock:
+            self.manifest[output_file] = digest
+            self.rendered += 1
+
+    def school_distribution(self, school, scores):
+        summaries = {'': summarize_scores(scores)}
+        return self.submit(
+            f'score_distribution_{school}.png',
+            summaries,
+            f'Distribution of Total Scores - {school.capitalize()}',
+            (10, 6),
+            orientation='horizontal',
+            xlabel='total_score'
+        )
+
+    def schools_distribution(self, combined_df):
+        summaries = {school: summarize_scores(group['total_score']) for school, group in combined_df.groupby('school', sort=False)}
+        return self.submit(
+            'score_distribution_all_schools.png',
+            summaries,
+            'Distribution of Total Scores by School',
+            (12, 6),
+            xlabel='school',
+            ylabel='total_score'
+        )
+
+    def close(self):
+        for future in self.futures:
+            future.result()
+        self.futures = []
+        if self.executor is not None:
+            self.executor.shutdown()
+        with open(self.manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=4)
+        print(f"Plots rendered: {self.rendered}, unchanged and skipped: {self.skipped}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,82 @@
+from array import array
+
+from lexical import normalize_text, MAX_N
+
+MAX_VOCAB = 500000  # Distinct tokens before new documents start a fresh vocabulary
+
+class Vocabulary:
+    __slots__ = ('ids', 'tokens', 'automata')
+
+    def __init__(self):
+        self.ids = {}
+        self.tokens = []
+        self.automata = {}  # Phrase automata built over these token ids, by library hash
+
+    def add(self, token):
+        token_id = self.ids.get(token)
+        if token_id is None:
+            token_id = len(self.tokens)
+            self.ids[token] = token_id
+            self.tokens.append(token)
+        return token_id
+
+    def lookup(self, token):
+        return self.ids.get(token)
+
+    def encode(self, words):
+        return array('I', [self.add(word) for word in words])
+
+    def __len__(self):
+        return len(self.tokens)
+
+_shared_vocab = Vocabulary()
+
+def shared_vocab():
+    # The vocabulary new documents share across schools and runs in this process. Once it holds
+    # MAX_VOCAB tokens it is replaced; documents already built keep theirs, and the old one (with
+    # its automata) is freed along with them
+    global _shared_vocab
+    if len(_shared_vocab) >= MAX_VOCAB:
+        _shared_vocab = Vocabulary()
+    return _shared_vocab
+
+class ProfileDoc:
+    __slots__ = ('text', 'token_ids', 'vocab', '_ngrams', '_buckets')
+
+    def __init__(self, text, vocab=None):
+        self.text = normalize_text(text)
+        self.vocab = vocab = vocab if vocab is not None else shared_vocab()
+        self.token_ids = vocab.encode(self.text.split())
+        self._ngrams = [None] * MAX_N
+        self._buckets = [None] * MAX_N
+
+    def ngrams(self, n):
+        # Distinct n-grams only, built on first use; best-match scoring is a max so duplicates never matter
+        grams = self._ngrams[n-1]
+        if grams is None:
+            tokens = self.vocab.tokens
+            ids = self.token_ids
+            grams = tuple(dict.fromkeys(
+                ' '.join([tokens[token_id] for token_id in ids[i:i+n]]) for i in range(len(ids)-n+1)
+            ))
+            self._ngrams[n-1] = grams
+        return grams
+
+    def length_buckets(self, n):
+        # (exact-match set, n-grams grouped by character length) for the pruned fuzzy matcher
+        buckets = self._buckets[n-1]
+        if buckets is None:
+            grams = self.ngrams(n)
+            by_length = {}
+            for gram in grams:
+                by_length.setdefault(len(gram), []).append(gram)
+            buckets = (frozenset(grams), by_length)
+            self._buckets[n-1] = buckets
+        return buckets
+
+    def __getitem__(self, index):
+        # Indexes like the list of get_ngrams(text, n) results for n = 1..MAX_N
+        return self.ngrams(index + 1)
+
+    def __len__(self):
+        return len(self.token_ids)
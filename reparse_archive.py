@@ -0,0 +1,87 @@
+import argparse
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import http_fetch
+from combine_jsons import combine_school_data
+from html_archive import HtmlArchive, ARCHIVE_DIR
+from scrape_all import SCRAPERS, previous_data
+from scrape_journal import ScrapeJournal
+
+CHUNK_SIZE = 8  # Pages per task sent to a worker
+
+def _init_worker(archive_dir):
+    # Workers never touch the network: fetch() and the Selenium renders read from the archive
+    http_fetch.configure(archive_dir=archive_dir, offline=True)
+
+def _parse_page(task):
+    module_name, url = task
+    try:
+        data = importlib.import_module(module_name).scrape_person_page(url)
+        return url, data, None
+    except Exception as e:
+        return url, None, f"{type(e).__name__}: {e}"
+
+def reparse(schools=None, archive_dir=ARCHIVE_DIR, workers=None, output_file='faculty_data.json'):
+    # Runs each school's current scrape_person_page over the archived copy of every profile in its
+    # journal and rewrites faculty_data_<school>.json. Profiles that are not archived yet, or that the
+    # parser now rejects, keep their previous data
+    schools = schools or list(SCRAPERS)
+    archive = HtmlArchive(archive_dir)
+    journals = {}
+    tasks = []
+    missing = {}
+    for school in schools:
+        journal = ScrapeJournal(school)
+        if not journal.entries:
+            print(f"[{school}] no scrape journal; scrape it once before reparsing")
+            continue
+        journals[school] = journal
+        urls = list(journal.entries)
+        archived = [url for url in urls if archive.has(url)]
+        missing[school] = len(urls) - len(archived)
+        tasks += [(SCRAPERS[school], url) for url in archived]
+    archive.close()
+
+    start = time.perf_counter()
+    schools_by_module = {SCRAPERS[school]: school for school in journals}
+    parsed = {school: 0 for school in journals}
+    failed = {school: 0 for school in journals}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker, initargs=(archive_dir,)) as executor:
+        for (module_name, _), (url, data, error) in zip(tasks, executor.map(_parse_page, tasks, chunksize=CHUNK_SIZE)):
+            school = schools_by_module[module_name]
+            if data:
+                journals[school].record(url, data)
+                parsed[school] += 1
+            else:
+                failed[school] += 1
+                print(f"[{school}] could not reparse {url}: {error or 'parser returned no data'}")
+
+    school_data = {}
+    for school in schools:
+        if school in journals:
+            print(f"[{school}] reparsed {parsed[school]} profiles ({failed[school]} failed, {missing[school]} not archived)")
+            school_data[school] = journals[school].finalize()
+        else:
+            school_data[school] = previous_data(school)
+    print(f"Reparsed {sum(parsed.values())} archived pages in {time.perf_counter() - start:.1f}s")
+    if output_file:
+        combine_school_data(school_data, output_file)
+    return school_data
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run the current profile parsers over the HTML archive, without the network")
+    parser.add_argument('schools', nargs='*', help=f"Defaults to all of: {', '.join(sorted(SCRAPERS))}")
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR)
+    parser.add_argument('--workers', type=int, default=None, help="Parser processes; defaults to one per CPU")
+    parser.add_argument('--output', default='faculty_data.json', help="Combined output ('' to skip)")
+    args = parser.parse_args()
+    unknown = [school for school in args.schools if school not in SCRAPERS]
+    if unknown:
+        parser.error(f"unknown schools: {', '.join(unknown)}")
+    reparse(args.schools, args.archive_dir, args.workers, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import json
+import sqlite3
+import time
+
+RESULTS_DB = 'faculty_results.sqlite'
+SUMMARY_COLUMNS = ('target_score', 'avoid_score', 'total_score')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    config TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    result_id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL,
+    school TEXT NOT NULL,
+    name TEXT,
+    target_score REAL,
+    avoid_score REAL,
+    total_score REAL
+);
+CREATE INDEX IF NOT EXISTS results_total ON results (run_id, total_score);
+CREATE INDEX IF NOT EXISTS results_school_total ON results (run_id, school, total_score);
+CREATE TABLE IF NOT EXISTS category_scores (
+    result_id INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    school TEXT NOT NULL,
+    category TEXT NOT NULL,
+    score REAL
+);
+CREATE INDEX IF NOT EXISTS category_scores_score ON category_scores (run_id, category, score);
+CREATE INDEX IF NOT EXISTS category_scores_school_score ON category_scores (run_id, school, category, score);
+"""
+
+def connect(db_path=RESULTS_DB):
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.executescript(SCHEMA)
+    return conn
+
+def _value(value):
+    # NaN (e.g. a profile with no category signal) is stored as NULL so it never sorts as a score
+    value = float(value)
+    return None if value != value else value
+
+def write_run(df, config, db_path=RESULTS_DB):
+    # One run: the combined analysis frame (name, school, summary and <category>_score columns) and
+    # the config that produced it. Category scores go in long form so one index serves every category
+    categories = [c[:-len('_score')] for c in df.columns if c.endswith('_score') and c not in SUMMARY_COLUMNS]
+    conn = connect(db_path)
+    conn.execute("BEGIN IMMEDIATE")
+    run_id = conn.execute("INSERT INTO runs (created_at, config) VALUES (?, ?)", (time.time(), json.dumps(config))).lastrowid
+    for row in df.to_dict('records'):
+        result_id = conn.execute(
+            "INSERT INTO results (run_id, school, name, target_score, avoid_score, total_score) VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, row['school'], row['name'], _value(row['target_score']), _value(row['avoid_score']), _value(row['total_score']))
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO category_scores (result_id, run_id, school, category, score) VALUES (?, ?, ?, ?, ?)",
+            [(result_id, run_id, row['school'], category, _value(row[f'{category}_score'])) for category in categories]
+        )
+    conn.execute("COMMIT")
+    conn.close()
+    print(f"Stored {len(df)} profiles as run {run_id} in {db_path}")
+    return run_id
+
+def list_runs(db_path=RESULTS_DB):
+    conn = connect(db_path)
+    rows = conn.execute(
+        "SELECT r.run_id, r.created_at, r.config, COUNT(s.result_id) FROM runs r "
+        "LEFT JOIN results s ON s.run_id = r.run_id GROUP BY r.run_id ORDER BY r.run_id"
+    ).fetchall()
+    conn.close()
+    return [{'run_id': run_id, 'created_at': created_at, 'profiles': count, 'config': json.loads(config)}
+            for run_id, created_at, config, count in rows]
+
+def latest_run(conn):
+    run_id = conn.execute("SELECT MAX(run_id) FROM runs").fetchone()[0]
+    if run_id is None:
+        raise RuntimeError("The results store has no runs yet; run an analysis first")
+    return run_id
+
+def top_scores(db_path=RESULTS_DB, run_id=None, school=None, category=None, limit=10, ascending=False, name=None):
+    # Top (or bottom) profiles by total_score, or by one category's score, straight off the indexes.
+    # Returns (columns, rows)
+    conn = connect(db_path)
+    run_id = run_id if run_id is not None else latest_run(conn)
+    order = 'ASC' if ascending else 'DESC'
+    if category is None:
+        sql = "SELECT name, school, target_score, avoid_score, total_score FROM results WHERE run_id = ? AND total_score IS NOT NULL"
+        columns = ['name', 'school', 'target_score', 'avoid_score', 'total_score']
+        score = 'total_score'
+    else:
+        sql = ("SELECT r.name, r.school, c.score, r.total_score FROM category_scores c "
+               "JOIN results r ON r.result_id = c.result_id "
+               "WHERE c.run_id = ? AND c.category = ? AND c.score IS NOT NULL")
+        columns = ['name', 'school', f'{category}_score', 'total_score']
+        score = 'c.score'
+    params = [run_id] if category is None else [run_id, category]
+    if school is not None:
+        sql += " AND c.school = ?" if category is not None else " AND school = ?"
+        params.append(school)
+    if name is not None:
+        sql += " AND r.name LIKE ?" if category is not None else " AND name LIKE ?"
+        params.append(f'%{name}%')
+    sql += f" ORDER BY {score} {order} LIMIT ?"
+    params.append(limit)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return columns, rows
@@ -0,0 +1,174 @@
+import multiprocessing
+import os
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from cascade import ngram_scores
+from fuzzy_match import ComparisonBudget
+from profile_doc import ProfileDoc
+
+SLICE_SIZE = 16  # Rows per task; small enough that slow profiles do not leave workers idle at the end
+
+class SharedArray:
+    # A numpy array in a shared_memory block: the parent copies it in once and every worker attaches
+    # by name to a zero-copy view, so N workers cost one matrix rather than N
+    def __init__(self, block, shape, dtype, owner=False):
+        self.block = block
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    @classmethod
+    def create(cls, array):
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = cls(block, array.shape, array.dtype, owner=True)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        return cls(shared_memory.SharedMemory(name=name), shape, dtype)
+
+    @property
+    def spec(self):
+        # Picklable handle a worker attaches with
+        return self.block.name, self.array.shape, self.array.dtype.str
+
+    def close(self):
+        self.array = None
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+
+def score_worker(library, centroid_spec, comparison_budget, tasks, results):
+    # Centroids stay attached for the worker's lifetime; each school's embedding matrix is attached
+    # per task and only the task's row slice is ever read
+    centroids = SharedArray.attach(centroid_spec) if centroid_spec is not None else None
+    categories = [(group, category) for group in ('target', 'avoid') for category in library['phrases'][group]]
+    centroid_norms = np.linalg.norm(centroids.array, axis=1) if centroids is not None else None
+    attached = {}
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        call, task_id, embedding_spec, start, texts = task
+        if embedding_spec is not None and embedding_spec[0] not in attached:
+            # One school at a time: drop the previous school's block before attaching the next
+            for shared in attached.values():
+                shared.close()
+            attached = {}
+            try:
+                attached[embedding_spec[0]] = SharedArray.attach(embedding_spec)
+            except FileNotFoundError as e:
+                # A task left over from a call that failed: its block is already gone
+                results.put((call, task_id, [(None, f"{type(e).__name__}: {e}")] * len(texts)))
+                continue
+        rows = []
+        for offset, text in enumerate(texts):
+            try:
+                if embedding_spec is not None:
+                    vector = attached[embedding_spec[0]].array[start + offset]
+                    # Zero-safe like cosine_similarity: a zero vector (or centroid) scores 0, not NaN
+                    norms = centroid_norms * np.linalg.norm(vector)
+                    cosines = np.divide(centroids.array @ vector, norms, out=np.zeros(len(norms)), where=norms != 0)
+                else:
+                    cosines = np.zeros(len(categories))
+                ngrams = ngram_scores(library, ProfileDoc(text), ComparisonBudget(comparison_budget))
+                scores = {}
+                for (group, category), cosine in zip(categories, cosines):
+                    scores[f'{category}_cosine'] = float(cosine)
+                    scores[f'{category}_ngram'] = ngrams[f'{category}_ngram']
+                rows.append((scores, None))
+            except Exception as e:
+                rows.append((None, f"{type(e).__name__}: {e}"))
+        results.put((call, task_id, rows))
+    for shared in attached.values():
+        shared.close()
+    if centroids is not None:
+        centroids.close()
+
+class ScoringPool:
+    # Scores profiles in N processes from embeddings computed by the parent: cosines against the
+    # category centroids plus the fuzzy n-gram scores, the same columns as score_profile
+    def __init__(self, library, centroids=None, workers=None, comparison_budget=None):
+        workers = workers or os.cpu_count()
+        self.calls = 0
+        self.centroids = None
+        if centroids is not None:
+            matrix = [centroids[group][category] for group in ('target', 'avoid') for category in library['phrases'][group]]
+            self.centroids = SharedArray.create(np.asarray(matrix))
+        context = multiprocessing.get_context('spawn')
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        centroid_spec = self.centroids.spec if self.centroids is not None else None
+        self.processes = [
+            context.Process(target=score_worker, args=(library, centroid_spec, comparison_budget, self.tasks, self.results), daemon=True)
+            for _ in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def score(self, texts, embeddings=None):
+        # Returns (scores, error) per text in input order; embeddings is (len(texts) x dim) or None
+        texts = list(texts)
+        if not texts:
+            return []
+        shared = SharedArray.create(np.asarray(embeddings, dtype=self.centroids.array.dtype)) if embeddings is not None and self.centroids is not None else None
+        try:
+            spec = shared.spec if shared is not None else None
+            starts = range(0, len(texts), SLICE_SIZE)
+            # Every task carries this call's number; results still arriving from an earlier call that
+            # failed part way are discarded rather than read as this call's slices
+            self.calls += 1
+            call = self.calls
+            for task_id, start in enumerate(starts):
+                self.tasks.put((call, task_id, spec, start, texts[start:start + SLICE_SIZE]))
+            rows = [None] * len(texts)
+            received = 0
+            while received < len(starts):
+                result_call, task_id, task_rows = self._next_result()
+                if result_call != call:
+                    continue
+                received += 1
+                start = starts[task_id]
+                rows[start:start + len(task_rows)] = task_rows
+            return rows
+        except Exception:
+            self._drop_pending()
+            raise
+        finally:
+            if shared is not None:
+                shared.close()
+
+    def _next_result(self):
+        while True:
+            try:
+                return self.results.get(timeout=5)
+            except queue.Empty:
+                if not all(process.is_alive() for process in self.processes):
+                    raise RuntimeError("A scoring worker exited unexpectedly")
+
+    def _drop_pending(self):
+        # Slices of a failed call that no worker has picked up yet are not worth scoring
+        try:
+            while True:
+                self.tasks.get_nowait()
+        except queue.Empty:
+            pass
+
+    def close(self):
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join()
+        if self.centroids is not None:
+            self.centroids.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,9 +1,9 @@
-import requests
 from bs4 import BeautifulSoup
-import json
+from scrape_journal import ScrapeJournal
+from http_fetch import fetch
 
 def scrape_faculty_page(url):
-    response = requests.get(url)
+    response = fetch(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     
     people_links = []
@@ -17,7 +17,7 @@ def scrape_faculty_page(url):
     return people_links
 
 def scrape_person_page(url):
-    response = requests.get(url)
+    response = fetch(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     
     data = {}
@@ -85,18 +85,18 @@ def main():
     faculty_url = "https://history.unc.edu/faculty/"
     people_links = scrape_faculty_page(faculty_url)
     
-    faculty_data = []
+    journal = ScrapeJournal('unc')
     
-    for link in people_links:
+    for link in journal.pending(people_links):
         try:
             person_data = scrape_person_page(link)
-            faculty_data.append(person_data)
+            journal.record(link, person_data)
             print(f"Scraped data for {person_data['name']}")
         except Exception as e:
             print(f"Error scraping {link}: {str(e)}")
+            journal.record_failure(link, e)
     
-    with open('faculty_data_unc.json', 'w', encoding='utf-8') as jsonfile:
-        json.dump(faculty_data, jsonfile, ensure_ascii=False, indent=4)
+    return journal.finalize(people_links)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
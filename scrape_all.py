@@ -0,0 +1,93 @@
+import argparse
+import importlib
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import http_fetch
+from combine_jsons import combine_school_data
+
+# School key (as in faculty_data_<school>.json) -> scraper module
+SCRAPERS = {
+    'berkeley': 'scrape_berkley',
+    'columbia': 'scrape_columbia',
+    'duke': 'scrape_duke',
+    'harvard': 'scrape_harvard',
+    'northeastern': 'scrape_northeastern',
+    'princeton': 'scrape_princeton',
+    'stanford': 'scrape_stanford',
+    'unc': 'scrape_UNCChapelHill',
+    'upenn': 'scrape_upenn',
+    'utAustin': 'scrape_utAustin',
+    'uva': 'scrape_uva',
+    'wisconsin': 'scrape_uwisc',
+    'yale': 'scrape_yale'
+}
+
+def run_scraper(school):
+    start = time.perf_counter()
+    faculty_data = importlib.import_module(SCRAPERS[school]).main()
+    if not faculty_data:
+        # Scrapers return [] or None when the listing page times out or changes shape; that is a
+        # failure too, not a school with no faculty
+        raise RuntimeError(f"{SCRAPERS[school]} returned no profiles")
+    return faculty_data, time.perf_counter() - start
+
+def previous_data(school):
+    # Last good output for a school whose scraper failed this time, so the combined file stays complete
+    path = f'faculty_data_{school}.json'
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def scrape_all(schools=None, output_file='faculty_data.json', max_connections=http_fetch.MAX_CONNECTIONS,
+               max_browsers=http_fetch.MAX_BROWSERS, host_delay=http_fetch.HOST_DELAY, archive_dir=http_fetch.ARCHIVE_DIR):
+    # Every school scrapes in its own thread; they hit different hosts, so the refresh takes about as
+    # long as the slowest school. http_fetch keeps each host to its own politeness budget and caps
+    # connections and Selenium browsers across all of them. Every page fetched goes into the HTML
+    # archive under archive_dir, so reparse_archive.py can rebuild the data without refetching
+    schools = schools or list(SCRAPERS)
+    http_fetch.configure(max_connections=max_connections, max_browsers=max_browsers, host_delay=host_delay, archive_dir=archive_dir)
+    school_data = {}
+    elapsed = {}
+    failed = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(schools)) as executor:
+        futures = {executor.submit(run_scraper, school): school for school in schools}
+        for future in as_completed(futures):
+            school = futures[future]
+            try:
+                school_data[school], elapsed[school] = future.result()
+                print(f"[{school}] {len(school_data[school])} profiles in {elapsed[school]:.0f}s")
+            except Exception:
+                print(f"[{school}] scraper failed:\n{traceback.format_exc()}")
+                failed.append(school)
+                school_data[school] = previous_data(school)
+    wall = time.perf_counter() - start
+
+    combine_school_data({school: school_data[school] for school in schools}, output_file)
+    print(f"Scraped {len(schools) - len(failed)} of {len(schools)} schools in {wall:.0f}s "
+          f"(sequential scrapers: {sum(elapsed.values()):.0f}s)")
+    if failed:
+        print(f"Failed, kept their previous data: {', '.join(sorted(failed))}")
+    return school_data
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape every school concurrently and write the combined faculty data")
+    parser.add_argument('schools', nargs='*', help=f"Defaults to all of: {', '.join(sorted(SCRAPERS))}")
+    parser.add_argument('--output', default='faculty_data.json')
+    parser.add_argument('--max-connections', type=int, default=http_fetch.MAX_CONNECTIONS)
+    parser.add_argument('--max-browsers', type=int, default=http_fetch.MAX_BROWSERS)
+    parser.add_argument('--host-delay', type=float, default=http_fetch.HOST_DELAY, help="Seconds between requests to one host")
+    parser.add_argument('--archive-dir', default=http_fetch.ARCHIVE_DIR, help="Raw HTML archive for offline reparsing ('' to disable)")
+    args = parser.parse_args()
+    unknown = [school for school in args.schools if school not in SCRAPERS]
+    if unknown:
+        parser.error(f"unknown schools: {', '.join(unknown)}")
+    scrape_all(args.schools, args.output, args.max_connections, args.max_browsers, args.host_delay, args.archive_dir or None)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,9 @@
-import requests
 from bs4 import BeautifulSoup
-import json
-import time
+from scrape_journal import ScrapeJournal
+from http_fetch import fetch
 
 def scrape_faculty_page(url):
-    response = requests.get(url)
+    response = fetch(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     
     people_links = []
@@ -17,7 +16,7 @@ def scrape_faculty_page(url):
     return people_links
 
 def scrape_person_page(url):
-    response = requests.get(url)
+    response = fetch(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     
     data = {}
@@ -77,19 +76,18 @@ def main():
     faculty_url = "https://history.duke.edu/people/appointed-faculty/primary-faculty"
     people_links = scrape_faculty_page(faculty_url)
     
-    faculty_data = []
+    journal = ScrapeJournal('duke')
     
-    for link in people_links:
+    for link in journal.pending(people_links):
         try:
             person_data = scrape_person_page(link)
-            faculty_data.append(person_data)
+            journal.record(link, person_data)
             print(f"Scraped data for {person_data['name']}")
         except Exception as e:
             print(f"Error scraping {link}: {str(e)}")
-        time.sleep(1)  # Add a 1-second delay between requests
+            journal.record_failure(link, e)
     
-    with open('faculty_data_duke.json', 'w', encoding='utf-8') as jsonfile:
-        json.dump(faculty_data, jsonfile, ensure_ascii=False, indent=4)
+    return journal.finalize(people_links)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,69 @@
+import json
+import os
+import time
+
+from canonical_text import canonicalize_record, FIELD_CAPS
+
+class ScrapeJournal:
+    # Append-only JSONL record of every profile a scraper has parsed (or failed to parse), so an
+    # interrupted crawl keeps its progress and a rerun only fetches what is missing
+
+    def __init__(self, school, journal_file=None, output_file=None, field_caps=FIELD_CAPS):
+        self.school = school
+        self.field_caps = field_caps
+        self.journal_file = journal_file or f'faculty_data_{school}.jsonl'
+        self.output_file = output_file or f'faculty_data_{school}.json'
+        self.entries = {}
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Only the last line can be cut short by a crash mid-write
+                        continue
+                    self.entries[entry['url']] = entry
+
+    def is_done(self, url):
+        entry = self.entries.get(url)
+        return entry is not None and entry['status'] == 'ok'
+
+    def pending(self, urls):
+        # URLs never scraped plus earlier failures, in listing order
+        pending = [url for url in dict.fromkeys(urls) if not self.is_done(url)]
+        skipped = len(set(urls)) - len(pending)
+        if skipped:
+            print(f"Skipping {skipped} {self.school} profiles already in {self.journal_file}")
+        return pending
+
+    def _append(self, entry):
+        self.entries[entry['url']] = entry
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def record(self, url, data):
+        # Only a parsed record counts as done; an empty parse raises so the caller records a failure
+        if not data:
+            raise ValueError(f"No data parsed from {url}")
+        self._append({'url': url, 'status': 'ok', 'scraped_at': time.time(), 'data': data})
+
+    def record_failure(self, url, error):
+        self._append({'url': url, 'status': 'failed', 'scraped_at': time.time(), 'error': str(error)})
+
+    def finalize(self, urls=None):
+        # Writes the canonical per-school JSON in listing order (journal order when no listing is given).
+        # The journal keeps what the parser returned; the JSON gets the canonical text, so placeholders,
+        # repeated segments and page dumps never reach the analyzers
+        urls = list(dict.fromkeys(urls)) if urls is not None else list(self.entries)
+        faculty_data = [canonicalize_record(self.entries[url]['data'], self.field_caps) for url in urls if self.is_done(url)]
+        if not faculty_data and os.path.exists(self.output_file):
+            # Nothing scraped this time (listing timed out, every profile failed): keep the last good file
+            print(f"No {self.school} profiles scraped; keeping the previous {self.output_file}")
+            return faculty_data
+        with open(self.output_file, 'w', encoding='utf-8') as jsonfile:
+            json.dump(faculty_data, jsonfile, ensure_ascii=False, indent=4)
+        failed = [url for url in urls if url in self.entries and not self.is_done(url)]
+        missing = [url for url in urls if url not in self.entries]
+        print(f"Wrote {len(faculty_data)} {self.school} profiles to {self.output_file}"
+              f" ({len(failed)} failed, {len(missing)} not yet scraped; rerun to retry them)")
+        return faculty_data
@@ -1,6 +1,7 @@
 import requests
 from bs4 import BeautifulSoup
-import json
+from scrape_journal import ScrapeJournal
+from http_fetch import fetch
 import time
 import random
 from fake_useragent import UserAgent
@@ -23,7 +24,7 @@ def create_session():
     return session
 
 def scrape_faculty_page(url, session):
-    response = session.get(url)
+    response = fetch(url, session)
     if response.status_code == 403:
         print(f"Access forbidden. Response content: {response.text}")
         return []
@@ -41,12 +42,13 @@ def scrape_faculty_page(url, session):
         # save source to text file
         with open('faculty_page_source_northeastern.txt', 'w', encoding='utf-8') as file:
             file.write(response.text)   
-        exit(1)
+        # Let main() stop cleanly; profiles already in the journal are kept
+        return []
 
     return people_links
 
-def scrape_person_page(url, session):
-    response = session.get(url)
+def scrape_person_page(url, session=None):
+    response = fetch(url, session)
     soup = BeautifulSoup(response.content, 'html.parser')
     
     data = {}
@@ -115,18 +117,21 @@ def main():
     
     if not people_links:
         print("No faculty links found. Exiting.")
-        return
+        return []
     
-    faculty_data = []
+    journal = ScrapeJournal('northeastern')
     
-    for link in people_links:
-        person_data = scrape_person_page(link, session)
-        faculty_data.append(person_data)
-        print(f"Scraped data for {person_data['name']}")
+    for link in journal.pending(people_links):
+        try:
+            person_data = scrape_person_page(link, session)
+            journal.record(link, person_data)
+            print(f"Scraped data for {person_data['name']}")
+        except Exception as e:
+            print(f"Error scraping {link}: {str(e)}")
+            journal.record_failure(link, e)
         time.sleep(random.uniform(1, 3))  # Random delay between requests
     
-    with open('faculty_data_northeastern.json', 'w', encoding='utf-8') as jsonfile:
-        json.dump(faculty_data, jsonfile, ensure_ascii=False, indent=4)
+    return journal.finalize(people_links)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,7 +1,8 @@
 import requests
 from bs4 import BeautifulSoup
 import time
-import json
+from scrape_journal import ScrapeJournal
+from http_fetch import fetch, browser_get, browser_slot, archive_page
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
@@ -19,52 +20,55 @@ def initialize_driver():
     return webdriver.Chrome(service=Service(ChromeDriverManager().install()))
 
 def scrape_faculty_page(url):
-    driver = initialize_driver()
-    try:
-        logger.info(f"Accessing URL: {url}")
-        driver.get(url)
-        
-        # Wait for the faculty list to load
-        wait = WebDriverWait(driver, 20)
+    with browser_slot():
+        driver = initialize_driver()
         try:
-            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "content-list-item")))
-        except TimeoutException:
-            logger.error("Timed out waiting for faculty list to load")
-            return []
+            logger.info(f"Accessing URL: {url}")
+            browser_get(driver, url)
+        
+            # Wait for the faculty list to load
+            wait = WebDriverWait(driver, 20)
+            try:
+                wait.until(EC.presence_of_element_located((By.CLASS_NAME, "content-list-item")))
+            except TimeoutException:
+                logger.error("Timed out waiting for faculty list to load")
+                return []
 
-        # Scroll to the bottom of the page until no more new content is loaded
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        while True:
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)  # Wait for the page to load
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                break
-            last_height = new_height
+            # Scroll to the bottom of the page until no more new content is loaded
+            last_height = driver.execute_script("return document.body.scrollHeight")
+            while True:
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                time.sleep(2)  # Wait for the page to load
+                new_height = driver.execute_script("return document.body.scrollHeight")
+                if new_height == last_height:
+                    break
+                last_height = new_height
         
-        # Now that all content is loaded, parse the page
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
+            # Now that all content is loaded, parse the page
+            html = driver.page_source
+            archive_page(url, html)
+            soup = BeautifulSoup(html, 'html.parser')
         
-        people_links = []
-        for item in soup.find_all('div', class_='content-list-item-details'):
-            link = item.find('span', class_='field--name-title').find('a')
-            if link and link.get('href'):
-                full_url = requests.compat.urljoin(url, link['href'])
-                people_links.append(full_url)
+            people_links = []
+            for item in soup.find_all('div', class_='content-list-item-details'):
+                link = item.find('span', class_='field--name-title').find('a')
+                if link and link.get('href'):
+                    full_url = requests.compat.urljoin(url, link['href'])
+                    people_links.append(full_url)
         
-        logger.info(f"Found {len(people_links)} faculty links")
+            logger.info(f"Found {len(people_links)} faculty links")
         
-        # If we still haven't found any links, log the page source for debugging
-        if not people_links:
-            logger.error("No faculty links found. Page source:")
-            logger.error(driver.page_source)
+            # If we still haven't found any links, log the page source for debugging
+            if not people_links:
+                logger.error("No faculty links found. Page source:")
+                logger.error(driver.page_source)
         
-        return people_links
-    finally:
-        driver.quit()
+            return people_links
+        finally:
+            driver.quit()
 
 def scrape_person_page(url):
-    response = requests.get(url)
+    response = fetch(url)
     soup = BeautifulSoup(response.text, 'html.parser')
     
     data = {}
@@ -142,16 +146,18 @@ def main():
     faculty_url = "https://history.princeton.edu/people/faculty"
     people_links = scrape_faculty_page(faculty_url)
     
-    faculty_data = []
+    journal = ScrapeJournal('princeton')
     
-    for link in people_links:
-        person_data = scrape_person_page(link)
-        faculty_data.append(person_data)
-        print(f"Scraped data for {person_data['name']}")
-        time.sleep(1)  # Add a 1-second delay between requests
+    for link in journal.pending(people_links):
+        try:
+            person_data = scrape_person_page(link)
+            journal.record(link, person_data)
+            print(f"Scraped data for {person_data['name']}")
+        except Exception as e:
+            print(f"Error scraping {link}: {str(e)}")
+            journal.record_failure(link, e)
     
-    with open('faculty_data_princeton.json', 'w', encoding='utf-8') as jsonfile:
-        json.dump(faculty_data, jsonfile, ensure_ascii=False, indent=4)
+    return journal.finalize(people_links)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
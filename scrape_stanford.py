@@ -1,12 +1,13 @@
 import requests
 from bs4 import BeautifulSoup
 import sys
-import json
+from scrape_journal import ScrapeJournal
+from http_fetch import fetch
 
 
 def scrape_faculty_page(url):
     try:
-        response = requests.get(url)
+        response = fetch(url)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, 'html.parser')
         
@@ -25,7 +26,7 @@ def scrape_faculty_page(url):
 
 def scrape_person_page(url):
     try:
-        response = requests.get(url)
+        response = fetch(url)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, 'html.parser')
         
@@ -104,20 +105,25 @@ def main():
     
     if not people_links:
         print("Error: No faculty links found. Exiting.", file=sys.stderr)
-        return
+        return []
     
-    faculty_data = []
+    journal = ScrapeJournal('stanford')
     
-    for link in people_links:
-        person_data = scrape_person_page(link)
+    for link in journal.pending(people_links):
+        try:
+            person_data = scrape_person_page(link)
+        except Exception as e:
+            print(f"Error scraping {link}: {str(e)}", file=sys.stderr)
+            journal.record_failure(link, e)
+            continue
         if person_data:
-            faculty_data.append(person_data)
+            journal.record(link, person_data)
             print(f"Scraped data for {person_data['name']}")
         else:
             print(f"Warning: Failed to scrape data for {link}", file=sys.stderr)
+            journal.record_failure(link, "No data returned")
     
-    with open('faculty_data_stanford.json', 'w', encoding='utf-8') as jsonfile:
-        json.dump(faculty_data, jsonfile, ensure_ascii=False, indent=4)
+    return journal.finalize(people_links)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,10 +1,9 @@
-import requests
 from bs4 import BeautifulSoup
-import json
-import time
+from scrape_journal import ScrapeJournal
+from http_fetch import fetch
 
 def scrape_faculty_page(url):
-    response = requests.get(url)
+    response = fetch(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     
     people_links = []
@@ -18,7 +17,7 @@ def scrape_faculty_page(url):
     return people_links
 
 def scrape_person_page(url):
-    response = requests.get(url)
+    response = fetch(url)
     if response.status_code != 200:
         return {}
     
@@ -84,23 +83,21 @@ def main():
     faculty_url = "https://history.wisc.edu/people-main/faculty-listed-alphabetically/"
     people_links = scrape_faculty_page(faculty_url)
     
-    faculty_data = []
+    journal = ScrapeJournal('wisconsin')
     
-    for link in people_links:
+    for link in journal.pending(people_links):
         try:
             person_data = scrape_person_page(link)
-            faculty_data.append(person_data)
+            journal.record(link, person_data)
             print(f"Scraped data for {person_data['name']}")
         except Exception as e:
             print(f"Error scraping {link}: {str(e)}")
-            # Optionally, add a placeholder entry for failed scrapes
-            faculty_data.append({"name": "Scraping failed", "url": link})
-        time.sleep(1)  # Add a 1-second delay between requests
+            journal.record_failure(link, e)
     
-    with open('faculty_data_wisconsin.json', 'w', encoding='utf-8') as jsonfile:
-        json.dump(faculty_data, jsonfile, ensure_ascii=False, indent=4)
+    faculty_data = journal.finalize(people_links)
 
     print(f"Scraped {len(faculty_data)} faculty members. Check faculty_data_wisconsin.json for results.")
+    return faculty_data
 
 if __name__ == "__main__":
     main()
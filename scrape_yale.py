@@ -1,10 +1,9 @@
-import requests
 from bs4 import BeautifulSoup
-import json
-import time
+from scrape_journal import ScrapeJournal
+from http_fetch import fetch
 
 def scrape_faculty_page(url):
-    response = requests.get(url)
+    response = fetch(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     
     people_links = []
@@ -18,7 +17,7 @@ def scrape_faculty_page(url):
     return people_links
 
 def scrape_person_page(url):
-    response = requests.get(url)
+    response = fetch(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     
     data = {}
@@ -84,21 +83,19 @@ def main():
         people_links = scrape_faculty_page(url)
         all_people_links.extend(people_links)
         print(f"Scraped {len(people_links)} links from page {i}")
-        time.sleep(1)  # Be polite, wait a second between requests
     
-    faculty_data = []
+    journal = ScrapeJournal('yale')
     
-    for link in all_people_links:
+    for link in journal.pending(all_people_links):
         try:
             person_data = scrape_person_page(link)
-            faculty_data.append(person_data)
+            journal.record(link, person_data)
             print(f"Scraped data for {person_data['name']}")
         except Exception as e:
             print(f"Error scraping {link}: {str(e)}")
-        time.sleep(1)  # Be polite, wait a second between requests
+            journal.record_failure(link, e)
     
-    with open('faculty_data_yale.json', 'w', encoding='utf-8') as jsonfile:
-        json.dump(faculty_data, jsonfile, ensure_ascii=False, indent=4)
+    return journal.finalize(all_people_links)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,187 @@
+import hashlib
+import os
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from fuzzy_match import score_phrase_pruned
+from lexical import MAX_N
+from phrase_matcher import exact_phrase_hits
+from profile_doc import ProfileDoc
+
+N_FEATURES = 2 ** 20
+CALIBRATION_SIZE = 25  # Profiles scored with both engines to fit the quantile map
+CALIBRATION_QUANTILES = 101
+CALIBRATION_SEED = 0
+CALIBRATION_DIR = 'sparse_calibrations'
+
+class SparseNgramEngine:
+    # Approximates the fuzzy _ngram score with character-trigram vectors: each query n-gram's best
+    # fuzz.ratio against the profile's n-grams becomes its best cosine, computed for a whole batch
+    # of profiles from per-word trigram vectors. A quantile map fitted against the fuzzy engine on a
+    # sample of profiles brings the result onto the usual _ngram scale
+    def __init__(self, library, max_n=MAX_N):
+        self.library = library
+        self.max_n = max_n
+        self.vectorizer = HashingVectorizer(
+            analyzer='char_wb', ngram_range=(3, 3), n_features=N_FEATURES,
+            alternate_sign=False, norm='l2', lowercase=False
+        )
+        # Raw trigram counts for single profile words, composed into n-gram vectors in raw_scores
+        self.word_vectorizer = HashingVectorizer(
+            analyzer='char_wb', ngram_range=(3, 3), n_features=N_FEATURES,
+            alternate_sign=False, norm=None, lowercase=False
+        )
+        # Flatten every compiled phrase; distinct query n-grams are vectorized once per n
+        self.phrases = []
+        grams = [dict() for _ in range(max_n)]
+        for group, categories in library['phrases'].items():
+            for category, phrases in categories.items():
+                for compiled in phrases:
+                    self.phrases.append((group, category, compiled))
+                    for n, q_grams in enumerate(compiled['ngrams'][:max_n], start=1):
+                        for q_gram in q_grams:
+                            grams[n-1].setdefault(q_gram, len(grams[n-1]))
+        self.query_grams = [list(g) for g in grams]
+        self.query_vectors = [self.vectorizer.transform(g) if g else None for g in self.query_grams]
+        # phrase_weights[n-1] is (phrases x query n-grams): n*n per occurrence over the phrase's max_score / 100
+        self.phrase_weights = []
+        for n in range(1, max_n + 1):
+            weights = np.zeros((len(self.phrases), len(self.query_grams[n-1])))
+            for p, (_, _, compiled) in enumerate(self.phrases):
+                if compiled['max_score'] > 0 and n <= len(compiled['ngrams']):
+                    for q_gram in compiled['ngrams'][n-1]:
+                        weights[p, grams[n-1][q_gram]] += n * n * 100.0 / compiled['max_score']
+            self.phrase_weights.append(weights)
+        self.raw_points = None
+        self.fuzzy_points = None
+
+    @property
+    def key(self):
+        return calibration_key(self.raw_points, self.fuzzy_points)
+
+    def raw_scores(self, docs):
+        # (profiles x phrases) scores on the cosine scale, before calibration. char_wb trigrams are taken
+        # per word, so an n-gram's count vector is the sum of its words' vectors: only distinct words are
+        # hashed, and each n-gram's cosine is composed from word-level dot products
+        scores = np.zeros((len(docs), len(self.phrases)))
+        doc_ids = [np.asarray(doc.token_ids, dtype=np.int64) for doc in docs]
+        if not any(len(ids) for ids in doc_ids):
+            return scores
+        words = np.unique(np.concatenate(doc_ids))
+        rows = [np.searchsorted(words, ids) for ids in doc_ids]
+        vocab = docs[0].vocab
+        counts = self.word_vectorizer.transform([vocab.tokens[word] for word in words])
+        squares = np.asarray(counts.multiply(counts).sum(axis=1)).ravel()
+
+        # Dot products between words 1 and 2 positions apart, computed once per distinct pair
+        pair_dots = []
+        for gap in range(1, self.max_n):
+            keys = [r[:-gap] * len(words) + r[gap:] for r in rows]
+            unique, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+            dots = np.asarray(counts[unique // len(words)].multiply(counts[unique % len(words)]).sum(axis=1)).ravel()
+            offsets = np.cumsum([0] + [len(k) for k in keys])
+            pair_dots.append([dots[inverse[offsets[d]:offsets[d + 1]]] for d in range(len(docs))])
+
+        for n in range(1, self.max_n + 1):
+            if self.query_vectors[n-1] is None:
+                continue
+            word_query = (counts @ self.query_vectors[n-1].T).toarray()
+            per_doc = np.zeros((len(docs), word_query.shape[1]))
+            for d, r in enumerate(rows):
+                length = len(r) - n + 1
+                if length <= 0:
+                    continue
+                numerator = sum(word_query[r[i:i + length]] for i in range(n))
+                norm = sum(squares[r[i:i + length]] for i in range(n))
+                for i in range(n):
+                    for j in range(i + 1, n):
+                        norm = norm + 2 * pair_dots[j - i - 1][d][i:i + length]
+                per_doc[d] = (numerator / np.sqrt(np.maximum(norm, 1e-12))[:, None]).max(axis=0)
+            scores += per_doc @ self.phrase_weights[n-1].T
+        return np.minimum(scores, 1.0)
+
+    def calibrate(self, docs, sample_size=CALIBRATION_SIZE):
+        # Quantile map from sparse scores to fuzzy scores over every (profile, phrase) pair of a sample
+        if not docs:
+            raise ValueError("The sparse engine needs at least one profile to calibrate on")
+        rng = np.random.default_rng(CALIBRATION_SEED)
+        sample = [docs[i] for i in sorted(rng.choice(len(docs), size=min(sample_size, len(docs)), replace=False))]
+        raw = self.raw_scores(sample).ravel()
+        fuzzy = np.array([[score_phrase_pruned(compiled, doc) for _, _, compiled in self.phrases] for doc in sample]).ravel()
+        levels = np.linspace(0, 1, CALIBRATION_QUANTILES)
+        # Endpoints pin an exact phrase (cosine 1) to 1.0 and keep the map monotone
+        self.raw_points = np.concatenate([[0.0], np.maximum.accumulate(np.quantile(raw, levels)), [1.0]])
+        self.fuzzy_points = np.concatenate([[0.0], np.maximum.accumulate(np.quantile(fuzzy, levels)), [1.0]])
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(path, raw_points=self.raw_points, fuzzy_points=self.fuzzy_points)
+
+    def load(self, path):
+        self.raw_points, self.fuzzy_points = read_calibration(path)
+
+    def score(self, texts):
+        # <category>_ngram for every profile, in input order; an empty batch (a school already fully
+        # checkpointed) returns nothing
+        if self.raw_points is None:
+            raise RuntimeError("Calibrate the sparse engine first (see calibrated_engine)")
+        docs = [ProfileDoc(text) for text in texts]
+        if not docs:
+            return []
+        phrase_scores = np.interp(self.raw_scores(docs), self.raw_points, self.fuzzy_points)
+        results = []
+        for d, doc in enumerate(docs):
+            hits = exact_phrase_hits(self.library, doc)
+            scores = {}
+            for p, (group, category, _) in enumerate(self.phrases):
+                value = 1.0 if category in hits[group] else float(phrase_scores[d, p])
+                key = f'{category}_ngram'
+                scores[key] = max(scores.get(key, 0.0), value)
+            results.append(scores)
+        return results
+
+def calibration_key(raw_points, fuzzy_points):
+    # Goes into checkpoint run keys in place of 'sparse', so scores from different calibrations never mix
+    digest = hashlib.sha1(np.concatenate([raw_points, fuzzy_points]).tobytes()).hexdigest()
+    return f'sparse-{digest[:8]}'
+
+def read_calibration(path):
+    with np.load(path) as data:
+        return data['raw_points'], data['fuzzy_points']
+
+def calibration_path(library, directory=CALIBRATION_DIR):
+    return os.path.join(directory, f"{library['hash'][:16]}.npz")
+
+def saved_key(library, directory=CALIBRATION_DIR):
+    # The run key suffix a sparse run would use, without fitting; 'sparse' when not calibrated yet
+    path = calibration_path(library, directory)
+    return calibration_key(*read_calibration(path)) if os.path.exists(path) else 'sparse'
+
+def corpus_texts(load_faculty_data):
+    # combined_text of every faculty_data_<school>.json here, in school order, whichever schools a run covers
+    schools = sorted(f[len('faculty_data_'):-len('.json')] for f in os.listdir() if f.startswith('faculty_data_') and f.endswith('.json'))
+    texts = []
+    for school in schools:
+        df, _ = load_faculty_data(f'faculty_data_{school}.json')
+        texts += list(df['combined_text'])
+    return texts
+
+def calibrated_engine(library, load_faculty_data, directory=CALIBRATION_DIR):
+    # The quantile map is fitted once per category library on a fixed sample of the whole corpus and
+    # saved, so single-school, resumed and later runs all score on the same scale. Delete the file to
+    # refit on a changed corpus
+    engine = SparseNgramEngine(library)
+    path = calibration_path(library, directory)
+    if os.path.exists(path):
+        engine.load(path)
+    else:
+        texts = corpus_texts(load_faculty_data)
+        if not texts:
+            raise ValueError("The sparse engine needs at least one profile to calibrate on")
+        rng = np.random.default_rng(CALIBRATION_SEED)
+        sample = sorted(rng.choice(len(texts), size=min(CALIBRATION_SIZE, len(texts)), replace=False))
+        engine.calibrate([ProfileDoc(texts[i]) for i in sample])
+        engine.save(path)
+        print(f"Calibrated the sparse engine on {len(sample)} of {len(texts)} profiles; saved to {path}")
+    return engine
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+import analyze_faculty_bert
+
+def test_embed_rows_isolates_a_failing_profile(monkeypatch):
+    def profile_embeddings(df, rows, *args):
+        texts = [df['combined_text'].iloc[i] for i in rows]
+        if 'bad' in texts:
+            raise ValueError('encoder rejected the batch')
+        return [np.full(2, len(text), dtype=float) for text in texts]
+
+    monkeypatch.setattr(analyze_faculty_bert, 'profile_embeddings', profile_embeddings)
+    df = pd.DataFrame({'combined_text': ['war', 'bad', 'society']})
+    vectors, errors = analyze_faculty_bert.embed_rows(df, [0, 1, 2])
+    assert sorted(vectors) == [0, 2]
+    assert list(vectors[2]) == [7.0, 7.0]
+    assert list(errors) == [1] and isinstance(errors[1], ValueError)
+    vectors, errors = analyze_faculty_bert.embed_rows(df, [0, 2])
+    assert sorted(vectors) == [0, 2] and errors == {}
@@ -0,0 +1,43 @@
+import pandas as pd
+
+from canonical_text import canonicalize_record, cap_text, split_empty_profiles, TEXT_FIELDS
+
+RAW = {
+    'name': 'Jane  Doe',
+    'url': 'https://example.edu/jane',
+    'specialties': 'No fields found; No subfields found',
+    'intro': 'Jane Doe studies the military history of the Cold War.\n\nJane Doe studies the military history of the Cold War.  She teaches at Duke.',
+    'publications': ['Jane Doe studies the military history of the Cold War.', 'Soldiers and Society (2019)'],
+    'office': 'N/A'
+}
+
+def test_placeholders_dropped_and_repeats_removed():
+    record = canonicalize_record(RAW)
+    assert record['specialties'] is None
+    assert record['office'] is None
+    assert record['courses'] is None
+    # Fields are deduplicated in TEXT_FIELDS order, so publications keeps the sentence intro repeats
+    assert record['publications'] == 'Jane Doe studies the military history of the Cold War.\nSoldiers and Society (2019)'
+    assert record['intro'] == 'She teaches at Duke.'
+    assert record['name'] == 'Jane  Doe'
+
+def test_canonicalization_is_idempotent():
+    record = canonicalize_record(RAW)
+    assert canonicalize_record(record) == record
+
+def test_caps_cut_at_a_word_boundary():
+    assert cap_text('military history of war', 12) == 'military'
+    assert cap_text('first line\nsecond line', 15) == 'first line'
+    assert cap_text('unbroken', 4) == 'unbr'
+    assert cap_text('short', None) == 'short'
+    record = canonicalize_record({'intro': 'word ' * 100}, {'intro': 50})
+    assert len(record['intro']) <= 50 and not record['intro'].endswith(' ')
+
+def test_every_text_field_present():
+    assert set(TEXT_FIELDS) <= set(canonicalize_record({'name': 'X'}))
+
+def test_split_empty_profiles_keeps_both_parts():
+    df = pd.DataFrame({'name': ['A', 'B', 'C'], 'combined_text': ['war ', '   ', 'society']})
+    with_text, empty = split_empty_profiles(df, 'duke')
+    assert list(with_text['name']) == ['A', 'C']
+    assert list(empty['name']) == ['B']
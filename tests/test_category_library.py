@@ -0,0 +1,38 @@
+import os
+
+import numpy as np
+
+from category_library import categories_hash, load_category_library
+
+TARGET = {'military': ['military', 'warfare'], 'cold war': ['cold war', 'soviet']}
+AVOID = {'islam': ['islam']}
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return np.full(4, len(text), dtype=float)
+
+def test_library_is_compiled_and_embedded_once(tmp_path):
+    library_file = str(tmp_path / 'library.pkl')
+    embed = CountingEmbedder()
+    first = load_category_library(TARGET, AVOID, 'test-backend', embed, library_file)
+    assert embed.calls == 3
+    second = load_category_library(TARGET, AVOID, 'test-backend', embed, library_file)
+    assert embed.calls == 3
+    assert second['hash'] == first['hash']
+    assert np.array_equal(second['centroids']['test-backend']['target']['military'], first['centroids']['test-backend']['target']['military'])
+    assert os.listdir(tmp_path) == ['library.pkl']
+
+def test_new_backend_adds_centroids_to_the_same_library(tmp_path):
+    library_file = str(tmp_path / 'library.pkl')
+    load_category_library(TARGET, AVOID, 'a', CountingEmbedder(), library_file)
+    library = load_category_library(TARGET, AVOID, 'b', CountingEmbedder(), library_file)
+    assert set(library['centroids']) == {'a', 'b'}
+
+def test_hash_follows_categories_and_their_order():
+    assert categories_hash(TARGET, AVOID) != categories_hash({'military': ['military']}, AVOID)
+    reordered = {'cold war': TARGET['cold war'], 'military': TARGET['military']}
+    assert categories_hash(TARGET, AVOID) != categories_hash(reordered, AVOID)
@@ -0,0 +1,50 @@
+import os
+
+from checkpoint import SchoolCheckpoint, run_key
+
+def test_run_key_tracks_what_changes_raw_scores():
+    base = run_key('a' * 40, 'all-MiniLM-L6-v2')
+    assert base == f"{'a' * 16}-all-MiniLM-L6-v2"
+    assert run_key('a' * 40, 'org/model') == f"{'a' * 16}-org_model"
+    assert run_key('a' * 40, 'all-MiniLM-L6-v2', comparison_budget=50) == base + '-budget50'
+    assert run_key('b' * 40, 'all-MiniLM-L6-v2') != base
+
+def test_resume_reuses_rows_and_retries_failures(tmp_path):
+    checkpoint = SchoolCheckpoint(str(tmp_path), 'run', 'duke')
+    done_key = SchoolCheckpoint.row_key(0, 'military history')
+    failed_key = SchoolCheckpoint.row_key(1, 'cold war')
+    checkpoint.record(done_key, {'military_cosine': 0.25})
+    checkpoint.record_failure(failed_key, 'Jane Doe', ValueError('encoder timeout'))
+    assert not checkpoint.close(2)
+    assert not checkpoint.is_done()
+
+    resumed = SchoolCheckpoint(str(tmp_path), 'run', 'duke', resume=True)
+    assert resumed.scores_for(done_key) == {'military_cosine': 0.25}
+    assert resumed.scores_for(failed_key) is None
+    assert not os.path.exists(resumed.retry_file)
+    resumed.record(failed_key, {'military_cosine': 0.5})
+    assert resumed.close(2)
+    assert resumed.is_done()
+
+def test_fresh_run_discards_old_rows(tmp_path):
+    key = SchoolCheckpoint.row_key(0, 'military history')
+    checkpoint = SchoolCheckpoint(str(tmp_path), 'run', 'duke')
+    checkpoint.record(key, {'military_cosine': 0.25})
+    checkpoint.close(1)
+    fresh = SchoolCheckpoint(str(tmp_path), 'run', 'duke')
+    assert fresh.scores_for(key) is None
+    assert not fresh.is_done()
+    fresh.close(0)
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    key = SchoolCheckpoint.row_key(0, 'military history')
+    checkpoint = SchoolCheckpoint(str(tmp_path), 'run', 'duke')
+    checkpoint.record(key, {'military_cosine': 0.25})
+    checkpoint._rows.write('{"key": "1:abc", "scor')
+    checkpoint._rows.close()
+    resumed = SchoolCheckpoint(str(tmp_path), 'run', 'duke', resume=True)
+    assert list(resumed.completed) == [key]
+    resumed.close(1)
+
+def test_row_key_changes_with_text():
+    assert SchoolCheckpoint.row_key(3, 'old intro') != SchoolCheckpoint.row_key(3, 'new intro')
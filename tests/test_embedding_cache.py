@@ -0,0 +1,44 @@
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+class CountingEncoder:
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, texts):
+        self.seen.extend(texts)
+        return [np.full(3, len(text), dtype=float) for text in texts]
+
+def test_only_misses_reach_the_encoder_and_are_counted(tmp_path):
+    cache = EmbeddingCache('test-backend', str(tmp_path / 'cache.sqlite'))
+    encoder = CountingEncoder()
+    first = cache.embed(['war', 'society', 'war'], encoder)
+    assert encoder.seen == ['war', 'society']
+    assert (cache.hits, cache.misses) == (1, 2)
+    second = cache.embed(['society', 'cold war'], encoder)
+    assert encoder.seen == ['war', 'society', 'cold war']
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert np.array_equal(first[1], second[0])
+    assert first.dtype == np.float32
+    cache.close()
+
+def test_vectors_persist_per_backend(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    cache = EmbeddingCache('a', path)
+    cache.embed(['war'], CountingEncoder())
+    cache.close()
+    reopened = EmbeddingCache('a', path)
+    encoder = CountingEncoder()
+    reopened.embed(['war'], encoder)
+    assert encoder.seen == [] and reopened.hits == 1
+    other = EmbeddingCache('b', path)
+    other.embed(['war'], encoder)
+    assert encoder.seen == ['war'] and other.misses == 1
+    reopened.close()
+    other.close()
+
+def test_empty_batch(tmp_path):
+    cache = EmbeddingCache('a', str(tmp_path / 'cache.sqlite'))
+    assert cache.embed([], CountingEncoder()).shape == (0, 0)
+    cache.close()
@@ -0,0 +1,52 @@
+import threading
+
+import numpy as np
+import pytest
+
+from embedding_cache import EmbeddingCache
+from embedding_pipeline import EmbeddingPrefetcher
+
+class CountingEmbedder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seen = []
+
+    def __call__(self, text):
+        if text == 'bad':
+            raise ValueError('rejected by the API')
+        with self.lock:
+            self.seen.append(text)
+        return np.full(3, len(text), dtype=np.float32)
+
+def test_identical_texts_share_one_request_and_are_cached(tmp_path):
+    cache = EmbeddingCache('test-backend', str(tmp_path / 'cache.sqlite'))
+    embed = CountingEmbedder()
+    with EmbeddingPrefetcher(embed, threads=2, embedding_cache=cache) as prefetcher:
+        prefetcher.submit([(0, 'war'), (1, 'society'), (2, 'war')])
+        vectors = [prefetcher.result(key, text) for key, text in [(0, 'war'), (1, 'society'), (2, 'war')]]
+    assert sorted(embed.seen) == ['society', 'war']
+    assert np.array_equal(vectors[0], vectors[2])
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    with EmbeddingPrefetcher(embed, threads=2, embedding_cache=cache) as prefetcher:
+        prefetcher.submit([(0, 'war')])
+        assert np.array_equal(prefetcher.result(0, 'war'), vectors[0])
+    assert sorted(embed.seen) == ['society', 'war']
+    assert (cache.hits, cache.misses) == (2, 2)
+    cache.close()
+
+def test_failed_request_raises_for_its_profile_only(tmp_path):
+    cache = EmbeddingCache('test-backend', str(tmp_path / 'cache.sqlite'))
+    with EmbeddingPrefetcher(CountingEmbedder(), threads=2, embedding_cache=cache) as prefetcher:
+        prefetcher.submit([(0, 'bad'), (1, 'war')])
+        with pytest.raises(ValueError):
+            prefetcher.result(0, 'bad')
+        assert prefetcher.result(1, 'war').shape == (3,)
+    assert cache.misses == 1
+    cache.close()
+
+def test_unsubmitted_key_is_embedded_directly():
+    embed = CountingEmbedder()
+    with EmbeddingPrefetcher(embed, threads=1) as prefetcher:
+        assert prefetcher.result('late', 'cold war').shape == (3,)
+    assert embed.seen == ['cold war']
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+import faculty_cli
+
+def test_select_analyzer_sets_the_encoder(monkeypatch):
+    monkeypatch.delenv('FACULTY_ENCODER', raising=False)
+    assert faculty_cli.select_analyzer('onnx') == 'analyze_faculty_bert'
+    assert os.environ['FACULTY_ENCODER'] == 'onnx'
+    assert faculty_cli.select_analyzer('openai') == 'analyze_faculty'
+    assert os.environ['FACULTY_ENCODER'] == 'onnx'
+
+@pytest.mark.parametrize('flags', [['--encoder-workers', '4'], ['--field-weights', 'intro=1']])
+def test_openai_rejects_local_encoder_options(flags, capsys):
+    for command in (['analyze'], ['plan']):
+        with pytest.raises(SystemExit) as exit_info:
+            faculty_cli.main(command + ['--backend', 'openai'] + flags)
+        assert exit_info.value.code == 2
+        assert 'not supported by the openai backend' in capsys.readouterr().err
+
+class FakeAnalyzer:
+    target_categories, avoid_categories = {'military': ['military']}, {}
+    target_score, avoid_score, cosine_weight, ngram_weight = 1.0, -2.0, 0.5, 0.5
+    EMBEDDING_CACHE = 'embedding_cache.sqlite'
+    calls = []
+
+    @classmethod
+    def analyze_all_schools(cls, schools, *weights, **options):
+        cls.calls.append((schools, options))
+
+def test_analyze_passes_only_the_options_given(monkeypatch):
+    monkeypatch.setattr(faculty_cli.importlib, 'import_module', lambda name: FakeAnalyzer)
+    monkeypatch.setattr(FakeAnalyzer, 'calls', [])
+    faculty_cli.main(['analyze', 'duke', '--backend', 'openai', '--no-plots'])
+    schools, options = FakeAnalyzer.calls[0]
+    assert schools == ['duke']
+    assert 'encoder_workers' not in options and 'field_weights' not in options and 'embedding_cache_file' not in options
+    faculty_cli.main(['analyze', 'duke', '--backend', 'lexical', '--no-plots', '--encoder-workers', '2', '--cascade'])
+    schools, options = FakeAnalyzer.calls[1]
+    assert options['encoder_workers'] == 2
+    assert options['cascade'] == {}
+    assert options['embedding_cache_file'] == 'embedding_cache.sqlite'
+
+def test_sweep_leaves_defaults_to_the_sweep_module(monkeypatch):
+    import weight_sweep
+
+    calls = []
+    monkeypatch.setattr(weight_sweep, 'run_sweep', lambda *args, **kwargs: calls.append((args, kwargs)))
+    faculty_cli.main(['sweep', 'duke', '--backend', 'lexical', '--avoid-score=-3:-1:3'])
+    faculty_cli.main(['sweep', 'duke', '--backend', 'lexical', '--top-k', '5'])
+    assert 'top_k' not in calls[0][1]
+    assert calls[1][1]['top_k'] == 5
+    assert sorted(set(calls[0][0][2][:, 1])) == [-3.0, -2.0, -1.0]
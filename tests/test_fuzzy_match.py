@@ -0,0 +1,35 @@
+from rapidfuzz import fuzz
+
+from fuzzy_match import ComparisonBudget, length_bound, score_phrase_pruned
+from lexical import compile_phrase, get_ngrams, normalize_text, score_compiled_phrase, MAX_N
+from profile_doc import ProfileDoc
+
+PHRASES = ['military', 'war and society', 'World War II', 'andrew jackson', 'cold war', '1812', 'Soviet Union']
+TEXTS = [
+    "Professor of military history; works on warfare and society in the Soviet era.",
+    "Andrew Jackson and Jacksonian democracy; the War of 1812 and its aftermath.",
+    "Colonial Latin America, gender and religion.",
+    "worlds war wars warfare soviets societies",
+    ""
+]
+
+def test_pruned_matches_full_scan():
+    for text in TEXTS:
+        normalized = normalize_text(text)
+        text_ngrams = [get_ngrams(normalized, n) for n in range(1, MAX_N + 1)]
+        doc = ProfileDoc(text)
+        for phrase in PHRASES:
+            compiled = compile_phrase(phrase)
+            assert score_phrase_pruned(compiled, doc) == score_compiled_phrase(compiled, text_ngrams), (phrase, text)
+
+def test_length_bound_never_below_ratio():
+    words = ['war', 'warfare', 'wars', 'society', 'soviet', 'military', 'a', '']
+    for a in words:
+        for b in words:
+            assert fuzz.ratio(a, b) <= length_bound(len(a), len(b)) + 1e-9
+
+def test_budget_caps_comparisons():
+    budget = ComparisonBudget(3)
+    score_phrase_pruned(compile_phrase('war and society'), ProfileDoc(TEXTS[0]), budget)
+    assert budget.used == 3
+    assert budget.exhausted
@@ -0,0 +1,35 @@
+from near_duplicates import DuplicateScoreCache, MinHasher, NearDuplicateIndex
+
+BASE = ("Professor of history specializing in the military history of the early American republic, "
+        "the War of 1812, Jacksonian democracy and the politics of westward expansion. Author of several "
+        "books on the Cold War and American foreign relations, teaching courses on war and society.")
+NEAR = BASE.replace("several books", "three books")
+OTHER = ("Historian of colonial Latin America whose research covers religion, gender and indigenous "
+         "communities in New Spain, with courses on the Atlantic world and the history of medicine.")
+
+def test_signature_is_deterministic():
+    assert (MinHasher().signature(BASE) == MinHasher().signature(BASE)).all()
+    assert MinHasher().signature('') is None
+
+def test_near_duplicates_share_a_representative():
+    index = NearDuplicateIndex()
+    assert index.add('a', BASE) == 'a'
+    assert index.add('b', NEAR) == 'a'
+    assert index.add('c', OTHER) == 'c'
+    assert index.add('d', BASE.upper()) == 'a'
+    assert index.clusters() == {'a': ['a', 'b', 'd'], 'c': ['c']}
+
+def test_empty_profiles_only_match_exactly():
+    index = NearDuplicateIndex()
+    assert index.add('a', '') == 'a'
+    assert index.add('b', '...') == 'a'
+    assert index.add('c', BASE) == 'c'
+
+def test_score_cache_reuses_cluster_scores():
+    cache = DuplicateScoreCache()
+    rep, scores = cache.lookup('duke:0', BASE)
+    assert scores is None
+    cache.store(rep, {'military_ngram': 0.9})
+    assert cache.lookup('yale:4', NEAR) == ('duke:0', {'military_ngram': 0.9})
+    assert cache.lookup('yale:5', OTHER)[1] is None
+    assert cache.reused == 1
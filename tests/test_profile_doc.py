@@ -0,0 +1,20 @@
+import profile_doc
+from lexical import get_ngrams, normalize_text, MAX_N
+from profile_doc import ProfileDoc, Vocabulary
+
+TEXT = "Military history of the Cold War; the war and society, and the Cold War again."
+
+def test_ngrams_match_get_ngrams():
+    doc = ProfileDoc(TEXT, Vocabulary())
+    normalized = normalize_text(TEXT)
+    for n in range(1, MAX_N + 1):
+        assert doc.ngrams(n) == tuple(dict.fromkeys(get_ngrams(normalized, n)))
+        assert doc[n - 1] == doc.ngrams(n)
+
+def test_shared_vocabulary_is_replaced_when_full(monkeypatch):
+    monkeypatch.setattr(profile_doc, 'MAX_VOCAB', 5)
+    monkeypatch.setattr(profile_doc, '_shared_vocab', Vocabulary())
+    first = ProfileDoc(TEXT)
+    second = ProfileDoc(TEXT)
+    assert first.vocab is not second.vocab
+    assert first.ngrams(2) == second.ngrams(2)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from cascade import ngram_scores
+from category_library import compile_categories
+from fuzzy_match import ComparisonBudget
+from profile_doc import ProfileDoc
+from score_pool import ScoringPool, SLICE_SIZE
+
+TARGET = {'military': ['military', 'war and society'], 'cold war': ['cold war', 'soviet']}
+AVOID = {'islam': ['islam']}
+TEXTS = ["Military history and the war of 1812.", "The Cold War and Soviet diplomacy.", "Religion in the Islamic world.", ""] * (SLICE_SIZE // 2)
+
+@pytest.fixture(scope='module')
+def library():
+    library = compile_categories(TARGET, AVOID)
+    rng = np.random.default_rng(0)
+    library['centroids']['test'] = {group: {category: rng.normal(size=8) for category in categories}
+                                    for group, categories in library['groups'].items()}
+    return library
+
+def serial_scores(library, text, vector):
+    centroids = library['centroids']['test']
+    ngrams = ngram_scores(library, ProfileDoc(text), ComparisonBudget(None))
+    scores = {}
+    for group in ('target', 'avoid'):
+        for category, centroid in centroids[group].items():
+            norm = np.linalg.norm(centroid) * np.linalg.norm(vector)
+            scores[f'{category}_cosine'] = float(centroid @ vector / norm) if norm else 0.0
+            scores[f'{category}_ngram'] = ngrams[f'{category}_ngram']
+    return scores
+
+def test_pool_matches_serial_scoring_and_ignores_stale_results(library):
+    embeddings = np.random.default_rng(1).normal(size=(len(TEXTS), 8))
+    embeddings[3] = 0
+    with ScoringPool(library, library['centroids']['test'], workers=1) as pool:
+        # A slice left over from an earlier call must not be read as this call's first slice
+        pool.results.put((0, 0, [({'stale': 1.0}, None)] * SLICE_SIZE))
+        rows = pool.score(TEXTS, embeddings)
+        assert pool.score([]) == []
+    assert len(rows) == len(TEXTS)
+    for text, vector, (scores, error) in zip(TEXTS, embeddings, rows):
+        assert error is None
+        assert scores == pytest.approx(serial_scores(library, text, vector))
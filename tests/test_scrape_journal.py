@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from scrape_journal import ScrapeJournal
+
+URLS = ['https://example.edu/a', 'https://example.edu/b', 'https://example.edu/c']
+
+def journal(tmp_path):
+    return ScrapeJournal('duke', str(tmp_path / 'duke.jsonl'), str(tmp_path / 'duke.json'))
+
+def test_resume_skips_scraped_profiles_and_retries_failures(tmp_path):
+    first = journal(tmp_path)
+    first.record(URLS[0], {'name': 'A', 'intro': 'Military history.'})
+    first.record_failure(URLS[1], 'HTTP 503')
+    resumed = journal(tmp_path)
+    assert resumed.pending(URLS + [URLS[2]]) == URLS[1:]
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    journal(tmp_path).record(URLS[0], {'name': 'A'})
+    with open(tmp_path / 'duke.jsonl', 'a', encoding='utf-8') as f:
+        f.write('{"url": "https://example.edu/b", "sta')
+    assert journal(tmp_path).pending(URLS) == URLS[1:]
+
+def test_empty_parse_is_not_recorded_as_done(tmp_path):
+    first = journal(tmp_path)
+    for data in ({}, None):
+        with pytest.raises(ValueError):
+            first.record(URLS[0], data)
+    assert journal(tmp_path).pending(URLS) == URLS
+
+def test_finalize_writes_listing_order(tmp_path):
+    first = journal(tmp_path)
+    first.record(URLS[2], {'name': 'C'})
+    first.record(URLS[0], {'name': 'A'})
+    first.record_failure(URLS[1], 'HTTP 503')
+    first.finalize(URLS)
+    with open(tmp_path / 'duke.json', 'r', encoding='utf-8') as f:
+        assert [record['name'] for record in json.load(f)] == ['A', 'C']
+
+def test_finalize_keeps_previous_file_when_nothing_was_scraped(tmp_path):
+    previous = [{'name': 'A'}]
+    with open(tmp_path / 'duke.json', 'w', encoding='utf-8') as f:
+        json.dump(previous, f)
+    first = journal(tmp_path)
+    first.record_failure(URLS[0], 'timeout')
+    assert first.finalize(URLS) == []
+    with open(tmp_path / 'duke.json', 'r', encoding='utf-8') as f:
+        assert json.load(f) == previous
@@ -0,0 +1,52 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from category_library import compile_categories
+from sparse_lexical import SparseNgramEngine, calibrated_engine, calibration_path, saved_key
+
+TARGET = {'military': ['military', 'war and society'], 'cold war': ['cold war', 'soviet']}
+AVOID = {'islam': ['islam', 'islamic world']}
+TEXTS = [
+    "Military history of the early republic and the war of 1812.",
+    "The Cold War, Soviet foreign policy and nuclear diplomacy.",
+    "Religion and society in the Islamic world.",
+    "Colonial Latin America, gender and indigenous communities.",
+    "Warfare, soldiers and society in modern Europe."
+]
+
+def load_faculty_data(input_file):
+    with open(input_file, 'r', encoding='utf-8') as f:
+        texts = json.load(f)
+    return pd.DataFrame({'combined_text': texts}), input_file
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for school, texts in (('duke', TEXTS[:3]), ('yale', TEXTS[3:])):
+        with open(f'faculty_data_{school}.json', 'w', encoding='utf-8') as f:
+            json.dump(texts, f)
+    return compile_categories(TARGET, AVOID)
+
+def test_uncalibrated_engine_refuses_to_score(corpus):
+    with pytest.raises(RuntimeError):
+        SparseNgramEngine(corpus).score(TEXTS)
+
+def test_calibration_is_fitted_once_and_saved(corpus):
+    assert saved_key(corpus) == 'sparse'
+    engine = calibrated_engine(corpus, load_faculty_data)
+    assert os.path.exists(calibration_path(corpus))
+    assert saved_key(corpus) == engine.key
+    reloaded = calibrated_engine(corpus, lambda input_file: pytest.fail('refitted a saved calibration'))
+    assert reloaded.key == engine.key
+
+def test_scores_do_not_depend_on_the_batch(corpus):
+    engine = calibrated_engine(corpus, load_faculty_data)
+    together = engine.score(TEXTS)
+    alone = [engine.score([text])[0] for text in TEXTS]
+    for batch_scores, single_scores in zip(together, alone):
+        assert batch_scores == pytest.approx(single_scores)
+    assert together[0]['military_ngram'] == 1.0
+    assert engine.score([]) == []
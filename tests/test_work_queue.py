@@ -0,0 +1,96 @@
+import json
+import time
+
+import pytest
+
+import work_queue
+from work_queue import MAX_ATTEMPTS, claim_shard, complete_shard, connect, fail_shard, queue_status, renew_lease
+
+def make_queue(db_path, shards=2):
+    conn = connect(db_path)
+    for index in range(shards):
+        conn.execute("INSERT INTO shards (school, shard_index, payload) VALUES (?, ?, ?)",
+                     ('duke', index, json.dumps([{'row': index, 'name': f'p{index}', 'text': 'military history'}])))
+    return conn
+
+def expire_leases(conn):
+    conn.execute("UPDATE shards SET lease_expires = ? WHERE status = 'leased'", (time.time() - 1,))
+
+def test_claims_each_shard_once(tmp_path):
+    conn = make_queue(str(tmp_path / 'queue.sqlite'))
+    first = claim_shard(conn, 'a', 60)
+    second = claim_shard(conn, 'b', 60)
+    assert first[0] != second[0]
+    assert claim_shard(conn, 'c', 60) is None
+
+def test_expired_lease_is_reassigned_and_stale_result_rejected(tmp_path):
+    conn = make_queue(str(tmp_path / 'queue.sqlite'), shards=1)
+    shard_id = claim_shard(conn, 'a', 60)[0]
+    expire_leases(conn)
+    assert claim_shard(conn, 'b', 60)[0] == shard_id
+    assert not renew_lease(conn, shard_id, 'a', 60)
+    assert not complete_shard(conn, shard_id, 'a', [{'row': 0}])
+    assert complete_shard(conn, shard_id, 'b', [{'row': 0}])
+    assert queue_status(str(tmp_path / 'queue.sqlite')) == {'done': 1}
+
+def test_failing_shard_stops_after_max_attempts(tmp_path):
+    conn = make_queue(str(tmp_path / 'queue.sqlite'), shards=1)
+    for attempt in range(MAX_ATTEMPTS):
+        shard_id = claim_shard(conn, 'a', 60)[0]
+        fail_shard(conn, shard_id, 'a', 'ValueError: bad profile')
+    assert claim_shard(conn, 'a', 60) is None
+    assert conn.execute("SELECT status, error FROM shards").fetchone() == ('failed', 'ValueError: bad profile')
+
+def test_expired_lease_on_last_attempt_fails_the_shard(tmp_path):
+    conn = make_queue(str(tmp_path / 'queue.sqlite'), shards=1)
+    for attempt in range(MAX_ATTEMPTS):
+        assert claim_shard(conn, f'w{attempt}', 60) is not None
+        expire_leases(conn)
+    assert claim_shard(conn, 'last', 60) is None
+    assert conn.execute("SELECT status, attempts FROM shards").fetchone() == ('failed', MAX_ATTEMPTS)
+    assert work_queue.unfinished_shards(conn) == 0
+
+STUB_ANALYZER = '''
+def finalize_scores(df, target_categories, avoid_categories, target_score, avoid_score, cosine_weight, ngram_weight):
+    df['total_score'] = df['military_cosine'] * cosine_weight + df['military_ngram'] * ngram_weight
+    return df[['name', 'total_score', 'school']]
+'''
+
+def write_config(conn, schools, tmp_path, monkeypatch):
+    # merge_results only needs the analyzer's finalize_scores
+    (tmp_path / 'stub_analyzer.py').write_text(STUB_ANALYZER)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    config = {
+        'analyzer': 'stub_analyzer',
+        'target_categories': {'military': ['military']},
+        'avoid_categories': {'islam': ['islam']},
+        'target_score': 1.0,
+        'avoid_score': -2.0,
+        'cosine_weight': 0.5,
+        'ngram_weight': 0.5
+    }
+    conn.execute("INSERT INTO meta (key, value) VALUES ('config', ?)", (json.dumps(config),))
+    conn.execute("INSERT INTO meta (key, value) VALUES ('schools', ?)", (json.dumps(schools),))
+
+def test_merge_keeps_shard_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = make_queue('queue.sqlite')
+    write_config(conn, ['duke'], tmp_path, monkeypatch)
+    claimed = [claim_shard(conn, 'a', 60)[0], claim_shard(conn, 'a', 60)[0]]
+    for shard_id in reversed(claimed):
+        row = shard_id - 1
+        complete_shard(conn, shard_id, 'a', [{'row': row, 'name': f'p{row}', 'military_cosine': 0.5, 'military_ngram': 1.0,
+                                              'islam_cosine': 0.0, 'islam_ngram': 0.0}])
+    merged = work_queue.merge_results('queue.sqlite')
+    assert list(merged['name']) == ['p0', 'p1']
+    assert merged['total_score'].tolist() == pytest.approx([0.75, 0.75])
+
+def test_merge_refuses_unfinished_and_empty_queues(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = make_queue('queue.sqlite', shards=1)
+    write_config(conn, ['duke'], tmp_path, monkeypatch)
+    with pytest.raises(RuntimeError, match='not finished'):
+        work_queue.merge_results('queue.sqlite')
+    fail_shard(conn, claim_shard(conn, 'a', 60)[0], 'a', 'boom')
+    with pytest.raises(RuntimeError, match='no shard results'):
+        work_queue.merge_results('queue.sqlite', allow_partial=True)
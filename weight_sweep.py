@@ -0,0 +1,181 @@
+import argparse
+import itertools
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from analysis_common import load_analyzer, total_scores, CONFIG_CHUNK
+from checkpoint import SchoolCheckpoint, CHECKPOINT_DIR, run_key
+from embedding_cache import EmbeddingCache, EMBEDDING_CACHE
+from embedding_reduction import load_or_fit, REDUCTION_DIMS
+
+TOP_K = 25
+
+def collect_components(analyzer, schools, checkpoint_dir=CHECKPOINT_DIR, comparison_budget=None, lexical_engine='fuzzy',
+                       field_weights=None, reduction=None, reduction_dims=REDUCTION_DIMS, embedding_cache_file=None):
+    # Raw <category>_cosine / <category>_ngram scores for every profile. They go through the same
+    # checkpoints as analyze_all_schools, keyed the same way (lexical engine, field weights and
+    # reduction included), so schools scored before with these settings are read back rather than re-scored
+    if field_weights and not hasattr(analyzer, 'embedding_key'):
+        raise ValueError(f"{analyzer.__name__} does not compose profile vectors from field weights")
+    embeds = getattr(analyzer, 'EMBEDDING_ENGINE', None) != 'lexical'
+    if reduction is not None and not embeds:
+        print("The lexical backend has no embeddings to reduce; ignoring the reduction")
+        reduction = None
+    if reduction is not None and not embedding_cache_file:
+        embedding_cache_file = EMBEDDING_CACHE
+    embedding_cache = EmbeddingCache(analyzer.EMBEDDING_BACKEND, embedding_cache_file) if embedding_cache_file and embeds else None
+    library = analyzer.load_category_library(
+        analyzer.target_categories, analyzer.avoid_categories, analyzer.EMBEDDING_BACKEND, analyzer.get_embedding
+    )
+    centroids = library['centroids'][analyzer.EMBEDDING_BACKEND]
+    # Only the BERT analyzer takes field weights
+    options = {'field_weights': field_weights} if field_weights else {}
+    backend = analyzer.embedding_key(field_weights) if field_weights else analyzer.EMBEDDING_BACKEND
+    reducer = None
+    if reduction is not None:
+        reducer = load_or_fit(backend, reduction, reduction_dims,
+                              lambda: analyzer.corpus_embeddings(schools, embedding_cache=embedding_cache, **options), centroids)
+        centroids = reducer.reduce_centroids(centroids)
+        backend += f'-{reducer.key}'
+    engine = None
+    if lexical_engine == 'sparse':
+        from sparse_lexical import calibrated_engine
+        engine = calibrated_engine(library, analyzer.load_faculty_data)
+    key = run_key(library['hash'], backend, comparison_budget, engine.key if engine is not None else lexical_engine)
+    frames = []
+    for school in schools:
+        df, school = analyzer.load_faculty_data(f'faculty_data_{school}.json')
+        checkpoint = SchoolCheckpoint(checkpoint_dir, key, school, resume=True)
+        raw_scores, index = analyzer.score_profiles(df, library, centroids, school, comparison_budget, checkpoint,
+                                                    lexical_engine=engine, embedding_cache=embedding_cache, reduction=reducer, **options)
+        checkpoint.close(len(index) + len(checkpoint.failed))
+        frames.append(pd.concat([df.loc[index, ['name', 'school']], pd.DataFrame(raw_scores, index=index)], axis=1))
+    if embedding_cache is not None:
+        embedding_cache.close()
+    raw = pd.concat(frames, ignore_index=True)
+
+    categories = list(analyzer.target_categories) + list(analyzer.avoid_categories)
+    cosine = raw[[f'{category}_cosine' for category in categories]].to_numpy(dtype=np.float64)
+    ngram = raw[[f'{category}_ngram' for category in categories]].to_numpy(dtype=np.float64)
+    is_target = np.array([category in analyzer.target_categories for category in categories])
+    return raw[['name', 'school']], cosine, ngram, is_target
+
+def rank_rows(totals):
+    # Rank 1 is the highest total score in each row; ties keep profile order
+    order = np.argsort(-totals, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, totals.shape[1] + 1)[None, :], axis=1)
+    return ranks
+
+def sweep(profiles, cosine, ngram, is_target, configs, baseline, top_k=TOP_K):
+    n = cosine.shape[0]
+    top_k = min(top_k, n)
+    baseline_ranks = rank_rows(total_scores(cosine, ngram, is_target, np.asarray([baseline], dtype=np.float64)))[0]
+    baseline_top = baseline_ranks <= top_k
+
+    ranks = np.empty((len(configs), n), dtype=np.int32)
+    spearman = np.empty(len(configs))
+    overlap = np.empty(len(configs))
+    top_profile = np.empty(len(configs), dtype=np.int64)
+    for start in range(0, len(configs), CONFIG_CHUNK):
+        chunk = rank_rows(total_scores(cosine, ngram, is_target, configs[start:start + CONFIG_CHUNK]))
+        stop = start + len(chunk)
+        ranks[start:stop] = chunk
+        d = (chunk - baseline_ranks[None, :]).astype(np.float64)
+        spearman[start:stop] = 1 - 6 * (d * d).sum(axis=1) / (n * (n * n - 1)) if n > 1 else 1.0
+        overlap[start:stop] = ((chunk <= top_k) & baseline_top[None, :]).sum(axis=1) / top_k
+        top_profile[start:stop] = np.argmin(chunk, axis=1)
+
+    config_df = pd.DataFrame(configs, columns=['target_score', 'avoid_score', 'cosine_weight', 'ngram_weight'])
+    config_df['spearman_vs_baseline'] = spearman
+    config_df[f'top{top_k}_overlap'] = overlap
+    config_df['top_name'] = profiles['name'].to_numpy()[top_profile]
+    config_df['top_school'] = profiles['school'].to_numpy()[top_profile]
+
+    profile_df = profiles.reset_index(drop=True).copy()
+    profile_df['baseline_rank'] = baseline_ranks
+    profile_df['mean_rank'] = ranks.mean(axis=0)
+    profile_df['std_rank'] = ranks.std(axis=0)
+    profile_df['min_rank'] = ranks.min(axis=0)
+    profile_df['max_rank'] = ranks.max(axis=0)
+    profile_df[f'top{top_k}_share'] = (ranks <= top_k).mean(axis=0)
+    profile_df = profile_df.sort_values('baseline_rank')
+    return config_df, profile_df, ranks
+
+def parse_values(spec):
+    # "0.35" or "0.2,0.35,0.5" or "start:stop:count" (inclusive, evenly spaced)
+    if ':' in spec:
+        start, stop, count = spec.split(':')
+        return list(np.linspace(float(start), float(stop), int(count)))
+    return [float(value) for value in spec.split(',')]
+
+def build_grid(target_scores, avoid_scores, cosine_weights, ngram_weights=None):
+    # Without explicit ngram weights, each cosine weight w is paired with 1 - w
+    rows = []
+    for target, avoid, cosine in itertools.product(target_scores, avoid_scores, cosine_weights):
+        for ngram in (ngram_weights if ngram_weights is not None else [1 - cosine]):
+            rows.append((target, avoid, cosine, ngram))
+    return np.asarray(rows, dtype=np.float64)
+
+def run_sweep(analyzer_name, schools, configs, checkpoint_dir=CHECKPOINT_DIR, comparison_budget=None, top_k=TOP_K, output_prefix='weight_sweep',
+              lexical_engine='fuzzy', field_weights=None, reduction=None, reduction_dims=REDUCTION_DIMS, embedding_cache_file=None):
+    analyzer = load_analyzer(analyzer_name)
+    profiles, cosine, ngram, is_target = collect_components(analyzer, schools, checkpoint_dir, comparison_budget, lexical_engine,
+                                                            field_weights, reduction, reduction_dims, embedding_cache_file)
+    baseline = (analyzer.target_score, analyzer.avoid_score, analyzer.cosine_weight, analyzer.ngram_weight)
+    start = time.perf_counter()
+    config_df, profile_df, ranks = sweep(profiles, cosine, ngram, is_target, configs, baseline, top_k)
+    print(f"Evaluated {len(configs)} weight configurations over {len(profiles)} profiles in {time.perf_counter() - start:.2f}s")
+
+    config_df.to_csv(f'{output_prefix}_configs.csv', index=False)
+    profile_df.to_csv(f'{output_prefix}_profiles.csv', index=False)
+    # Full rankings: ranks[c, p] is profile p's rank under configuration c (rows of the configs CSV)
+    np.savez_compressed(f'{output_prefix}_ranks.npz', ranks=ranks, configs=configs,
+                        names=profiles['name'].to_numpy(dtype=str), schools=profiles['school'].to_numpy(dtype=str))
+
+    top_k = min(top_k, len(profiles))
+    print("\nRank correlation with the current weights:")
+    print(config_df['spearman_vs_baseline'].describe())
+    print(f"\nLeast stable configurations (by top-{top_k} overlap):")
+    print(config_df.nsmallest(5, f'top{top_k}_overlap'))
+    print("\nCurrent top scorers and how their rank moves across the grid:")
+    print(profile_df.head(10))
+    return config_df, profile_df
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a grid of score weights against one set of raw scores")
+    parser.add_argument('--analyzer', default='analyze_faculty_bert')
+    parser.add_argument('--schools', nargs='*', default=None, help="Defaults to every faculty_data_<school>.json here")
+    parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR)
+    parser.add_argument('--comparison-budget', type=int, default=None)
+    parser.add_argument('--lexical-engine', choices=['fuzzy', 'sparse'], default='fuzzy')
+    parser.add_argument('--field-weights', default=None, help="Same as the analyze run to sweep, e.g. specialties=1,intro=1 (bert/onnx)")
+    parser.add_argument('--embedding-cache', default=None)
+    parser.add_argument('--reduce', choices=['pca', 'random'], default=None)
+    parser.add_argument('--reduce-dims', type=int, default=REDUCTION_DIMS)
+    parser.add_argument('--target-score', default='1', help="Value, comma list or start:stop:count")
+    parser.add_argument('--avoid-score', default='-2:-0.5:7',
+                        help="Values starting with '-' need the = form, e.g. --avoid-score=-3:-1:9")
+    parser.add_argument('--cosine-weight', default='0:1:21')
+    parser.add_argument('--ngram-weight', default=None, help="Defaults to 1 - cosine weight")
+    parser.add_argument('--top-k', type=int, default=TOP_K)
+    parser.add_argument('--output-prefix', default='weight_sweep')
+    args = parser.parse_args()
+
+    schools = args.schools or [f.split('_')[-1].split('.')[0] for f in os.listdir() if f.startswith('faculty_data_') and f.endswith('.json')]
+    configs = build_grid(
+        parse_values(args.target_score),
+        parse_values(args.avoid_score),
+        parse_values(args.cosine_weight),
+        parse_values(args.ngram_weight) if args.ngram_weight else None
+    )
+    analyzer = load_analyzer(args.analyzer)
+    field_weights = analyzer.parse_field_weights(args.field_weights) if args.field_weights else None
+    run_sweep(args.analyzer, schools, configs, args.checkpoint_dir, args.comparison_budget, args.top_k, args.output_prefix,
+              args.lexical_engine, field_weights, args.reduce, args.reduce_dims, args.embedding_cache)
+
+if __name__ == "__main__":
+    main()
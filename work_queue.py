@@ -0,0 +1,279 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import uuid
+
+import pandas as pd
+
+from analysis_common import load_analyzer
+from fuzzy_match import ComparisonBudget
+
+DEFAULT_DB = 'work_queue.sqlite'
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS shards (
+    shard_id INTEGER PRIMARY KEY,
+    school TEXT NOT NULL,
+    shard_index INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS shards_status ON shards (status, lease_expires);
+CREATE TABLE IF NOT EXISTS shard_results (
+    shard_id INTEGER PRIMARY KEY,
+    result TEXT NOT NULL
+);
+"""
+
+def connect(db_path):
+    # Local-only: SQLite's file locking is unreliable over NFS and other network filesystems, so every
+    # worker must run on the machine whose disk holds the queue file
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.executescript(SCHEMA)
+    return conn
+
+def read_config(conn):
+    row = conn.execute("SELECT value FROM meta WHERE key = 'config'").fetchone()
+    if row is None:
+        raise RuntimeError("Queue has no config; run enqueue first")
+    return json.loads(row[0])
+
+def enqueue(db_path, schools, config, shard_size=25):
+    # Splits every school's profiles into shards; config holds the analyzer module, categories and weights
+    analyzer = load_analyzer(config['analyzer'])
+    conn = connect(db_path)
+    conn.execute("BEGIN IMMEDIATE")
+    if conn.execute("SELECT COUNT(*) FROM shards").fetchone()[0]:
+        conn.execute("ROLLBACK")
+        raise RuntimeError(f"{db_path} already holds a queue; use a new file per run")
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('config', ?)", (json.dumps(config),))
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schools', ?)", (json.dumps(schools),))
+    total = 0
+    for school in schools:
+        df, _ = analyzer.load_faculty_data(f'faculty_data_{school}.json')
+        rows = [{'row': i, 'name': name, 'text': text} for i, (name, text) in enumerate(zip(df['name'], df['combined_text']))]
+        for shard_index, start in enumerate(range(0, len(rows), shard_size)):
+            conn.execute(
+                "INSERT INTO shards (school, shard_index, payload) VALUES (?, ?, ?)",
+                (school, shard_index, json.dumps(rows[start:start + shard_size]))
+            )
+            total += 1
+    conn.execute("COMMIT")
+    conn.close()
+    print(f"Enqueued {total} shards for {len(schools)} schools in {db_path}")
+    return total
+
+def claim_shard(conn, worker, lease_seconds):
+    # Pending shards first, then shards whose worker stopped renewing its lease. An expired shard that
+    # already used up MAX_ATTEMPTS (its workers keep dying on it) is marked failed instead of re-leased
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute(
+        "UPDATE shards SET status = 'failed', worker = NULL, lease_expires = NULL, "
+        "error = COALESCE(error, 'Lease expired after the last attempt') "
+        "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+        (now, MAX_ATTEMPTS)
+    )
+    row = conn.execute(
+        "SELECT shard_id, school, payload FROM shards "
+        "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+        "ORDER BY shard_id LIMIT 1",
+        (now,)
+    ).fetchone()
+    if row is not None:
+        conn.execute(
+            "UPDATE shards SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE shard_id = ?",
+            (worker, now + lease_seconds, row[0])
+        )
+    conn.execute("COMMIT")
+    return row
+
+def renew_lease(conn, shard_id, worker, lease_seconds):
+    cursor = conn.execute(
+        "UPDATE shards SET lease_expires = ? WHERE shard_id = ? AND worker = ? AND status = 'leased'",
+        (time.time() + lease_seconds, shard_id, worker)
+    )
+    return cursor.rowcount == 1
+
+def complete_shard(conn, shard_id, worker, rows):
+    conn.execute("BEGIN IMMEDIATE")
+    owner = conn.execute("SELECT worker, status FROM shards WHERE shard_id = ?", (shard_id,)).fetchone()
+    if owner != (worker, 'leased'):
+        # Lease expired and the shard was reassigned; the other worker's result wins
+        conn.execute("ROLLBACK")
+        return False
+    conn.execute("INSERT OR REPLACE INTO shard_results (shard_id, result) VALUES (?, ?)", (shard_id, json.dumps(rows)))
+    conn.execute("UPDATE shards SET status = 'done', lease_expires = NULL, error = NULL WHERE shard_id = ?", (shard_id,))
+    conn.execute("COMMIT")
+    return True
+
+def fail_shard(conn, shard_id, worker, error):
+    conn.execute(
+        "UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+        "worker = NULL, lease_expires = NULL, error = ? WHERE shard_id = ? AND worker = ?",
+        (MAX_ATTEMPTS, error, shard_id, worker)
+    )
+
+def unfinished_shards(conn):
+    return conn.execute("SELECT COUNT(*) FROM shards WHERE status IN ('pending', 'leased')").fetchone()[0]
+
+def run_worker(db_path, worker=None, lease_seconds=LEASE_SECONDS):
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    conn = connect(db_path)
+    config = read_config(conn)
+    analyzer = load_analyzer(config['analyzer'])
+    library = analyzer.load_category_library(
+        config['target_categories'], config['avoid_categories'], analyzer.EMBEDDING_BACKEND, analyzer.get_embedding
+    )
+    centroids = library['centroids'][analyzer.EMBEDDING_BACKEND]
+    completed = 0
+    while True:
+        shard = claim_shard(conn, worker, lease_seconds)
+        if shard is None:
+            # Leased shards may still come back if their worker dies, so wait for them to settle
+            if unfinished_shards(conn) == 0:
+                break
+            time.sleep(POLL_SECONDS)
+            continue
+        shard_id, school, payload = shard
+        try:
+            rows = []
+            for profile in json.loads(payload):
+                budget = ComparisonBudget(config.get('comparison_budget'))
+                scores = analyzer.score_profile(profile['text'], library, centroids, budget=budget)
+                rows.append(dict({'row': profile['row'], 'name': profile['name']}, **{k: float(v) for k, v in scores.items()}))
+                if not renew_lease(conn, shard_id, worker, lease_seconds):
+                    break
+            else:
+                if complete_shard(conn, shard_id, worker, rows):
+                    completed += 1
+                    print(f"[{worker}] finished shard {shard_id} ({school})")
+        except Exception as e:
+            fail_shard(conn, shard_id, worker, f"{type(e).__name__}: {e}")
+            print(f"[{worker}] error on shard {shard_id} ({school}): {e}")
+    conn.close()
+    return completed
+
+def queue_status(db_path):
+    conn = connect(db_path)
+    counts = dict(conn.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+    conn.close()
+    return counts
+
+def merge_results(db_path, allow_partial=False):
+    # Shards are merged in school order and shard order, so output matches a single-process run
+    conn = connect(db_path)
+    config = read_config(conn)
+    schools = json.loads(conn.execute("SELECT value FROM meta WHERE key = 'schools'").fetchone()[0])
+    counts = dict(conn.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+    if not allow_partial and set(counts) - {'done'}:
+        conn.close()
+        raise RuntimeError(f"Queue is not finished: {counts}")
+    analyzer = load_analyzer(config['analyzer'])
+    all_results = []
+    for school in schools:
+        rows = []
+        for (result,) in conn.execute(
+            "SELECT r.result FROM shards s JOIN shard_results r ON r.shard_id = s.shard_id "
+            "WHERE s.school = ? ORDER BY s.shard_index",
+            (school,)
+        ):
+            rows.extend(json.loads(result))
+        if not rows:
+            continue
+        df = pd.DataFrame(rows).drop(columns=['row'])
+        df['school'] = school
+        output_df = analyzer.finalize_scores(
+            df,
+            config['target_categories'],
+            config['avoid_categories'],
+            config['target_score'],
+            config['avoid_score'],
+            config['cosine_weight'],
+            config['ngram_weight']
+        )
+        output_df.to_csv(f'faculty_analysis_{school}.csv', index=False)
+        all_results.append(output_df)
+    conn.close()
+    if not all_results:
+        raise RuntimeError(f"{db_path} holds no shard results to merge")
+    combined_df = pd.concat(all_results, ignore_index=True)
+    combined_df.to_csv('faculty_analysis_all_schools.csv', index=False)
+    print(f"Merged {len(combined_df)} profiles from {len(all_results)} schools")
+    return combined_df
+
+def run_local(db_path, workers, lease_seconds=LEASE_SECONDS):
+    processes = [multiprocessing.Process(target=run_worker, args=(db_path, None, lease_seconds)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+def default_config(analyzer_name):
+    analyzer = load_analyzer(analyzer_name)
+    return {
+        'analyzer': analyzer_name,
+        'target_categories': analyzer.target_categories,
+        'avoid_categories': analyzer.avoid_categories,
+        'target_score': analyzer.target_score,
+        'avoid_score': analyzer.avoid_score,
+        'cosine_weight': analyzer.cosine_weight,
+        'ngram_weight': analyzer.ngram_weight,
+        'comparison_budget': None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Faculty scoring across worker processes over a local SQLite work queue")
+    parser.add_argument('--db', default=DEFAULT_DB)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help="Split schools into shards")
+    enqueue_parser.add_argument('schools', nargs='+')
+    enqueue_parser.add_argument('--analyzer', default='analyze_faculty_bert')
+    enqueue_parser.add_argument('--shard-size', type=int, default=25)
+    enqueue_parser.add_argument('--comparison-budget', type=int, default=None)
+
+    worker_parser = subparsers.add_parser('worker', help="Pull and score shards until the queue drains (on the machine holding --db)")
+    worker_parser.add_argument('--lease-seconds', type=int, default=LEASE_SECONDS)
+
+    local_parser = subparsers.add_parser('local', help="Run several worker processes on this machine, then merge")
+    local_parser.add_argument('--workers', type=int, default=os.cpu_count())
+    local_parser.add_argument('--lease-seconds', type=int, default=LEASE_SECONDS)
+
+    subparsers.add_parser('status', help="Show shard counts by status")
+
+    merge_parser = subparsers.add_parser('merge', help="Write the per-school and combined CSVs")
+    merge_parser.add_argument('--allow-partial', action='store_true')
+
+    args = parser.parse_args()
+    if args.command == 'enqueue':
+        config = default_config(args.analyzer)
+        config['comparison_budget'] = args.comparison_budget
+        enqueue(args.db, args.schools, config, args.shard_size)
+    elif args.command == 'worker':
+        run_worker(args.db, lease_seconds=args.lease_seconds)
+    elif args.command == 'local':
+        run_local(args.db, args.workers, args.lease_seconds)
+        merge_results(args.db)
+    elif args.command == 'status':
+        print(queue_status(args.db))
+    elif args.command == 'merge':
+        merge_results(args.db, args.allow_partial)
+
+if __name__ == "__main__":
+    main()